@@ -4,12 +4,24 @@ from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS # Importez CORS
+from app.persistence.cache import EntityCache
+from app.persistence.replica import ReadReplica, RoutingSession
+from app.persistence import sqlite_profile, uuid_type
+from app.persistence.write_coordinator import WriteCoordinator
+from app.utils.metrics import RequestMetrics
+from app.utils.passwords import PasswordHasher
 
 # Initialisation des extensions Flask en dehors de la fonction create_app
 # C'est important pour qu'elles soient des instances uniques et globales
 bcrypt = Bcrypt()
 jwt = JWTManager()
-db = SQLAlchemy()
+# Session qui envoie les lectures vers la réplique, si elle est configurée (app/persistence/replica.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+entity_cache = EntityCache()
+password_hasher = PasswordHasher()
+request_metrics = RequestMetrics()
+write_coordinator = WriteCoordinator()
+read_replica = ReadReplica()
 
 # Définition du schéma de sécurité pour Flask-RestX (pour le cadenas dans Swagger UI)
 authorizations = {
@@ -30,9 +42,21 @@ def create_app(config_class="config.DevelopmentConfig"):
     CORS(app, resources={r"/api/*": {"origins": "*"}})
 
     # Initialisation des extensions avec l'application Flask
+    # Format de stockage des identifiants, fixé avant toute requête
+    uuid_type.configure(app)
+    # Profil SQLite : taille du pool avant la création du moteur, pragmas (WAL...) à chaque connexion
+    sqlite_profile.configure_engine(app)
     db.init_app(app)
+    with app.app_context():
+        sqlite_profile.install_pragmas(db.engine, app.config.get('SQLITE_PRAGMAS', sqlite_profile.DEFAULT_PRAGMAS))
+    # Moteur de lecture : URI en lecture seule ou instantané rafraîchi de la base principale
+    read_replica.init_app(app, db)
     bcrypt.init_app(app)
     jwt.init_app(app)
+    entity_cache.init_app(app)
+    password_hasher.init_app(app)
+    request_metrics.init_app(app)
+    write_coordinator.init_app(app)
 
     # Imports des Namespaces des APIs.
     # Ces imports doivent venir APRÈS l'initialisation de 'db' avec 'app'
@@ -42,6 +66,7 @@ def create_app(config_class="config.DevelopmentConfig"):
     from app.api.v1.places import api as places_ns
     from app.api.v1.reviews import api as reviews_ns
     from app.api.v1.auth import api as auth_ns
+    from app.api.v1.admin import admin_ns
 
     # Création de l'instance Api pour Flask-RestX
     # Intégration des autorisations pour Swagger UI
@@ -60,5 +85,10 @@ def create_app(config_class="config.DevelopmentConfig"):
     api.add_namespace(places_ns, path='/api/v1/places')
     api.add_namespace(reviews_ns, path='/api/v1/reviews')
     api.add_namespace(auth_ns, path='/api/v1/auth')
+    api.add_namespace(admin_ns, path='/api/v1/admin')
+
+    # Commandes CLI (flask hbnb ...)
+    from app.cli import hbnb
+    app.cli.add_command(hbnb)
 
     return app
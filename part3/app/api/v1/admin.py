@@ -1,7 +1,11 @@
 from flask_restx import Namespace, Resource, fields
-from flask import request
+from flask import Response, request
+import io
+from app.services.bulk_import import RECORD_TYPES, BulkImporter, read_csv, read_ndjson
+from app import entity_cache, read_replica, request_metrics, write_coordinator
 from app.services.facade import HBnBFacade
 from app.utils.decorators import admin_required
+from app.utils.metrics import PROMETHEUS_CONTENT_TYPE
 
 admin_ns = Namespace('admin', description='Admin operations')
 
@@ -55,4 +59,72 @@ class AdminPlaceDetail(Resource):
             else:
                 return {'error': 'Place not found'}, 404
         except Exception as e:
-            return {'error': str(e)}, 500
\ No newline at end of file
+            return {'error': str(e)}, 500
+
+@admin_ns.route('/cache')
+class AdminEntityCache(Resource):
+    @admin_required
+    def get(self):
+        """Entity cache size and hit/miss/eviction counters (Admin only)"""
+        return entity_cache.stats(), 200
+
+    @admin_required
+    def delete(self):
+        """Empties the entity cache (Admin only)"""
+        entity_cache.clear()
+        return {'message': 'Entity cache cleared'}, 200
+
+@admin_ns.route('/metrics')
+class AdminMetrics(Resource):
+    @admin_ns.doc(params={'format': 'prometheus or json (default: from the Accept header, json otherwise)'})
+    @admin_required
+    def get(self):
+        """Per-route latency, SQL time, query and row histograms of this process (Admin only)
+
+        With the write coordinator enabled, its batch size and commit latency histograms too;
+        the JSON report also gives the read replica state (snapshot refreshes and age).
+        """
+        fmt = request.args.get('format')
+        if fmt is None:
+            best = request.accept_mimetypes.best_match(['application/json', 'text/plain'])
+            fmt = 'prometheus' if best == 'text/plain' else 'json'
+        if fmt == 'prometheus':
+            text = request_metrics.to_prometheus()
+            if write_coordinator.enabled:
+                text += write_coordinator.to_prometheus()
+            return Response(text, content_type=PROMETHEUS_CONTENT_TYPE)
+        if fmt != 'json':
+            return {'error': 'format must be prometheus or json'}, 400
+        return {'routes': request_metrics.to_dict(), 'write_coordinator': write_coordinator.stats(),
+                'read_replica': read_replica.stats()}, 200
+
+    @admin_required
+    def delete(self):
+        """Resets the histograms (Admin only)"""
+        request_metrics.reset()
+        write_coordinator.reset_stats()
+        return {'message': 'Metrics reset'}, 200
+
+@admin_ns.route('/bulk')
+class AdminBulkImport(Resource):
+    @admin_ns.doc(params={'type': 'Record type of every row, required for text/csv bodies'})
+    @admin_required
+    def post(self):
+        """Bulk imports users, amenities, places and reviews (Admin only)
+
+        The body is streamed: application/x-ndjson (one record per line with a
+        "type" field) or text/csv (one record type, given by ?type=).
+        """
+        content_type = request.mimetype
+        stream = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+        if content_type == 'text/csv':
+            record_type = request.args.get('type')
+            if record_type not in RECORD_TYPES:
+                return {'error': f"CSV imports require ?type= ({', '.join(RECORD_TYPES)})"}, 400
+            records = read_csv(stream, record_type)
+        elif content_type in ('application/x-ndjson', 'application/jsonl'):
+            records = read_ndjson(stream)
+        else:
+            return {'error': 'Content-Type must be application/x-ndjson or text/csv'}, 415
+        report = BulkImporter().run(records)
+        return report.to_dict(), 200
@@ -1,5 +1,6 @@
 from flask_restx import Namespace, Resource, fields
 from app.services import facade
+from app.utils.http_cache import collection_version, conditional_get, entity_version
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
 # Modifié : Ajout de cors_origins='*'
@@ -39,6 +40,8 @@ class AmenityList(Resource):
 
     @api.response(200, 'List of amenities retrieved successfully')
     @api.doc(security='Bearer Auth', params={'Authorization': {'description': 'Optionnel: Jeton JWT pour l\'authentification'}}) # Peut être public ou protégé
+    @api.response(304, 'Not modified since the ETag sent in If-None-Match')
+    @conditional_get(lambda: collection_version(facade.get_amenities_version()))
     def get(self):
         """Retrieve a list of all amenities"""
         amenities = facade.get_all_amenities()
@@ -52,6 +55,8 @@ class AmenityResource(Resource):
     @api.response(200, 'Amenity details retrieved successfully')
     @api.response(404, 'Amenity not found')
     @api.doc(security='Bearer Auth', params={'Authorization': {'description': 'Optionnel: Jeton JWT pour l\'authentification'}})
+    @api.response(304, 'Not modified since the ETag or date sent')
+    @conditional_get(lambda amenity_id: entity_version(facade.get_amenity_version(amenity_id)))
     def get(self, amenity_id):
         """Get amenity details by ID"""
         amenity = facade.get_amenity(amenity_id)
@@ -1,6 +1,10 @@
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
+from datetime import datetime, timezone
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
+from app import jwt
 from app.services import facade
+from app.services.facade import TokenAlreadyRevokedError
+from app.utils.passwords import PasswordHasherBusy
 
 api = Namespace('auth', description='Authentication operations')
 
@@ -10,28 +14,85 @@ login_model = api.model('Login', {
    'password': fields.String(required=True, description='User password')
 })
 
+token_model = api.model('Tokens', {
+   'access_token': fields.String(description='Short-lived JWT for the Authorization header'),
+   'refresh_token': fields.String(description='Long-lived JWT, single use, for POST /auth/refresh')
+})
+
+
+@jwt.token_in_blocklist_loader
+def is_token_revoked(jwt_header, jwt_payload):
+   # Only refresh tokens are revocable: access tokens are short-lived and checked without SQL
+   return jwt_payload['type'] == 'refresh' and facade.is_token_revoked(jwt_payload['jti'])
+
+
+def issue_tokens(user):
+   claims = {'is_admin': user.is_admin}
+   return {
+       'access_token': create_access_token(identity=str(user.id), additional_claims=claims),
+       'refresh_token': create_refresh_token(identity=str(user.id), additional_claims=claims)
+   }
+
+
+def revoke_current_token():
+   # Raises TokenAlreadyRevokedError if another request used this refresh token first
+   payload = get_jwt()
+   expires_at = datetime.fromtimestamp(payload['exp'], timezone.utc).replace(tzinfo=None)
+   facade.revoke_token(payload['jti'], expires_at)
+
+
 @api.route('/login')
 class Login(Resource):
    @api.expect(login_model)
+   @api.response(200, 'Access and refresh tokens', token_model)
+   @api.response(503, 'Password hashing pool saturated')
    def post(self):
        """Authenticate user and return a JWT token"""
        credentials = api.payload  # Get the email and password from the request payload
        
-       # Step 1: Retrieve the user based on the provided email
-       user = facade.get_user_by_email(credentials['email'])
-       
-       # Step 2: Check if the user exists and the password is correct
-       if not user or not user.verify_password(credentials['password']):
+       # Steps 1 and 2: retrieve the user by email and check the password
+       # (re-hashed on the way if it was stored with another bcrypt cost)
+       try:
+           user = facade.authenticate(credentials['email'], credentials['password'])
+       except PasswordHasherBusy:
+           return {'error': 'Too many login attempts in progress, retry shortly'}, 503, {'Retry-After': '1'}
+       if not user:
            return {'error': 'Invalid credentials'}, 401
 
-       # Step 3: Create a JWT token with the user's id and is_admin flag
-       access_token = create_access_token(
-           identity=str(user.id),
-           additional_claims={'is_admin': user.is_admin}
-       )
-       
-       # Step 4: Return the JWT token to the client
-       return {'access_token': access_token}, 200
+       # Step 3: Create the access and refresh tokens with the user's id and is_admin flag,
+       # and return them to the client
+       return issue_tokens(user), 200
+
+@api.route('/refresh')
+class Refresh(Resource):
+   @jwt_required(refresh=True)
+   @api.response(200, 'New access and refresh tokens', token_model)
+   @api.response(401, 'Refresh token missing, expired, revoked or already used')
+   @api.doc(security='Bearer Auth')
+   def post(self):
+       """Exchange a refresh token for new tokens (rotation: the old refresh token is revoked)"""
+       try:
+           revoke_current_token()
+       except TokenAlreadyRevokedError as e:
+           return {'error': str(e)}, 401
+       # Served by the entity cache: no password check, no bcrypt
+       user = facade.get_user(get_jwt_identity())
+       if not user:
+           return {'error': 'User not found'}, 401
+       return issue_tokens(user), 200
+
+@api.route('/logout')
+class Logout(Resource):
+   @jwt_required(refresh=True)
+   @api.response(204, 'Refresh token revoked')
+   @api.doc(security='Bearer Auth')
+   def post(self):
+       """Revoke the refresh token sent in the Authorization header"""
+       try:
+           revoke_current_token()
+       except TokenAlreadyRevokedError:
+           pass
+       return '', 204
 
 @api.route('/protected')
 class ProtectedResource(Resource):
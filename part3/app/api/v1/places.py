@@ -1,4 +1,5 @@
 from flask_restx import Namespace, Resource, fields
+from app.utils.http_cache import collection_version, conditional_get, entity_version
 from app.services.facade import HBnBFacade # Importez directement HBnBFacade
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
@@ -47,15 +48,101 @@ place_output_model = api.model('PlaceOutput', {
     'longitude': fields.Float(description='Longitude of the place'),
     'owner_id': fields.String(description='ID du propriétaire (pour la simplicité)'), # Change to owner_id
     'amenities': fields.List(fields.Nested(amenity_model), description='List of amenities'),
-    'reviews': fields.List(fields.String, description='List of review IDs for the place'), # Assuming review IDs for now
+    'review_count': fields.Integer(description='Number of reviews'),
+    'rating_average': fields.Float(description='Average rating (0 without reviews)'),
+    'rating_histogram': fields.Raw(description='Number of reviews per rating, keyed "1" to "5"'),
     'created_at': fields.DateTime(dt_format='iso8601'),
-    'updated_at': fields.DateTime(dt_format='iso8601')
+    'updated_at': fields.DateTime(dt_format='iso8601'),
+    'distance_km': fields.Float(description='Distance in km (bbox and near searches only)')
 })
 
+place_review_model = api.model('PlaceReview', {
+    'id': fields.String(description='Review ID'),
+    'text': fields.String(description='Text of the review'),
+    'rating': fields.Integer(description='Rating (1-5)'),
+    'user_id': fields.String(description='ID of the author'),
+    'created_at': fields.DateTime(dt_format='iso8601')
+})
+
+# Le détail d'un lieu contient la première page de ses critiques, pas toutes
+place_detail_model = api.inherit('PlaceDetail', place_output_model, {
+    'reviews': fields.List(fields.Nested(place_review_model), description='First page of reviews, newest first'),
+    'reviews_next_cursor': fields.String(description='Cursor for GET /places/<id>/reviews, null if there are no more reviews')
+})
+
+
+# Paramètres de pagination de la liste des lieux (pagination par curseur)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+# Pages de critiques d'un lieu (la première est incluse dans le détail du lieu)
+DEFAULT_REVIEWS_PAGE_SIZE = 10
+# Recherche géographique (?near=lat,lng&radius_km=)
+DEFAULT_RADIUS_KM = 10.0
+MAX_RADIUS_KM = 500.0
+
+place_list_parser = api.parser()
+place_list_parser.add_argument('limit', type=int, location='args', default=DEFAULT_PAGE_SIZE,
+                               help=f'Number of places per page (1-{MAX_PAGE_SIZE})')
+place_list_parser.add_argument('cursor', type=str, location='args',
+                               help='Opaque cursor returned as next_cursor by the previous page')
+place_list_parser.add_argument('min_price', type=float, location='args', help='Minimum price per night')
+place_list_parser.add_argument('max_price', type=float, location='args', help='Maximum price per night')
+place_list_parser.add_argument('min_guests', type=int, location='args', help='Minimum guest capacity')
+place_list_parser.add_argument('min_rooms', type=int, location='args', help='Minimum number of rooms')
+place_list_parser.add_argument('sort', type=str, location='args', choices=('price', 'newest', 'rating'),
+                               help='Sort order (default: creation order)')
+place_list_parser.add_argument('bbox', type=str, location='args',
+                               help='Map viewport "min_lng,min_lat,max_lng,max_lat", ordered by distance to its centre')
+place_list_parser.add_argument('near', type=str, location='args',
+                               help='Point "lat,lng": places within radius_km, nearest first')
+place_list_parser.add_argument('radius_km', type=float, location='args', default=DEFAULT_RADIUS_KM,
+                               help=f'Search radius in km for near (max {MAX_RADIUS_KM})')
+
+
+def parse_bbox(value):
+    """Parse "min_lng,min_lat,max_lng,max_lat" into floats, raise ValueError if invalid"""
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(part) for part in value.split(','))
+    except ValueError:
+        raise ValueError('bbox must be "min_lng,min_lat,max_lng,max_lat"')
+    if not (-90 <= min_lat <= max_lat <= 90) or not all(-180 <= lng <= 180 for lng in (min_lng, max_lng)):
+        raise ValueError('bbox is out of range')
+    return min_lng, min_lat, max_lng, max_lat
+
+def parse_point(value):
+    """Parse "lat,lng" into floats, raise ValueError if invalid"""
+    try:
+        lat, lng = (float(part) for part in value.split(','))
+    except ValueError:
+        raise ValueError('near must be "lat,lng"')
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError('near is out of range')
+    return lat, lng
+
 
 # Initialisation de la façade
 facade = HBnBFacade()
 
+
+def place_to_output(place):
+    """Sérialise un lieu selon place_output_model.
+
+    Le propriétaire et les agréments doivent avoir été chargés par un profil de
+    chargement du dépôt (get_places_page, get_place_details...), sinon chaque
+    lieu déclenche ses propres requêtes.
+    """
+    return place.to_dict()
+
+def review_to_output(review):
+    """Sérialise une critique selon place_review_model."""
+    return {
+        'id': review.id,
+        'text': review.text,
+        'rating': review.rating,
+        'user_id': review.user_id,
+        'created_at': review.created_at.isoformat()
+    }
+
 @api.route('') # C'est la route correcte pour une création sans ID dans l'URL
 class PlaceList(Resource):
     @api.expect(place_input_model) # Utilisez place_input_model ici
@@ -78,7 +165,7 @@ class PlaceList(Resource):
 
             # Il faut s'assurer que .to_dict() du modèle Place renvoie toutes les données
             # attendues par place_output_model, y compris les relations chargées
-            # (amenities, reviews, et owner).
+            # (amenities et owner).
             # Sinon, vous devrez construire le dictionnaire de sortie ici.
             return new_place.to_dict(), 201
 
@@ -88,64 +175,122 @@ class PlaceList(Resource):
             api.abort(500, f"An unexpected error occurred: {str(e)}")
 
 
+    @api.expect(place_list_parser)
     @api.response(200, 'List of places retrieved successfully', model=api.model('PlaceListOutput', {
-        'places': fields.List(fields.Nested(place_output_model), description='List of places')
+        'places': fields.List(fields.Nested(place_output_model), description='List of places'),
+        'next_cursor': fields.String(description='Cursor of the next page, null on the last page')
     }))
+    @api.response(400, 'Invalid pagination, filter or location parameters')
+    @api.response(304, 'Not modified since the ETag sent in If-None-Match')
+    @conditional_get(lambda: collection_version(facade.get_places_version()))
     def get(self):
-        """Retrieve a list of all places"""
-        places = facade.get_all_places()
-        
-        # Pour le GET, il faut aussi charger les relations si elles doivent apparaître dans le to_dict()
-        # Ou modifier to_dict() pour qu'il ne charge que les IDs si c'est ce que place_output_model attend pour les relations.
-        # Pour une sortie complète, assurez-vous que les relations sont chargées (e.g., lazy='joined' dans le modèle)
-        # ou chargez-les explicitement ici (ex: place_repo.get_all_with_relations()).
-
-        # Pour le moment, to_dict() dans Place ne retourne pas owner ni amenities.
-        # Il faudra l'adapter pour correspondre à place_output_model.
-        # Voici un exemple si vous voulez construire la sortie ici :
-        output_places = []
-        for place in places:
-            place_dict = place.to_dict()
-            
-            # Récupérer l'objet propriétaire
-            owner = facade.get_user(place.owner_id)
-            if owner:
-                place_dict['owner'] = owner.to_dict() # Assurez-vous que user.to_dict() existe
+        """Retrieve a page of places, filtered and sorted by the database"""
+        args = place_list_parser.parse_args()
+        limit = args['limit']
+        if limit is None or limit < 1:
+            api.abort(400, 'limit must be a positive integer')
+        limit = min(limit, MAX_PAGE_SIZE)
+        filters = {key: args[key] for key in ('min_price', 'max_price', 'min_guests', 'min_rooms')}
+
+        # Les recherches géographiques renvoient une seule page classée par distance
+        distances = None
+        next_cursor = None
+        try:
+            if args['bbox'] or args['near']:
+                if args['cursor'] or args['sort']:
+                    api.abort(400, 'cursor and sort cannot be combined with bbox or near')
+                if args['bbox']:
+                    results = facade.get_places_in_bbox(parse_bbox(args['bbox']), limit, **filters)
+                else:
+                    radius_km = args['radius_km']
+                    if radius_km is None or not 0 < radius_km <= MAX_RADIUS_KM:
+                        api.abort(400, f'radius_km must be between 0 and {MAX_RADIUS_KM}')
+                    lat, lng = parse_point(args['near'])
+                    results = facade.get_places_near(lat, lng, radius_km, limit, **filters)
+                places = [place for place, _ in results]
+                distances = [distance for _, distance in results]
             else:
-                place_dict['owner'] = None # Ou une valeur par défaut
+                places, next_cursor = facade.get_places_page(limit, args['cursor'], sort=args['sort'], **filters)
+        except ValueError as e:
+            api.abort(400, str(e))
+        
+        # Relations déjà chargées par le profil 'list' : nombre de requêtes constant quelle que soit la page
+        output_places = [place_to_output(place) for place in places]
 
-            # Récupérer les agréments associés
-            place_dict['amenities'] = [amenity.to_dict() for amenity in place.amenities] # Assurez-vous que amenity.to_dict() existe
-            
-            # Récupérer les reviews (ici on suppose juste les IDs, comme dans votre modèle de sortie)
-            place_dict['reviews'] = [review.id for review in place.reviews] # Assurez-vous que review.id est accessible
-            
-            output_places.append(place_dict)
-            
-        return {'places': output_places}, 200
+        if distances is not None:
+            for place_dict, distance in zip(output_places, distances):
+                place_dict['distance_km'] = round(distance, 3)
+
+        return {'places': output_places, 'next_cursor': next_cursor}, 200
+
+place_search_parser = api.parser()
+place_search_parser.add_argument('q', type=str, location='args', required=True,
+                                 help='Words to look for in titles and descriptions (prefixes match)')
+place_search_parser.add_argument('limit', type=int, location='args', default=20,
+                                 help=f'Maximum number of results (1-{MAX_PAGE_SIZE})')
+
+place_search_result_model = api.model('PlaceSearchResult', {
+    'id': fields.String(description='Place ID'),
+    'title': fields.String(description='Title of the place'),
+    'description': fields.String(description='Description of the place'),
+    'price_by_night': fields.Float(description='Price per night'),
+    'latitude': fields.Float(description='Latitude of the place'),
+    'longitude': fields.Float(description='Longitude of the place'),
+    'score': fields.Float(description='BM25 relevance score (higher is better)'),
+    'title_highlight': fields.String(description='Title as escaped HTML, matches wrapped in <mark></mark>'),
+    'description_snippet': fields.String(description='Description excerpt as escaped HTML, matches wrapped in <mark></mark>')
+})
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    @api.expect(place_search_parser)
+    @api.response(200, 'Search results, most relevant first', model=api.model('PlaceSearchOutput', {
+        'places': fields.List(fields.Nested(place_search_result_model))
+    }))
+    @api.response(400, 'Missing or invalid search query')
+    @api.response(304, 'Not modified since the ETag sent in If-None-Match')
+    @conditional_get(lambda: collection_version(facade.get_places_version()))
+    def get(self):
+        """Full-text search over place titles and descriptions"""
+        args = place_search_parser.parse_args()
+        limit = args['limit']
+        if limit is None or limit < 1:
+            api.abort(400, 'limit must be a positive integer')
+
+        try:
+            results = facade.search_places(args['q'], min(limit, MAX_PAGE_SIZE))
+        except ValueError as e:
+            api.abort(400, str(e))
+
+        return {'places': [{
+            'id': place.id,
+            'title': place.title,
+            'description': place.description,
+            'price_by_night': place.price_by_night,
+            'latitude': place.latitude,
+            'longitude': place.longitude,
+            'score': round(score, 4),
+            'title_highlight': title_highlight,
+            'description_snippet': description_snippet
+        } for place, score, title_highlight, description_snippet in results]}, 200
 
 @api.route('/<string:place_id>')
 @api.param('place_id', 'L\'identifiant unique du lieu')
 class PlaceResource(Resource):
-    @api.response(200, 'Place details retrieved successfully', model=place_output_model)
+    @api.response(200, 'Place details retrieved successfully', model=place_detail_model)
     @api.response(404, 'Place not found')
+    @api.response(304, 'Not modified since the ETag or date sent')
+    @conditional_get(lambda place_id: entity_version(facade.get_place_version(place_id)))
     def get(self, place_id):
-        """Get place details by ID"""
-        place = facade.get_place(place_id)
+        """Get place details by ID, with rating aggregates and the first page of reviews"""
+        place = facade.get_place_details(place_id)
         if not place:
             api.abort(404, 'Place not found')
 
-        # Adaptez la sortie pour qu'elle corresponde à place_output_model
-        place_dict = place.to_dict()
-        owner = facade.get_user(place.owner_id)
-        if owner:
-            place_dict['owner'] = owner.to_dict()
-        else:
-            place_dict['owner'] = None
-
-        place_dict['amenities'] = [amenity.to_dict() for amenity in place.amenities]
-        place_dict['reviews'] = [review.id for review in place.reviews]
-
+        reviews, next_cursor = facade.get_place_reviews_page(place_id, DEFAULT_REVIEWS_PAGE_SIZE)
+        place_dict = place_to_output(place)
+        place_dict['reviews'] = [review_to_output(review) for review in reviews]
+        place_dict['reviews_next_cursor'] = next_cursor
         return place_dict, 200
 
     @api.expect(place_input_model) # Utilisez place_input_model pour l'entrée PUT
@@ -171,18 +316,7 @@ class PlaceResource(Resource):
         # La facade gère maintenant amenity_ids à l'intérieur de place_data
         try:
             updated_place = facade.update_place(place_id, place_data)
-            
-            # Adaptez la sortie pour qu'elle corresponde à place_output_model
-            updated_place_dict = updated_place.to_dict()
-            owner = facade.get_user(updated_place.owner_id)
-            if owner:
-                updated_place_dict['owner'] = owner.to_dict()
-            else:
-                updated_place_dict['owner'] = None
-            updated_place_dict['amenities'] = [amenity.to_dict() for amenity in updated_place.amenities]
-            updated_place_dict['reviews'] = [review.id for review in updated_place.reviews]
-
-            return updated_place_dict, 200
+            return place_to_output(updated_place), 200
         except ValueError as e:
             api.abort(400, str(e))
         except Exception as e:
@@ -207,3 +341,38 @@ class PlaceResource(Resource):
 
         facade.delete_place(place_id)
         return '', 204
+
+
+place_reviews_parser = api.parser()
+place_reviews_parser.add_argument('limit', type=int, location='args', default=DEFAULT_REVIEWS_PAGE_SIZE,
+                                  help=f'Number of reviews per page (1-{MAX_PAGE_SIZE})')
+place_reviews_parser.add_argument('cursor', type=str, location='args',
+                                  help='Opaque cursor returned as next_cursor (or reviews_next_cursor) by the previous page')
+
+@api.route('/<string:place_id>/reviews')
+@api.param('place_id', 'L\'identifiant unique du lieu')
+class PlaceReviewList(Resource):
+    @api.expect(place_reviews_parser)
+    @api.response(200, 'Page of reviews, newest first', model=api.model('PlaceReviewPage', {
+        'reviews': fields.List(fields.Nested(place_review_model)),
+        'next_cursor': fields.String(description='Cursor of the next page, null on the last page')
+    }))
+    @api.response(304, 'Not modified since the ETag or date sent')
+    @api.response(400, 'Invalid pagination parameters')
+    @api.response(404, 'Place not found')
+    # Toute modification d'une critique date aussi son lieu : la version du lieu couvre ses critiques
+    @conditional_get(lambda place_id: entity_version(facade.get_place_version(place_id)))
+    def get(self, place_id):
+        """Retrieve a page of the reviews of a place, newest first"""
+        args = place_reviews_parser.parse_args()
+        limit = args['limit']
+        if limit is None or limit < 1:
+            api.abort(400, 'limit must be a positive integer')
+        if not facade.get_place(place_id):
+            api.abort(404, 'Place not found')
+
+        try:
+            reviews, next_cursor = facade.get_place_reviews_page(place_id, min(limit, MAX_PAGE_SIZE), args['cursor'])
+        except ValueError as e:
+            api.abort(400, str(e))
+        return {'reviews': [review_to_output(review) for review in reviews], 'next_cursor': next_cursor}, 200
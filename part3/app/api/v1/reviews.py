@@ -1,5 +1,7 @@
 from flask_restx import Namespace, Resource, fields
 from app.services import facade
+from app.services.facade import ReviewAlreadyExistsError
+from app.utils.http_cache import collection_version, conditional_get, entity_version
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
 # Modifié : Ajout de cors_origins='*'
@@ -38,20 +40,20 @@ class ReviewList(Resource):
         if place.owner_id == current_user_id:
             api.abort(403, 'Cannot review your own place') # Utilisation de api.abort
 
-        existing_reviews = facade.get_reviews_by_place(review_data['place_id'])
-        for existing_review in existing_reviews:
-            if existing_review.user_id == current_user_id:
-                api.abort(403, 'You have already reviewed this place') # Utilisation de api.abort
-
+        # Doublon détecté par la façade (EXISTS indexé, puis index unique en cas de course)
         try:
             review = facade.create_review(review_data)
             return review.to_dict(), 201
+        except ReviewAlreadyExistsError:
+            api.abort(403, 'You have already reviewed this place')
         except Exception as e:
             # Gérer les erreurs de validation ou de base de données plus spécifiquement si possible
             api.abort(400, str(e)) # Utilisation de api.abort pour les erreurs 400
 
     @api.response(200, 'List of reviews retrieved successfully')
     @api.doc(security='Bearer Auth', params={'Authorization': {'description': 'Optionnel: Jeton JWT pour l\'authentification'}}) # La route GET peut être publique ou protégée
+    @api.response(304, 'Not modified since the ETag sent in If-None-Match')
+    @conditional_get(lambda: collection_version(facade.get_reviews_version()))
     def get(self):
         """Retrieve a list of all reviews"""
         reviews = facade.get_all_reviews()
@@ -62,6 +64,8 @@ class ReviewResource(Resource):
     @api.response(200, 'Review details retrieved successfully')
     @api.response(404, 'Review not found')
     @api.doc(security='Bearer Auth', params={'Authorization': {'description': 'Optionnel: Jeton JWT pour l\'authentification'}})
+    @api.response(304, 'Not modified since the ETag or date sent')
+    @conditional_get(lambda review_id: entity_version(facade.get_review_version(review_id)))
     def get(self, review_id):
         """Get review details by ID"""
         review = facade.get_review(review_id)
@@ -91,6 +95,8 @@ class ReviewResource(Resource):
         try:
             updated_review = facade.update_review(review_id, api.payload)
             return updated_review.to_dict(), 200
+        except ReviewAlreadyExistsError as e:
+            api.abort(403, str(e))
         except Exception as e:
             api.abort(400, str(e))
 
@@ -1,5 +1,7 @@
 from flask_restx import Namespace, Resource, fields
 from app.services import facade
+from app.utils.http_cache import collection_version, conditional_get, entity_version
+from app.utils.passwords import PasswordHasherBusy
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, verify_jwt_in_request # Ajout de verify_jwt_in_request
 
 # Modifié : Ajout de cors_origins='*' pour gérer les requêtes OPTIONS
@@ -31,6 +33,7 @@ class UserList(Resource):
     @api.expect(user_creation_model, validate=True)
     @api.response(201, 'User successfully created')
     @api.response(400, 'Email already registered or Invalid input data') # Message unifié
+    @api.response(503, 'Password hashing pool saturated')
     @api.response(403, 'Admin privileges required')
     # @jwt_required()  <--- TOUJOURS ABSENT ICI, C'EST CORRECT
     @api.doc(security='Bearer Auth') # Ceci reste pour la documentation Swagger, mais ne force plus l'auth ici.
@@ -64,11 +67,9 @@ class UserList(Resource):
         #    Si elle est vide, on permet la création du premier admin.
         #    Si elle n'est pas vide, on refuse (car seuls les admins peuvent créer d'autres admins).
         
-        # Obtenir la liste de tous les utilisateurs pour vérifier si la DB est vide
-        all_users = facade.get_all_users()
-
         if is_request_admin and not current_user_is_admin:
-            if len(all_users) == 0:
+            # Vérifie si la DB est vide sans charger les utilisateurs (EXISTS, puis mémorisé)
+            if not facade.has_users():
                 # Permettre la création du premier admin si la DB est vide et qu'il n'y a pas de token admin.
                 # L'utilisateur doit s'enregistrer avec 'is_admin': true.
                 pass
@@ -88,7 +89,10 @@ class UserList(Resource):
         if existing_user:
             api.abort(400, 'Email already registered')
 
-        new_user = facade.create_user(user_data) # Hashage du mot de passe doit être géré dans create_user
+        try:
+            new_user = facade.create_user(user_data) # Hashage du mot de passe doit être géré dans create_user
+        except PasswordHasherBusy:
+            return {'error': 'Too many password hashes in progress, retry shortly'}, 503, {'Retry-After': '1'}
 
         # La réponse ne devrait pas inclure le mot de passe
         return {'id': new_user.id, 'first_name': new_user.first_name, 'last_name': new_user.last_name, 'email': new_user.email, 'is_admin': new_user.is_admin}, 201
@@ -96,6 +100,8 @@ class UserList(Resource):
     @api.response(200, 'List of users retrieved successfully')
     @jwt_required()
     @api.doc(security='Bearer Auth') # Ajout de security='Bearer Auth'
+    @api.response(304, 'Not modified since the ETag sent in If-None-Match')
+    @conditional_get(lambda: collection_version(facade.get_users_version()), private=True)
     def get(self):
         """Get all users"""
         # Optionnel: vous pouvez ajouter une vérification is_admin ici aussi si seuls les admins peuvent voir tous les utilisateurs
@@ -113,6 +119,8 @@ class UserResource(Resource):
     @api.response(404, 'User not found')
     @jwt_required()
     @api.doc(security='Bearer Auth') # Ajout de security='Bearer Auth'
+    @api.response(304, 'Not modified since the ETag or date sent')
+    @conditional_get(lambda user_id: entity_version(facade.get_user_version(user_id)), private=True)
     def get(self, user_id):
         """Get user details by ID"""
         user = facade.get_user(user_id)
@@ -125,6 +133,7 @@ class UserResource(Resource):
     @api.response(200, 'User successfully updated')
     @api.response(404, 'User not found')
     @api.response(400, 'Invalid input data or Email already registered')
+    @api.response(503, 'Password hashing pool saturated')
     @api.response(403, 'Unauthorized - you can only modify your own profile')
     @jwt_required()
     @api.doc(security='Bearer Auth') # Ajout de security='Bearer Auth'
@@ -149,7 +158,10 @@ class UserResource(Resource):
             if existing_user and existing_user.id != user_id:
                 api.abort(400, 'Email already registered')
 
-        facade.update_user(user_id, user_data)
+        try:
+            facade.update_user(user_id, user_data)
+        except PasswordHasherBusy:
+            return {'error': 'Too many password hashes in progress, retry shortly'}, 503, {'Retry-After': '1'}
         updated_user = facade.get_user(user_id)
         return {'id': updated_user.id, 'first_name': updated_user.first_name, 'last_name': updated_user.last_name, 'email': updated_user.email, 'is_admin': updated_user.is_admin}, 200
 
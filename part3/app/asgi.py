@@ -0,0 +1,203 @@
+"""ASGI serving mode: async read endpoints in front of the Flask app.
+
+The hot read endpoints are answered by coroutines over AsyncHBnBFacade, so a
+request waiting on SQLite holds no thread and one process can keep thousands
+of idle keep-alive clients:
+
+    GET /api/v1/places                       (pages, filters, sort; not bbox/near)
+    GET /api/v1/places/<id>
+    GET /api/v1/places/<id>/reviews
+    GET /api/v1/amenities/  and  /api/v1/amenities/<id>
+
+They return the same JSON, cursors, ETags and 304s as the Flask handlers.
+Every other request (writes, authentication, geographic and full-text
+search, Swagger) is passed to the Flask WSGI app through asgiref's
+WsgiToAsgi, which runs it on a thread pool.
+
+Entry point: asgi.py at the project root (uvicorn asgi:app).
+"""
+import json
+import re
+from urllib.parse import parse_qs
+
+from app.api.v1.places import place_to_output, review_to_output
+from app.persistence.async_repository import AsyncDatabase
+from app.services.async_facade import AsyncHBnBFacade
+from app.utils.http_cache import collection_version, entity_version
+
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_REVIEWS_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+PLACE_FILTERS = {'min_price': float, 'max_price': float, 'min_guests': int, 'min_rooms': int}
+
+# Headers sent by flask-cors on /api/* (origins='*')
+CORS_HEADERS = [(b'access-control-allow-origin', b'*')]
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    """The parts of an ASGI HTTP scope the read handlers need"""
+    def __init__(self, scope):
+        self.path = scope['path']
+        self.query_string = scope.get('query_string', b'').decode('latin-1')
+        self.args = {key: values[0] for key, values in parse_qs(self.query_string).items()}
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+
+    @property
+    def full_path(self):
+        # Same string as Flask's request.full_path, so both modes compute the same ETags
+        return f'{self.path}?{self.query_string}'
+
+    def arg(self, name, convert=str, default=None):
+        value = self.args.get(name)
+        if value is None:
+            return default
+        try:
+            return convert(value)
+        except ValueError:
+            raise HTTPError(400, f'{name}: invalid value {value!r}')
+
+    def limit(self, default):
+        limit = self.arg('limit', int, default)
+        if limit < 1:
+            raise HTTPError(400, 'limit must be a positive integer')
+        return min(limit, MAX_PAGE_SIZE)
+
+
+class HBnBASGI:
+    """ASGI application: async read routes, everything else delegated to the WSGI app"""
+    def __init__(self, flask_app, database=None):
+        from asgiref.wsgi import WsgiToAsgi
+
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.database = database or AsyncDatabase()
+        self.database.init_app(flask_app)
+        self.facade = AsyncHBnBFacade(self.database)
+        self.max_age = flask_app.config.get('HTTP_CACHE_MAX_AGE', 0)
+        self.routes = [
+            (re.compile(r'^/api/v1/places$'), self.place_list),
+            (re.compile(r'^/api/v1/places/(?P<place_id>[^/]+)/reviews$'), self.place_reviews),
+            (re.compile(r'^/api/v1/places/(?P<place_id>(?!search$)[^/]+)$'), self.place_detail),
+            (re.compile(r'^/api/v1/amenities/$'), self.amenity_list),
+            (re.compile(r'^/api/v1/amenities/(?P<amenity_id>[^/]+)$'), self.amenity_detail),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            request = Request(scope)
+            for pattern, handler in self.routes:
+                match = pattern.match(request.path)
+                if match:
+                    return await self.dispatch(handler, request, match.groupdict(), scope, receive, send)
+        return await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.database.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def dispatch(self, handler, request, params, scope, receive, send):
+        async with self.database.request_scope():
+            try:
+                result = await handler(request, **params)
+            except HTTPError as e:
+                return await self.respond(send, scope, e.status, {'message': e.message})
+        if result is None:
+            # Not served by the async path (e.g. a geographic search): Flask handles it
+            return await self.wsgi(scope, receive, send)
+        version, body = result
+        headers = version.headers(private=False, max_age=self.max_age) if version else {}
+        if version and body is None:
+            return await self.respond(send, scope, 304, None, headers)
+        return await self.respond(send, scope, 200, body, headers)
+
+    async def respond(self, send, scope, status, body, headers=None):
+        payload = b'' if body is None else json.dumps(body).encode('utf-8') + b'\n'
+        raw_headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in (headers or {}).items()]
+        if body is not None:
+            raw_headers += [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())]
+        await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers + CORS_HEADERS})
+        await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else payload})
+
+    @staticmethod
+    def conditional(request, version):
+        """True when the client already holds this version: the handler returns (version, None) for a 304"""
+        return version is not None and version.not_modified(request.headers)
+
+    # --- Handlers: return (Version or None, body or None for a 304), or None to delegate ---
+    async def place_list(self, request):
+        if request.args.get('bbox') or request.args.get('near'):
+            return None
+        version = collection_version(await self.facade.get_places_version(), full_path=request.full_path)
+        if self.conditional(request, version):
+            return version, None
+        limit = request.limit(DEFAULT_PAGE_SIZE)
+        filters = {key: request.arg(key, convert) for key, convert in PLACE_FILTERS.items()}
+        try:
+            places, next_cursor = await self.facade.get_places_page(
+                limit, request.args.get('cursor'), sort=request.args.get('sort'), **filters)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return version, {'places': [place_to_output(place) for place in places], 'next_cursor': next_cursor}
+
+    async def place_detail(self, request, place_id):
+        version = entity_version(await self.facade.get_place_version(place_id), full_path=request.full_path)
+        if self.conditional(request, version):
+            return version, None
+        place = await self.facade.get_place_details(place_id)
+        if not place:
+            raise HTTPError(404, 'Place not found')
+        reviews, next_cursor = await self.facade.get_place_reviews_page(place_id, DEFAULT_REVIEWS_PAGE_SIZE)
+        body = place_to_output(place)
+        body['reviews'] = [review_to_output(review) for review in reviews]
+        body['reviews_next_cursor'] = next_cursor
+        return version, body
+
+    async def place_reviews(self, request, place_id):
+        version = entity_version(await self.facade.get_place_version(place_id), full_path=request.full_path)
+        if version is None:
+            raise HTTPError(404, 'Place not found')
+        if self.conditional(request, version):
+            return version, None
+        limit = request.limit(DEFAULT_REVIEWS_PAGE_SIZE)
+        try:
+            reviews, next_cursor = await self.facade.get_place_reviews_page(place_id, limit, request.args.get('cursor'))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return version, {'reviews': [review_to_output(review) for review in reviews], 'next_cursor': next_cursor}
+
+    async def amenity_list(self, request):
+        version = collection_version(await self.facade.get_amenities_version(), full_path=request.full_path)
+        if self.conditional(request, version):
+            return version, None
+        amenities = await self.facade.get_all_amenities()
+        return version, [{'id': amenity.id, 'name': amenity.name} for amenity in amenities]
+
+    async def amenity_detail(self, request, amenity_id):
+        version = entity_version(await self.facade.get_amenity_version(amenity_id), full_path=request.full_path)
+        if version is None:
+            raise HTTPError(404, 'Amenity not found')
+        if self.conditional(request, version):
+            return version, None
+        amenity = await self.facade.get_amenity(amenity_id)
+        return version, {'id': amenity.id, 'name': amenity.name}
+
+
+def create_asgi_app(config_class="config.DevelopmentConfig"):
+    """Flask app wrapped in the ASGI application (one event loop per process)"""
+    from app import create_app
+    return HBnBASGI(create_app(config_class))
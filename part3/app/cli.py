@@ -0,0 +1,84 @@
+import json
+import os
+import time
+
+import click
+from flask.cli import AppGroup
+
+from app.services import data_generator
+from app.services.bulk_import import DEFAULT_CHUNK_SIZE, RECORD_TYPES, BulkImporter, read_csv, read_ndjson
+
+# Commandes d'administration : flask hbnb <commande>
+hbnb = AppGroup('hbnb', help='HBnB maintenance commands.')
+
+
+@hbnb.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['ndjson', 'csv']),
+              help='File format (default: from the file extension).')
+@click.option('--type', 'record_type', type=click.Choice(RECORD_TYPES),
+              help='Record type of every CSV row (required for CSV).')
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, show_default=True,
+              help='Records validated and committed per transaction.')
+def import_command(path, file_format, record_type, chunk_size):
+    """Bulk import users, amenities, places and reviews from an NDJSON or CSV file."""
+    file_format = file_format or ('csv' if os.path.splitext(path)[1].lower() == '.csv' else 'ndjson')
+    if file_format == 'csv' and record_type is None:
+        raise click.UsageError('--type is required for CSV files')
+
+    with open(path, newline='', encoding='utf-8') as stream:
+        records = read_csv(stream, record_type) if file_format == 'csv' else read_ndjson(stream)
+        report = BulkImporter(chunk_size=chunk_size).run(records)
+    click.echo(json.dumps(report.to_dict(), indent=2))
+
+
+@hbnb.command('recompute-ratings')
+@click.option('--place', 'place_ids', multiple=True,
+              help='Only recompute this place id (repeatable; default: every place).')
+def recompute_ratings_command(place_ids):
+    """Rebuild the review count, rating sum, average and histogram of places from their reviews."""
+    from app.services import facade
+    updated = facade.recompute_rating_aggregates(list(place_ids) or None)
+    click.echo(f'Rating aggregates recomputed ({updated} places with reviews).')
+
+
+@hbnb.command('generate')
+@click.option('--places', default=1000, show_default=True, help='Number of places.')
+@click.option('--users', type=int, help='Number of users (default: a host per 10 places and a guest per 4 places).')
+@click.option('--reviews', type=int, help='Total number of reviews, skewed across places (default: 3 per place).')
+@click.option('--amenities', default=data_generator.DEFAULT_AMENITIES, show_default=True, help='Size of the amenity catalog.')
+@click.option('--seed', default=data_generator.DEFAULT_SEED, show_default=True, help='Same seed, same data.')
+@click.option('--password', default='generated-password', show_default=True,
+              help='Password of every generated user (hashed once).')
+@click.option('--ndjson', 'ndjson_path', type=click.Path(dir_okay=False, writable=True),
+              help='Also write the records to this NDJSON file (loadable with flask hbnb import).')
+@click.option('--database/--no-database', default=True, show_default=True,
+              help='Insert the data in the application database.')
+@click.option('--chunk-size', default=data_generator.DEFAULT_CHUNK_SIZE, show_default=True,
+              help='Places (with their links and reviews) inserted per transaction.')
+def generate_command(places, users, reviews, amenities, seed, password, ndjson_path, database, chunk_size):
+    """Generate a deterministic synthetic dataset for scale testing."""
+    from app import password_hasher
+
+    if not database and not ndjson_path:
+        raise click.UsageError('Nothing to write: pass --ndjson with --no-database')
+    generator = data_generator.DataGenerator(places, password_hasher.hash(password), users=users, reviews=reviews,
+                                             amenities=amenities, seed=seed)
+    started = time.perf_counter()
+
+    def progress(report):
+        created = report.created
+        click.echo(f"{created['place']} places, {created['review']} reviews "
+                   f"({time.perf_counter() - started:.0f} s)", err=True)
+
+    results = {}
+    if ndjson_path:
+        with open(ndjson_path, 'w', encoding='utf-8') as stream:
+            results['ndjson'] = data_generator.write_ndjson(generator, stream, progress).to_dict()
+    if database:
+        try:
+            results['database'] = data_generator.write_database(generator, chunk_size, progress).to_dict()
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    results['seconds'] = round(time.perf_counter() - started, 1)
+    click.echo(json.dumps(results, indent=2))
@@ -1,7 +1,11 @@
 from app import db
 from app.models.base_model import BaseModel
+from sqlalchemy import case, inspect
 from sqlalchemy.orm import relationship 
+from sqlalchemy.sql import ClauseElement
 from app.models.place_amenities import place_amenities # Assurez-vous que ce chemin est correct
+from app.persistence import search, spatial
+from app.persistence.uuid_type import UUIDString
 
 class Place(BaseModel):
     # Name of the table in the DB
@@ -23,16 +27,73 @@ class Place(BaseModel):
     max_guests = db.Column(db.Integer, default=1, nullable=False)
     # FIN DE L'AJOUT
 
-    owner_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    owner_id = db.Column(UUIDString, db.ForeignKey('users.id'), nullable=False)
+
+    # Agrégats des critiques (dénormalisés), maintenus par la façade dans la transaction
+    # qui crée, modifie ou supprime la critique : la note s'affiche et se trie sans lire les critiques
+    review_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    rating_sum = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    rating_average = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    rating_1 = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    rating_2 = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    rating_3 = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    rating_4 = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    rating_5 = db.Column(db.Integer, default=0, server_default='0', nullable=False)
 
     # Relations
     # Ajout d'une relation vers l'Owner (User)
-    owner = db.relationship('User', backref='places_owned', lazy=True) # lazy=True ou lazy='joined' selon le besoin de chargement immédiat
+    # back_populates (et non backref) : User.places déclare déjà l'autre côté de la relation
+    owner = db.relationship('User', back_populates='places', lazy=True) # lazy=True ou lazy='joined' selon le besoin de chargement immédiat
 
     reviews = db.relationship('Review', backref='place', lazy=True, cascade='all, delete-orphan')
     # Assurez-vous que Amenity a un back_populates='places' pour que cette relation fonctionne
     amenities = db.relationship('Amenity', secondary=place_amenities, back_populates='places', lazy='joined') # Ajouté lazy='joined' pour faciliter le GET
 
+    # Index composite pour la pagination par curseur (keyset) sur (created_at, id)
+    # et index des filtres/tris de la liste des lieux (prix, capacité, chambres)
+    __table_args__ = (
+        db.Index('ix_places_created_at_id', 'created_at', 'id'),
+        db.Index('ix_places_price_by_night_id', 'price_by_night', 'id'),
+        db.Index('ix_places_max_guests', 'max_guests'),
+        db.Index('ix_places_number_rooms', 'number_rooms'),
+        db.Index('ix_places_rating_average_id', rating_average.desc(), 'id'),
+        # Clé étrangère : lieux d'un propriétaire (suppression d'un utilisateur), cf. index_advisor
+        db.Index('ix_places_owner_id', 'owner_id'),
+    )
+
+    RATINGS = range(1, 6)
+
+    def add_rating(self, rating):
+        """Compte une nouvelle note (1 à 5) dans les agrégats du lieu."""
+        self._apply_rating(rating, 1)
+
+    def remove_rating(self, rating):
+        """Retire une note (1 à 5) des agrégats du lieu."""
+        self._apply_rating(rating, -1)
+
+    def _increment(self, key, amount):
+        current = self.__dict__.get(key)
+        if inspect(self).persistent:
+            # UPDATE places SET col = col + n : pas de lecture préalable, pas d'écriture perdue
+            # entre deux transactions concurrentes. Les incréments d'un même flush se cumulent.
+            base = current if isinstance(current, ClauseElement) else getattr(type(self), key)
+        else:
+            base = current or 0
+        value = base + amount
+        setattr(self, key, value)
+        return value
+
+    def _apply_rating(self, rating, delta):
+        if rating not in self.RATINGS:
+            raise ValueError("La note doit être comprise entre 1 et 5.")
+        count = self._increment('review_count', delta)
+        total = self._increment('rating_sum', delta * rating)
+        self._increment(f'rating_{rating}', delta)
+        if isinstance(count, ClauseElement):
+            self.rating_average = case((count > 0, total * 1.0 / count), else_=0.0)
+        else:
+            self.rating_average = total / count if count > 0 else 0.0
+
     def __repr__(self):
         return f"<Place {self.title}>"
 
@@ -49,11 +110,21 @@ class Place(BaseModel):
             'number_bathrooms': self.number_bathrooms, # Inclure
             'max_guests': self.max_guests,           # Inclure
             'owner_id': self.owner_id,               # Inclure l'ID du propriétaire
+            'review_count': self.review_count,
+            'rating_average': self.rating_average,
+            'rating_histogram': {str(rating): getattr(self, f'rating_{rating}') for rating in self.RATINGS},
             
             # Pour les relations, Flask-RESTX attend des dictionnaires imbriqués pour place_output_model
             # Assurez-vous que .to_dict() existe pour Amenity et Review
             'owner': self.owner.to_dict() if self.owner else None, # Inclure l'objet owner complet si chargé
             'amenities': [amenity.to_dict() for amenity in self.amenities], # Inclure les objets amenities complets
-            'reviews': [review.to_dict() for review in self.reviews] # Inclure les objets reviews complets
+            # Les critiques ne sont plus incluses (taille non bornée) : agrégats ci-dessus et
+            # GET /api/v1/places/<id>/reviews pour les pages
         })
         return data
+
+
+# Index spatial R*Tree (SQLite) créé et supprimé avec la table places
+spatial.install(Place.__table__)
+# Index plein texte FTS5 (SQLite), synchronisé à chaque flush de l'ORM
+search.install(Place)
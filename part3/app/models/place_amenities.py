@@ -1,7 +1,10 @@
 from app import db
+from app.persistence.uuid_type import UUIDString
 
 #relation many to many between the reelation place and amenities
 place_amenities = db.Table('place_amenities',
-    db.Column('place_id', db.String(36), db.ForeignKey('places.id'), primary_key=True),
-    db.Column('amenity_id', db.String(36), db.ForeignKey('amenities.id'), primary_key=True)
+    db.Column('place_id', UUIDString, db.ForeignKey('places.id'), primary_key=True),
+    db.Column('amenity_id', UUIDString, db.ForeignKey('amenities.id'), primary_key=True),
+    # La clé primaire commence par place_id : les lieux d'un agrément ont leur propre index
+    db.Index('ix_place_amenities_amenity_id', 'amenity_id')
 )
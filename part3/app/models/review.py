@@ -1,5 +1,6 @@
 from app import db
 from app.models.base_model import BaseModel
+from app.persistence.uuid_type import UUIDString
 
 class Review(BaseModel):
     #name of the table in the db
@@ -9,8 +10,15 @@ class Review(BaseModel):
     text = db.Column(db.String(1024), nullable=False)
     rating = db.Column(db.Integer, nullable=False)
 
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
-    place_id = db.Column(db.String(36), db.ForeignKey('places.id'), nullable=False)
+    user_id = db.Column(UUIDString, db.ForeignKey('users.id'), nullable=False)
+    place_id = db.Column(UUIDString, db.ForeignKey('places.id'), nullable=False)
+
+    # Index des critiques d'un lieu, de la plus récente à la plus ancienne (pagination par curseur)
+    # et unicité d'une critique par utilisateur et par lieu, garantie par la base
+    __table_args__ = (
+        db.Index('ix_reviews_place_id_created_at', 'place_id', 'created_at', 'id'),
+        db.Index('uq_reviews_user_id_place_id', 'user_id', 'place_id', unique=True),
+    )
 
     def __repr__(self):
         return f"<Review {self.id}>"
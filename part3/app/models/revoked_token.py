@@ -0,0 +1,9 @@
+from app import db
+
+
+class RevokedToken(db.Model):
+    """JWT id of a revoked refresh token, kept only until the token would have expired anyway"""
+    __tablename__ = 'revoked_tokens'
+
+    jti = db.Column(db.String(36), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
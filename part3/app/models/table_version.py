@@ -0,0 +1,15 @@
+from app import db
+from app.persistence import table_versions
+
+
+class TableVersion(db.Model):
+    """Write counter of a table, bumped in the transaction of every write to it"""
+    __tablename__ = 'table_versions'
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+
+# Compteurs tenus à jour par chaque flush et chaque INSERT/UPDATE/DELETE de la session
+table_versions.install(TableVersion)
@@ -10,18 +10,23 @@ class User(BaseModel):
     password = db.Column(db.String(128), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
 
-    places = db.relationship('Place', backref='owner', lazy=True, cascade='all, delete-orphan')
+    places = db.relationship('Place', back_populates='owner', lazy=True, cascade='all, delete-orphan')
     reviews = db.relationship('Review', backref='user', lazy=True, cascade='all, delete-orphan')
 
     def hash_password(self, password):
-        """Hash the password before storing it."""
-        from app import bcrypt
-        self.password = bcrypt.generate_password_hash(password).decode('utf-8')
+        """Hash the password before storing it (in the password hashing pool)."""
+        from app import password_hasher
+        self.password = password_hasher.hash(password)
 
     def verify_password(self, password):
-        """Verify the hashed password."""
-        from app import bcrypt
-        return bcrypt.check_password_hash(self.password, password)
+        """Verify the hashed password (in the password hashing pool)."""
+        from app import password_hasher
+        return password_hasher.verify(password, self.password)
+
+    def password_needs_rehash(self):
+        """True if the stored hash was made with another work factor than BCRYPT_LOG_ROUNDS."""
+        from app import password_hasher
+        return password_hasher.needs_rehash(self.password)
 
     def to_dict(self):
         return {
@@ -0,0 +1,161 @@
+"""Asynchronous persistence for the ASGI serving mode (see app/asgi.py).
+
+AsyncSQLAlchemyRepository implements the Repository interface with
+coroutines over an SQLAlchemy AsyncSession (aiosqlite for SQLite), so a
+request waiting on the database releases the event loop instead of holding
+a thread. It runs the same QuerySpec, loading profiles and keyset cursors as
+SQLAlchemyRepository: both modes answer with the same pages and cursors.
+
+Sessions are scoped to a request by AsyncDatabase.request_scope(), the async
+counterpart of Flask-SQLAlchemy's db.session. Relationships are never lazy
+loaded in this mode (it would need IO outside an await): read methods take a
+loading profile whose loader options fetch what the endpoint serializes.
+
+Requires the asyncio extra of SQLAlchemy and aiosqlite, imported on first use
+so that the WSGI app does not depend on them.
+"""
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import select
+
+from app.persistence import table_versions
+from app.persistence.repository import QuerySpec, Repository, _keyset_after, decode_cursor, encode_cursor
+
+DEFAULT_POOL_SIZE = 20
+
+_current_session = ContextVar('async_session', default=None)
+
+
+class AsyncDatabase:
+    """Async engine and session factory, configured like a Flask extension"""
+    def __init__(self):
+        self.engine = None
+        self._sessionmaker = None
+
+    def init_app(self, app):
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from sqlalchemy.engine import make_url
+        from app import db
+        from app.persistence.sqlite_profile import DEFAULT_PRAGMAS, install_pragmas
+
+        uri = app.config.get('ASYNC_DATABASE_URI')
+        if uri:
+            url = make_url(uri)
+        else:
+            # Same database as the WSGI app (Flask-SQLAlchemy resolved relative SQLite paths)
+            with app.app_context():
+                url = db.engine.url
+            if url.drivername in ('sqlite', 'sqlite+pysqlite'):
+                if url.database in (None, '', ':memory:'):
+                    raise ValueError('The async mode needs a file database: an in-memory SQLite '
+                                     'database is private to each connection')
+                url = url.set(drivername='sqlite+aiosqlite')
+        self.engine = create_async_engine(url, pool_size=app.config.get('ASYNC_DB_POOL_SIZE', DEFAULT_POOL_SIZE))
+        install_pragmas(self.engine.sync_engine, app.config.get('SQLITE_PRAGMAS', DEFAULT_PRAGMAS))
+        # Entities outlive the commit of their request: they are serialized afterwards
+        self._sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def request_scope(self):
+        """One AsyncSession per request, closed (and rolled back if unfinished) at the end"""
+        async with self._sessionmaker() as session:
+            token = _current_session.set(session)
+            try:
+                yield session
+            finally:
+                _current_session.reset(token)
+
+    @property
+    def session(self):
+        session = _current_session.get()
+        if session is None:
+            raise RuntimeError('No async session: wrap the call in AsyncDatabase.request_scope()')
+        return session
+
+    async def dispose(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+
+
+class AsyncSQLAlchemyRepository(Repository):
+    """Repository interface as coroutines: every method must be awaited"""
+    def __init__(self, model, database, loading_profiles=None):
+        self.model = model
+        self.database = database
+        self.loading_profiles = loading_profiles or {}
+
+    def loader_options(self, profile):
+        return list(self.loading_profiles.get(profile, []))
+
+    async def _save(self):
+        await self.database.session.commit()
+
+    async def add(self, obj):
+        self.database.session.add(obj)
+        await self._save()
+
+    async def get(self, obj_id):
+        return await self.database.session.get(self.model, obj_id)
+
+    async def get_with_relations(self, obj_id, profile='detail'):
+        statement = select(self.model).options(*self.loader_options(profile)).where(self.model.id == obj_id)
+        return (await self.database.session.execute(statement)).scalars().first()
+
+    async def get_all(self):
+        return (await self.database.session.execute(select(self.model))).scalars().all()
+
+    async def get_all_with_relations(self, profile='list'):
+        statement = select(self.model).options(*self.loader_options(profile))
+        return (await self.database.session.execute(statement)).scalars().all()
+
+    async def update(self, obj_id, data):
+        obj = await self.get(obj_id)
+        if obj:
+            for key, value in data.items():
+                setattr(obj, key, value)
+            await self._save()
+
+    async def delete(self, obj_id):
+        obj = await self.get(obj_id)
+        if obj:
+            await self.database.session.delete(obj)
+            await self._save()
+
+    async def get_by_attribute(self, attr_name, attr_value):
+        statement = select(self.model).filter_by(**{attr_name: attr_value}).limit(1)
+        return (await self.database.session.execute(statement)).scalars().first()
+
+    async def get_version(self, obj_id):
+        statement = select(self.model.updated_at).where(self.model.id == obj_id)
+        return (await self.database.session.execute(statement)).scalar()
+
+    async def get_collection_version(self, *related):
+        names = [model.__tablename__ for model in (self.model, *related)]
+        statement = table_versions.version_statement(names)
+        return table_versions.version_of((await self.database.session.execute(statement)).all(), names)
+
+    async def find(self, spec):
+        statement = select(self.model).options(*spec.options).where(*spec.filters)
+        if spec.order_by:
+            statement = statement.order_by(*[col.desc() if desc else col.asc() for col, desc in spec.order_by])
+        return (await self.database.session.execute(statement)).scalars().all()
+
+    async def get_page(self, limit, cursor=None, spec=None):
+        # Same keyset pagination as SQLAlchemyRepository.get_page: cursors are interchangeable
+        spec = spec or QuerySpec()
+        order_by = spec.order_by or [(self.model.created_at, False), (self.model.id, False)]
+        keys = [col for col, _ in order_by]
+        statement = select(self.model, *keys).options(*spec.options).where(*spec.filters)
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != len(order_by):
+                raise ValueError("Invalid pagination cursor")
+            statement = statement.where(_keyset_after(order_by, values))
+        statement = statement.order_by(*[col.desc() if desc else col.asc() for col, desc in order_by])
+        rows = (await self.database.session.execute(statement.limit(limit + 1))).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][1:])
+        return [row[0] for row in rows], next_cursor
@@ -0,0 +1,212 @@
+"""In-process read-through entity cache in front of the repositories.
+
+Entities are cached by (model name, id) as a snapshot of their column values,
+in an LRU bounded in size and in age (TTL). A hit rebuilds the entity and
+attaches it to the current session without SQL (session.merge(load=False));
+its relationships are loaded lazily as usual.
+
+Entries are invalidated by CachedRepository.update/delete and, for every other
+write path, by the session events: instances modified or deleted by a flush
+are evicted at flush time, and again after the commit or rollback so that a
+reader from another session cannot re-cache the pre-commit row.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.persistence.replica import primary_reads
+
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_TTL = 300  # seconds
+
+_MISSING = object()
+_PENDING_KEYS = 'entity_cache_keys'
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with a time-to-live and hit/miss/eviction counters"""
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if self.ttl is None or expires_at > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            expires_at = self.clock() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._entries.pop(key, _MISSING) is not _MISSING:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
+
+
+def entity_key(model, obj_id):
+    return (model.__name__, obj_id)
+
+
+class EntityCache(LRUCache):
+    """LRUCache of entity snapshots, configured and invalidated like a Flask extension"""
+    _listening = False
+
+    def init_app(self, app):
+        self.max_size = app.config.get('ENTITY_CACHE_MAX_SIZE', DEFAULT_MAX_SIZE)
+        self.ttl = app.config.get('ENTITY_CACHE_TTL', DEFAULT_TTL)
+        # A new app may point at another database: nothing cached so far is valid
+        self.clear()
+        self.reset_stats()
+        if not self._listening:
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_transaction)
+            event.listen(Session, 'after_rollback', self._after_transaction)
+            self._listening = True
+
+    def snapshot(self, obj):
+        """Column values of a clean, persistent entity, or None if it cannot be cached"""
+        state = inspect(obj)
+        if not state.persistent or state.modified:
+            return None
+        return {attr.key: getattr(obj, attr.key) for attr in state.mapper.column_attrs}
+
+    def restore(self, session, model, values):
+        """Attach an entity rebuilt from a snapshot to the session, without SQL"""
+        obj = inspect(model).class_manager.new_instance()
+        for key, value in values.items():
+            set_committed_value(obj, key, value)
+        make_transient_to_detached(obj)
+        return session.merge(obj, load=False)
+
+    def invalidate_on_commit(self, session, model, obj_ids):
+        """Evict entities written without the ORM (bulk UPDATE) now and again after the commit"""
+        keys = session.info.setdefault(_PENDING_KEYS, set())
+        for obj_id in obj_ids:
+            key = entity_key(model, obj_id)
+            keys.add(key)
+            self.invalidate(key)
+
+    def _after_flush(self, session, flush_context):
+        keys = session.info.setdefault(_PENDING_KEYS, set())
+        for obj in list(session.dirty) + list(session.deleted):
+            state = inspect(obj)
+            if state.key is not None:
+                key = entity_key(state.mapper.class_, state.identity[0])
+                keys.add(key)
+                self.invalidate(key)
+
+    def _after_transaction(self, session):
+        for key in session.info.pop(_PENDING_KEYS, ()):
+            self.invalidate(key)
+
+
+class CachedRepository:
+    """Read-through cache wrapped around a SQLAlchemyRepository.
+
+    get() is served from the cache; update() and delete() evict the entity.
+    Every other attribute is delegated to the wrapped repository.
+    """
+    def __init__(self, repository, cache):
+        self.repository = repository
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.repository, name)
+
+    def _key(self, obj_id):
+        return entity_key(self.repository.model, obj_id)
+
+    def get(self, obj_id):
+        if not self.cache.enabled:
+            return self.repository.get(obj_id)
+        from app import db
+        session = db.session()
+        # An instance already in the session may carry unflushed changes: never overwrite it
+        in_session = session.identity_map.get(session.identity_key(self.repository.model, obj_id))
+        if in_session is not None:
+            return in_session
+
+        values = self.cache.get(self._key(obj_id))
+        if values is not None:
+            return self.cache.restore(session, self.repository.model, values)
+        # A stale replica row would stay in the cache for the whole TTL: fill it from the primary
+        with primary_reads():
+            obj = self.repository.get(obj_id)
+        if obj is not None:
+            values = self.cache.snapshot(obj)
+            if values is not None:
+                self.cache.set(self._key(obj_id), values)
+        return obj
+
+    def prime(self):
+        """Load every entity of the table into the cache (warm-up); returns how many were cached"""
+        cached = 0
+        with primary_reads():
+            objects = self.repository.get_all()
+        for obj in objects:
+            values = self.cache.snapshot(obj)
+            if values is not None:
+                self.cache.set(self._key(obj.id), values)
+                cached += 1
+        return cached
+
+    def update(self, obj_id, data):
+        self.cache.invalidate(self._key(obj_id))
+        return self.repository.update(obj_id, data)
+
+    def delete(self, obj_id):
+        self.cache.invalidate(self._key(obj_id))
+        return self.repository.delete(obj_id)
@@ -0,0 +1,274 @@
+"""Index advisor: full table scans in the query plans of recorded statements, and the indexes that avoid them.
+
+StatementRecorder listens to an engine and keeps every distinct statement it
+runs (with the parameters of its first execution, and the scope it ran in,
+e.g. a benchmark scenario). IndexAdvisor then asks SQLite for the plan of
+each one (EXPLAIN QUERY PLAN) and flags the tables read by a full SCAN. For
+a scan, the columns the statement filters that table on (= / IN / IS first,
+then one range) make the suggested index, unless an existing index already
+starts with them. Foreign keys without an index of their own are suggested
+too: deleting a parent, or loading the children of one, scans the child
+table. write_migration() turns the suggestions into an Alembic revision.
+
+Scans that no index would avoid (COUNT(*) of a table, a page sorted on an
+expression) are reported without a suggestion. The column extraction is a
+pattern match on the SQL emitted by SQLAlchemy, not a SQL parser: review a
+suggestion before shipping its migration.
+"""
+import os
+import re
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import event, inspect
+
+# What EXPLAIN QUERY PLAN is not asked about
+_SKIPPED = re.compile(r'^\s*(PRAGMA|BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|EXPLAIN|CREATE|DROP|ALTER)\b', re.I)
+# "SCAN places" or "SCAN places_1": a full scan of a table, no index (virtual tables say VIRTUAL TABLE)
+_FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+_TABLE_ALIAS = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+"?(\w+)"?(?:\s+AS\s+"?(\w+)"?)?', re.I)
+# "a.col = ?", "? = a.col", "a.col = b.col", "a.col IN (...)"...: both sides of a comparison
+_COMPARISON = re.compile(r'([\w."?:]+)\s*(<=|>=|!=|<>|=|<|>)\s*([\w."?:]+)')
+_TEST = re.compile(r'([\w."]+)\s+(?:NOT\s+)?(IN|IS|BETWEEN|LIKE)\b', re.I)
+_EQUALITY = ('=', 'IN', 'IS')
+# Where the filters of a statement start: the SELECT list and the SET clause hold none
+_FILTERS_START = re.compile(r'\b(WHERE|ON)\b', re.I)
+
+Scan = namedtuple('Scan', 'table alias detail statement count scopes')
+Suggestion = namedtuple('Suggestion', 'table columns name reasons')
+
+
+class Recorded:
+    __slots__ = ('statement', 'parameters', 'count', 'scopes')
+
+    def __init__(self, statement, parameters):
+        self.statement = statement
+        self.parameters = parameters
+        self.count = 0
+        self.scopes = set()
+
+
+class StatementRecorder:
+    """Distinct statements run on an engine while listening, with their first parameters"""
+    def __init__(self):
+        self.statements = {}
+        self.scope = None
+        self._engine = None
+
+    def listen(self, engine):
+        self._engine = engine
+        event.listen(engine, 'before_cursor_execute', self._record)
+        return self
+
+    def remove(self):
+        if self._engine is not None:
+            event.remove(self._engine, 'before_cursor_execute', self._record)
+            self._engine = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.remove()
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if _SKIPPED.match(statement):
+            return
+        recorded = self.statements.get(statement)
+        if recorded is None:
+            if executemany:
+                parameters = parameters[0] if parameters else ()
+            recorded = self.statements[statement] = Recorded(statement, parameters)
+        recorded.count += 1
+        if self.scope is not None:
+            recorded.scopes.add(self.scope)
+
+
+def explain(connection, statement, parameters=()):
+    """The detail lines of the SQLite query plan of a statement"""
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def _aliases(statement):
+    """{name the plan shows: table}, for every table of the statement"""
+    aliases = {}
+    for table, alias in _TABLE_ALIAS.findall(statement):
+        aliases[alias or table] = table
+    return aliases
+
+
+def filter_columns(statement, alias, table, columns):
+    """Columns of one table the statement filters on: equality columns in order, then one range column.
+
+    Comparisons with a value (a parameter, a literal) come first; join conditions with
+    another table's column are only used when the table has no other filter.
+    """
+    match = _FILTERS_START.search(statement)
+    if match is None:
+        return ()
+    filters = statement[match.start():]
+    single_table = len(_aliases(statement)) == 1
+
+    def column_of(token):
+        """The column name if the token is a column of this table, else None"""
+        qualifier, _, name = token.strip('"').rpartition('.')
+        qualifier, name = qualifier.strip('"'), name.strip('"')
+        if name in columns and (qualifier in (alias, table) or (not qualifier and single_table)):
+            return name
+        return None
+
+    def is_column(token):
+        return re.fullmatch(r'"?\w+"?\."?\w+"?', token) is not None
+
+    bound, joined = ([], []), ([], [])  # (equality, range) columns of each kind
+
+    def add(kinds, column, operator):
+        equality, ranges = kinds
+        target = equality if operator.upper() in _EQUALITY else ranges
+        if column not in target:
+            target.append(column)
+
+    for left, operator, right in _COMPARISON.findall(filters):
+        if operator in ('!=', '<>'):
+            continue  # an index does not help to find what is different
+        for mine, other in ((left, right), (right, left)):
+            column = column_of(mine)
+            if column is not None:
+                add(joined if is_column(other) and column_of(other) is None else bound, column, operator)
+    for token, operator in _TEST.findall(filters):
+        column = column_of(token)
+        if column is not None:
+            add(bound, column, operator)
+
+    equality, ranges = bound if bound != ([], []) else joined
+    ranges = [column for column in ranges if column not in equality]
+    return tuple(equality + ranges[:1])
+
+
+def index_name(table, columns):
+    return f"ix_{table}_{'_'.join(columns)}"
+
+
+class IndexAdvisor:
+    """Full scans of recorded statements and foreign keys without an index, on one SQLite connection"""
+    def __init__(self, connection):
+        self.connection = connection
+        inspector = inspect(connection)
+        self.tables = set(inspector.get_table_names())
+        self.columns = {table: {column['name'] for column in inspector.get_columns(table)} for table in self.tables}
+        self.foreign_keys = {table: inspector.get_foreign_keys(table) for table in self.tables}
+        # Column lists whose prefixes an existing index (or the primary key) already serves
+        self.indexed = {table: [tuple(inspector.get_pk_constraint(table)['constrained_columns'])] +
+                        [tuple(index['column_names']) for index in inspector.get_indexes(table)] +
+                        [tuple(unique['column_names']) for unique in inspector.get_unique_constraints(table)]
+                        for table in self.tables}
+
+    def is_indexed(self, table, columns):
+        return any(index[:len(columns)] == tuple(columns) for index in self.indexed.get(table, ()))
+
+    def scans(self, recorded):
+        """Full table scans in the plans of the recorded statements"""
+        found = []
+        for item in recorded:
+            aliases = _aliases(item.statement)
+            try:
+                details = explain(self.connection, item.statement, item.parameters)
+            except Exception:
+                continue  # a statement that cannot be planned again (temporary table, dropped row...)
+            for detail in details:
+                match = _FULL_SCAN.match(detail)
+                if match is None:
+                    continue
+                alias = match.group(1)
+                table = aliases.get(alias, alias)
+                if table in self.tables:
+                    found.append(Scan(table, alias, detail, item.statement, item.count, sorted(item.scopes)))
+        return found
+
+    def suggest(self, scans):
+        """(suggestions, scans no index avoids): indexes for the full scans, then for unindexed foreign keys"""
+        suggestions, unavoidable = {}, []
+
+        def suggest_index(table, columns, reason):
+            if self.is_indexed(table, columns):
+                return
+            key = (table, tuple(columns))
+            if key not in suggestions:
+                suggestions[key] = Suggestion(table, tuple(columns), index_name(table, columns), [])
+            if reason not in suggestions[key].reasons:
+                suggestions[key].reasons.append(reason)
+
+        for scan in scans:
+            columns = filter_columns(scan.statement, scan.alias, scan.table, self.columns[scan.table])
+            if not columns or self.is_indexed(scan.table, columns):
+                unavoidable.append(scan)
+                continue
+            where = f" in {', '.join(scan.scopes)}" if scan.scopes else ''
+            suggest_index(scan.table, columns, f'full scan, {scan.count} executions{where}')
+        for table in sorted(self.tables):
+            for foreign_key in self.foreign_keys[table]:
+                suggest_index(table, foreign_key['constrained_columns'],
+                              f"foreign key to {foreign_key['referred_table']}")
+        # An index also serves the prefixes of its columns: one index per table and leading columns
+        kept = []
+        for suggestion in sorted(suggestions.values(), key=lambda item: -len(item.columns)):
+            wider = next((other for other in kept if other.table == suggestion.table
+                          and other.columns[:len(suggestion.columns)] == suggestion.columns), None)
+            if wider is None:
+                kept.append(suggestion)
+            else:
+                wider.reasons.extend(reason for reason in suggestion.reasons if reason not in wider.reasons)
+        return sorted(kept, key=lambda item: (item.table, item.columns)), unavoidable
+
+
+def migration_source(suggestions, revision, down_revision, message='Add indexes suggested by the index advisor'):
+    """Source of an Alembic revision creating the suggested indexes"""
+    reasons = '\n'.join(f"{suggestion.name}: {'; '.join(suggestion.reasons)}" for suggestion in suggestions)
+    creates = '\n'.join(f"    op.create_index('{suggestion.name}', '{suggestion.table}', "
+                        f"{list(suggestion.columns)!r}, unique=False)" for suggestion in suggestions) or '    pass'
+    drops = '\n'.join(f"    op.drop_index('{suggestion.name}', table_name='{suggestion.table}')"
+                      for suggestion in reversed(suggestions)) or '    pass'
+    return f'''"""{message}
+
+Generated by app/persistence/index_advisor.py from the query plans of a
+benchmark run (python benchmarks/suite.py --index-migration):
+
+{reasons}
+
+Revision ID: {revision}
+Revises: {down_revision}
+Create Date: {datetime.now()}
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '{revision}'
+down_revision = '{down_revision}'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+{creates}
+
+
+def downgrade():
+{drops}
+'''
+
+
+def write_migration(migrations_directory, suggestions, message='Add indexes suggested by the index advisor'):
+    """Write the revision after the current head of the migrations directory; returns its path"""
+    from alembic.util import rev_id
+    from alembic.script import ScriptDirectory
+
+    head = ScriptDirectory(migrations_directory).get_current_head()
+    revision = rev_id()
+    slug = re.sub(r'\W+', '_', message.lower()).strip('_')[:50]
+    path = os.path.join(migrations_directory, 'versions', f'{revision}_{slug}.py')
+    with open(path, 'w') as f:
+        f.write(migration_source(suggestions, revision, head, message))
+    return path
@@ -0,0 +1,229 @@
+"""Read/write routing: SELECTs outside a write go to a read-only replica engine.
+
+Two kinds of replica, configured like a Flask extension:
+
+* SQLALCHEMY_REPLICA_URI: any read engine, e.g. the same SQLite file opened
+  read-only (sqlite:///file:/path/hbnb.db?mode=ro&uri=true), or a replica
+  maintained outside the application;
+* REPLICA_SNAPSHOT_PATH: a snapshot of the primary database copied with the
+  SQLite online backup API, refreshed every REPLICA_REFRESH_SECONDS by a
+  background thread and opened as immutable (no locks at all). Each refresh
+  writes a new file and swaps it in; connections opened afterwards see it.
+
+RoutingSession sends a statement to the replica only if it is a SELECT, run
+outside a unit of work (the reads of a facade write must see the primary),
+and the session has not written yet. After a flush, or a write committed by
+the write coordinator for this session, the session sticks to the primary
+until it is removed at the end of the request: a client always reads its
+own writes. primary_reads() forces the primary for reads that must not be
+stale (entity cache fills, revoked token checks).
+
+The instances loaded from the replica stay in the identity map, and a write
+must not start from their possibly stale state (a review rating read before
+the snapshot caught up would unbalance the aggregates of its place). They are
+tracked, and expired when a unit of work opens or the session sticks to the
+primary: their next access reloads them from the primary.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import Mapper
+
+from app.persistence.sqlite_profile import DEFAULT_PRAGMAS, DEFAULT_POOL_SIZE, install_pragmas, is_file_database
+from app.persistence.unit_of_work import current_unit_of_work
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_SECONDS = 5
+_STICKY = 'read_replica.sticky'
+_LOADED = 'read_replica.loaded'
+# A read-only connection cannot change the journal mode or the sync policy
+_WRITE_PRAGMAS = ('journal_mode', 'synchronous')
+
+_primary_reads = ContextVar('primary_reads', default=False)
+
+
+@contextmanager
+def primary_reads():
+    """Reads inside the block go to the primary, whatever the routing rules"""
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+def stick_to_primary(session):
+    """The session wrote (or a write was made on its behalf): read the primary from now on"""
+    session.info[_STICKY] = True
+    expire_replica_reads(session)
+
+
+def expire_replica_reads(session):
+    """Expire the instances this session loaded from the replica: the next access reloads them"""
+    loaded = session.info.pop(_LOADED, None)
+    for obj in loaded or ():
+        state = inspect(obj)
+        if obj not in session or state.deleted:
+            continue
+        if not state.modified:
+            session.expire(obj)
+        elif state.unmodified:
+            # Changes not flushed yet are kept: only what was read from the replica is reloaded
+            session.expire(obj, state.unmodified)
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that routes plain reads to the read replica, if one is configured"""
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and clause is not None:
+            from app import read_replica
+            if read_replica.engine is not None and self._reads_replica(clause):
+                return read_replica.bind()
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_replica(self, clause):
+        return (getattr(clause, 'is_select', False) and not self._flushing and not self.info.get(_STICKY)
+                and current_unit_of_work() is None and not _primary_reads.get())
+
+
+@event.listens_for(RoutingSession, 'after_flush_postexec')
+def _after_flush(session, flush_context):
+    stick_to_primary(session)
+
+
+@event.listens_for(Mapper, 'load')
+def _on_load(target, context):
+    _track_replica_read(target, context)
+
+
+@event.listens_for(Mapper, 'refresh')
+def _on_refresh(target, context, attrs):
+    _track_replica_read(target, context)
+
+
+def _track_replica_read(target, context):
+    # Loads run within the execution that routed their SELECT: the rules give the same answer.
+    # No context for the instances merged from the entity cache (filled from the primary)
+    session = getattr(context, 'session', None)
+    if not isinstance(session, RoutingSession) or context.query is None:
+        return
+    from app import read_replica
+    if read_replica.engine is not None and session._reads_replica(context.query):
+        session.info.setdefault(_LOADED, weakref.WeakSet()).add(target)
+
+
+class ReadReplica:
+    """The read engine of RoutingSession, and the snapshot refresher when the replica is a snapshot"""
+    def __init__(self):
+        self.engine = None
+        self.snapshot_path = None
+        self.refresh_seconds = DEFAULT_REFRESH_SECONDS
+        self.refreshes = 0
+        self.refreshed_at = None
+        self._primary = None
+        self._pragmas = {}
+        self._pool_size = DEFAULT_POOL_SIZE
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db):
+        self.shutdown()
+        self.engine = None
+        self.refreshes = 0
+        self.refreshed_at = None
+        self.snapshot_path = app.config.get('REPLICA_SNAPSHOT_PATH')
+        self.refresh_seconds = app.config.get('REPLICA_REFRESH_SECONDS', DEFAULT_REFRESH_SECONDS)
+        self._pragmas = {name: value for name, value in app.config.get('SQLITE_PRAGMAS', DEFAULT_PRAGMAS).items()
+                         if name not in _WRITE_PRAGMAS}
+        self._pool_size = app.config.get('SQLITE_POOL_SIZE', DEFAULT_POOL_SIZE)
+        uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+        if self.snapshot_path:
+            with app.app_context():
+                self._primary = db.engine
+            self.refresh()
+        elif uri:
+            options = {'pool_size': self._pool_size} if is_file_database(uri) else {}
+            self.engine = create_engine(uri, **options)
+            install_pragmas(self.engine, self._pragmas)
+
+    def bind(self):
+        if self.snapshot_path:
+            self._ensure_refresher()
+        return self.engine
+
+    # Snapshots
+
+    def refresh(self):
+        """Copy the primary into a new snapshot file, swap it in and reconnect the read engine"""
+        started = time.perf_counter()
+        partial = f'{self.snapshot_path}.{os.getpid()}.partial'
+        target = sqlite3.connect(partial)
+        source = self._primary.raw_connection()
+        try:
+            # One step: the copy is a consistent snapshot of the primary
+            source.driver_connection.backup(target)
+            # The primary may be in WAL mode: an immutable read-only file must not need a -wal/-shm
+            target.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            source.close()
+            target.close()
+        os.replace(partial, self.snapshot_path)
+        with self._lock:
+            previous, self.engine = self.engine, self._snapshot_engine()
+            self.refreshes += 1
+            self.refreshed_at = time.time()
+        if previous is not None:
+            # Pooled connections still read the old file: close them (checked-out ones on return)
+            previous.dispose()
+        logger.debug('Replica snapshot refreshed in %.0f ms', (time.perf_counter() - started) * 1000)
+
+    def _snapshot_engine(self):
+        engine = create_engine(f'sqlite:///file:{os.path.abspath(self.snapshot_path)}?mode=ro&immutable=1&uri=true',
+                               pool_size=self._pool_size)
+        install_pragmas(engine, self._pragmas)
+        return engine
+
+    def _ensure_refresher(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            # First replica read of this process (threads do not survive a fork)
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._refresh_loop, args=(self._stop,),
+                                            name='hbnb-replica-refresh', daemon=True)
+            self._thread.start()
+
+    def _refresh_loop(self, stop):
+        while not stop.wait(self.refresh_seconds):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('Replica snapshot refresh failed, still serving the previous one')
+
+    def shutdown(self):
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and self._pid == os.getpid():
+            thread.join(timeout=10)
+
+    def stats(self):
+        return {
+            'enabled': self.engine is not None,
+            'snapshot': self.snapshot_path is not None,
+            'refreshes': self.refreshes,
+            'age_seconds': round(time.time() - self.refreshed_at, 1) if self.refreshed_at else None,
+        }
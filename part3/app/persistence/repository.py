@@ -1,4 +1,52 @@
 from abc import ABC, abstractmethod
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_
+
+from app.persistence import table_versions
+from app.persistence.sqlite_profile import retry_on_busy
+from app.persistence.unit_of_work import current_unit_of_work
+
+
+def encode_cursor(values):
+    """Build an opaque pagination cursor from the sort key values of the last row of a page"""
+    payload = [{'dt': v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor built by encode_cursor, raise ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(payload, list):
+            raise ValueError
+        return [datetime.fromisoformat(v['dt']) if isinstance(v, dict) else v for v in payload]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid pagination cursor")
+
+def _keyset_after(order_by, values):
+    """Row-value comparison "strictly after values" for a mixed ASC/DESC ordering"""
+    clauses = []
+    for i, (column, descending) in enumerate(order_by):
+        equal_prefix = [col == value for (col, _), value in zip(order_by[:i], values[:i])]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+class QuerySpec:
+    """Filters, ordering and relationship loading that SQLAlchemyRepository pushes down to SQL.
+
+    filters is a list of SQLAlchemy criteria combined with AND, order_by a list
+    of (column expression, descending) whose last key must be unique (the id),
+    options a list of loader options (selectinload, joinedload...).
+    """
+    def __init__(self, filters=None, order_by=None, options=None):
+        self.filters = list(filters or [])
+        self.order_by = list(order_by or [])
+        self.options = list(options or [])
 
 class Repository(ABC):
     @abstractmethod
@@ -40,12 +88,39 @@ class InMemoryRepository(Repository):
         return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
 
 class SQLAlchemyRepository(Repository):
+    # Loading profiles: name -> loader options that fetch the relationships an endpoint
+    # serializes in a constant number of queries (see get_with_relations)
+    loading_profiles = {}
+
     def __init__(self, model):
         self.model = model
+    def loader_options(self, profile):
+        return list(self.loading_profiles.get(profile, []))
+    def get_with_relations(self, obj_id, profile='detail'):
+        return self.model.query.options(*self.loader_options(profile)).filter(self.model.id == obj_id).first()
+    def get_all_with_relations(self, profile='list'):
+        return self.model.query.options(*self.loader_options(profile)).all()
+    def _save(self, change):
+        # change() stages the write in the session. Inside a unit of work the unit commits once
+        # at the end; alone it is committed now, and replayed after a rollback if SQLite is busy
+        from app import db
+        unit = current_unit_of_work()
+        if unit is not None:
+            change()
+            unit.register_change()
+            return
+
+        def attempt():
+            change()
+            db.session.commit()
+        retry_on_busy(attempt, on_retry=db.session.rollback)
     def add(self, obj):
         from app import db
-        db.session.add(obj)
-        db.session.commit()
+        self._save(lambda: db.session.add(obj))
+    def flush(self):
+        # Write the staged changes now, so that constraint violations surface at the call site
+        from app import db
+        db.session.flush()
     def get(self, obj_id):
         return self.model.query.get(obj_id)
     def get_all(self):
@@ -53,15 +128,58 @@ class SQLAlchemyRepository(Repository):
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
-            for key, value in data.items():
-                setattr(obj, key, value)
-            from app import db
-            db.session.commit()
+            def change():
+                for key, value in data.items():
+                    setattr(obj, key, value)
+            self._save(change)
     def delete(self, obj_id):
         obj = self.get(obj_id)
         if obj:
             from app import db
-            db.session.delete(obj)
-            db.session.commit()
+            self._save(lambda: db.session.delete(obj))
     def get_by_attribute(self, attr_name, attr_value):
         return self.model.query.filter_by(**{attr_name: attr_value}).first()
+    def get_version(self, obj_id):
+        # Last modification of one entity, read without loading it (None if it does not exist)
+        from app import db
+        return db.session.execute(db.select(self.model.updated_at).where(self.model.id == obj_id)).scalar()
+    def get_collection_version(self, *related):
+        # Write counter of the table, bumped in the transaction of every insert, update or delete:
+        # a primary key lookup, where count(*) and max(updated_at) scanned the whole table.
+        # The tables of the related models whose rows the collection embeds are read in the same query
+        from app import db
+        names = [model.__tablename__ for model in (self.model, *related)]
+        return table_versions.version_of(db.session.execute(table_versions.version_statement(names)).all(), names)
+    def count(self):
+        from app import db
+        return db.session.execute(db.select(func.count()).select_from(self.model)).scalar()
+    def exists(self):
+        # EXISTS stops at the first row, where COUNT(*) walks the whole table
+        from app import db
+        return db.session.execute(db.select(db.select(self.model.id).exists())).scalar()
+    def find(self, spec):
+        query = self.model.query.options(*spec.options).filter(*spec.filters)
+        if spec.order_by:
+            query = query.order_by(*[col.desc() if desc else col.asc() for col, desc in spec.order_by])
+        return query.all()
+    def get_page(self, limit, cursor=None, spec=None):
+        # Keyset pagination: seek past the sort keys of the last row seen instead of using
+        # OFFSET, so every page costs the same index range scan whatever its position
+        from app import db
+        spec = spec or QuerySpec()
+        order_by = spec.order_by or [(self.model.created_at, False), (self.model.id, False)]
+        keys = [col for col, _ in order_by]
+        query = db.session.query(self.model, *keys).options(*spec.options).filter(*spec.filters)
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != len(order_by):
+                raise ValueError("Invalid pagination cursor")
+            query = query.filter(_keyset_after(order_by, values))
+        query = query.order_by(*[col.desc() if desc else col.asc() for col, desc in order_by])
+        # One extra row tells us whether there is a next page without a COUNT(*)
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][1:])
+        return [row[0] for row in rows], next_cursor
@@ -0,0 +1,115 @@
+"""SQLite FTS5 full-text index over places.title / places.description.
+
+The index row of a place shares the rowid of its places row and is kept in
+sync by ORM mapper events, in the same transaction as the flush. Writes that
+bypass the ORM (Core inserts, raw SQL) must call index_places() for the new
+rows, or run rebuild_statements() after.
+"""
+import html
+import re
+
+from sqlalchemy import DDL, bindparam, event, inspect, text
+
+from app.persistence.uuid_type import UUIDString
+
+FTS_TABLE = 'places_fts'
+
+# Weights of the title and description columns in the bm25() ranking
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+HIGHLIGHT_OPEN = '<mark>'
+HIGHLIGHT_CLOSE = '</mark>'
+# Markers passed to highlight() / snippet(): control characters, replaced by the HTML marks once
+# the text around them is escaped (see render_highlight)
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+CREATE_STATEMENTS = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )""",
+]
+
+DROP_STATEMENTS = [
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+def rebuild_statements():
+    """Statements that refill the index from the places table"""
+    return [
+        f"DELETE FROM {FTS_TABLE}",
+        f"INSERT INTO {FTS_TABLE}(rowid, title, description) SELECT rowid, title, description FROM places",
+    ]
+
+_INDEX_PLACE = text(
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description) "
+    "SELECT rowid, title, description FROM places WHERE id = :id"
+).bindparams(bindparam('id', type_=UUIDString))
+_INDEX_PLACES = text(
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description) "
+    "SELECT rowid, title, description FROM places WHERE id IN :ids"
+).bindparams(bindparam('ids', type_=UUIDString, expanding=True))
+_UNINDEX_PLACE = text(
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = (SELECT rowid FROM places WHERE id = :id)"
+).bindparams(bindparam('id', type_=UUIDString))
+
+def index_places(connection, place_ids):
+    """Index places inserted without the ORM (bulk Core inserts)"""
+    if place_ids and connection.dialect.name == 'sqlite':
+        connection.execute(_INDEX_PLACES, {'ids': list(place_ids)})
+
+def _after_insert(mapper, connection, target):
+    if connection.dialect.name == 'sqlite':
+        connection.execute(_INDEX_PLACE, {'id': target.id})
+
+def _after_update(mapper, connection, target):
+    if connection.dialect.name != 'sqlite':
+        return
+    state = inspect(target)
+    if state.attrs.title.history.has_changes() or state.attrs.description.history.has_changes():
+        connection.execute(_UNINDEX_PLACE, {'id': target.id})
+        connection.execute(_INDEX_PLACE, {'id': target.id})
+
+def _before_delete(mapper, connection, target):
+    # Before the DELETE: the places row, and therefore its rowid, still exists
+    if connection.dialect.name == 'sqlite':
+        connection.execute(_UNINDEX_PLACE, {'id': target.id})
+
+def install(place_model):
+    """Create/drop the index with the places table and sync it from ORM flushes (SQLite only)"""
+    places_table = place_model.__table__
+    for statement in CREATE_STATEMENTS:
+        event.listen(places_table, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+    for statement in DROP_STATEMENTS:
+        event.listen(places_table, 'before_drop', DDL(statement).execute_if(dialect='sqlite'))
+    event.listen(place_model, 'after_insert', _after_insert)
+    event.listen(place_model, 'after_update', _after_update)
+    event.listen(place_model, 'before_delete', _before_delete)
+
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+def render_highlight(marked):
+    """HTML of a highlight() / snippet() result: the text escaped, the matches wrapped in <mark>.
+
+    Titles and descriptions are user input: a client rendering the highlight
+    as HTML must never receive their markup unescaped.
+    """
+    if marked is None:
+        return None
+    return html.escape(marked).replace(MATCH_START, HIGHLIGHT_OPEN).replace(MATCH_END, HIGHLIGHT_CLOSE)
+
+def match_expression(query):
+    """Turn free text into a safe FTS5 MATCH expression: every word, prefix-matched.
+
+    Words are quoted so FTS5 operators typed by the user (AND, NEAR, quotes,
+    column filters) are treated as plain text. Raise ValueError if the query
+    contains no word.
+    """
+    tokens = _TOKEN.findall(query or '')
+    if not tokens:
+        raise ValueError("Search query must contain at least one word")
+    return ' '.join(f'"{token}"*' for token in tokens)
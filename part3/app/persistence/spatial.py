@@ -0,0 +1,106 @@
+"""SQLite R*Tree spatial index over places.latitude / places.longitude.
+
+The index is a virtual table keyed by places.rowid and kept in sync by SQL
+triggers, so every insert, update or delete on places (ORM or raw SQL) updates
+it in the same transaction. VACUUM may renumber the rowids of a table without
+an INTEGER PRIMARY KEY: run rebuild_statements() afterwards.
+"""
+import math
+
+from sqlalchemy import DDL, column, event, table
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+# No point of the sphere is farther than half a great circle
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+RTREE_TABLE = 'places_rtree'
+
+# Lightweight table construct for queries (not part of the metadata, never created by create_all)
+places_rtree = table(RTREE_TABLE, column('id'), column('min_lat'), column('max_lat'),
+                     column('min_lng'), column('max_lng'))
+
+CREATE_STATEMENTS = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE} USING rtree(id, min_lat, max_lat, min_lng, max_lng)",
+    f"""CREATE TRIGGER IF NOT EXISTS places_rtree_insert AFTER INSERT ON places BEGIN
+        INSERT INTO {RTREE_TABLE} VALUES (NEW.rowid, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS places_rtree_update AFTER UPDATE OF latitude, longitude ON places BEGIN
+        UPDATE {RTREE_TABLE} SET min_lat = NEW.latitude, max_lat = NEW.latitude,
+                                 min_lng = NEW.longitude, max_lng = NEW.longitude
+        WHERE id = NEW.rowid;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS places_rtree_delete AFTER DELETE ON places BEGIN
+        DELETE FROM {RTREE_TABLE} WHERE id = OLD.rowid;
+    END""",
+]
+
+DROP_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS places_rtree_delete",
+    "DROP TRIGGER IF EXISTS places_rtree_update",
+    "DROP TRIGGER IF EXISTS places_rtree_insert",
+    f"DROP TABLE IF EXISTS {RTREE_TABLE}",
+]
+
+def rebuild_statements():
+    """Statements that refill the index from the places table"""
+    return [
+        f"DELETE FROM {RTREE_TABLE}",
+        f"INSERT INTO {RTREE_TABLE} SELECT rowid, latitude, latitude, longitude, longitude FROM places",
+    ]
+
+def install(places_table):
+    """Create/drop the index together with the places table (SQLite only)"""
+    for statement in CREATE_STATEMENTS:
+        event.listen(places_table, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+    for statement in DROP_STATEMENTS:
+        event.listen(places_table, 'before_drop', DDL(statement).execute_if(dialect='sqlite'))
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometres between two (lat, lng) points"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def bbox_ranges(min_lng, min_lat, max_lng, max_lat):
+    """Split a bounding box into (min_lat, max_lat, min_lng, max_lng) ranges.
+
+    A box whose min_lng is greater than its max_lng crosses the antimeridian
+    and is split in two.
+    """
+    if min_lng <= max_lng:
+        return [(min_lat, max_lat, min_lng, max_lng)]
+    return [(min_lat, max_lat, min_lng, 180.0), (min_lat, max_lat, -180.0, max_lng)]
+
+def radius_bbox(lat, lng, radius_km):
+    """(min_lng, min_lat, max_lng, max_lat) box that contains the whole circle"""
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = max(-90.0, lat - d_lat), min(90.0, lat + d_lat)
+    # Near a pole the circle covers every longitude
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if max_lat >= 90.0 or min_lat <= -90.0 or cos_lat <= 0:
+        return -180.0, min_lat, 180.0, max_lat
+    d_lng = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    if d_lng >= 180.0:
+        return -180.0, min_lat, 180.0, max_lat
+    min_lng, max_lng = lng - d_lng, lng + d_lng
+    # Wrap to [-180, 180]; bbox_ranges() handles the resulting antimeridian crossing
+    if min_lng < -180.0:
+        min_lng += 360.0
+    if max_lng > 180.0:
+        max_lng -= 360.0
+    return min_lng, min_lat, max_lng, max_lat
+
+def intersect_ranges(a, b):
+    """Intersection of two (min_lat, max_lat, min_lng, max_lng) ranges, None if they do not overlap"""
+    result = (max(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), min(a[3], b[3]))
+    if result[0] > result[1] or result[2] > result[3]:
+        return None
+    return result
+
+def range_contains(outer, inner):
+    """True if the range outer contains the whole range inner"""
+    return outer[0] <= inner[0] and inner[1] <= outer[1] and outer[2] <= inner[2] and inner[3] <= outer[3]
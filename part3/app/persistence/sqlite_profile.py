@@ -0,0 +1,107 @@
+"""SQLite engine profile: WAL journal, per-connection pragmas, pool size and busy retries.
+
+With the default rollback journal a writer blocks every reader, and a second
+writer gets "database is locked" once the busy timeout runs out. In WAL mode
+readers work on a snapshot while one writer appends to the log, so only
+writers wait for each other. The pragmas are set on every new DBAPI
+connection (journal_mode is persistent, the others are per connection).
+
+When a write still finds the database busy after busy_timeout, retry_on_busy
+rolls back and runs the operation again after an exponential backoff.
+"""
+import logging
+import random
+import sqlite3
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # In WAL mode the log is synced at checkpoints only: a commit survives a crash of the
+    # process, a power loss may drop the last commits (never corrupts the database)
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # ms a writer waits for the lock before SQLITE_BUSY
+    'cache_size': -64000,  # page cache per connection, in KiB when negative (64 MB)
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+DEFAULT_POOL_SIZE = 5
+DEFAULT_BUSY_RETRIES = 5
+DEFAULT_BUSY_BACKOFF = 0.05  # seconds, doubled on every attempt
+MAX_BUSY_BACKOFF = 2.0
+
+_SQLITE_BUSY, _SQLITE_LOCKED = 5, 6
+
+
+def is_file_database(uri):
+    url = make_url(uri)
+    return (url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+            and url.query.get('mode') != 'memory')
+
+
+def configure_engine(app):
+    """Pool options of the profile, set before db.init_app builds the engine.
+
+    Only file databases use a connection pool: an in-memory database lives in one connection.
+    """
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI')
+    if not uri or not is_file_database(uri):
+        return
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    # One connection per server thread stays open; bursts above it open (and close) extra ones
+    options.setdefault('pool_size', app.config.get('SQLITE_POOL_SIZE', DEFAULT_POOL_SIZE))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def install_pragmas(engine, pragmas):
+    """Run PRAGMA name = value for every pragma on each new connection of a SQLite engine"""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    statements = [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    event.listen(engine, 'connect', set_pragmas)
+
+
+def is_busy(error):
+    """True if a DBAPI error (or the SQLAlchemy error wrapping it) is SQLITE_BUSY or SQLITE_LOCKED"""
+    orig = getattr(error, 'orig', error)
+    code = getattr(orig, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xff in (_SQLITE_BUSY, _SQLITE_LOCKED)
+    return isinstance(orig, sqlite3.OperationalError) and 'locked' in str(orig)
+
+
+def retry_on_busy(operation, on_retry=None):
+    """Return operation(); if SQLite reports the database busy, call on_retry (a rollback)
+    and run it again after a jittered exponential backoff, at most SQLITE_BUSY_RETRIES times"""
+    config = current_app.config if has_app_context() else {}
+    retries = config.get('SQLITE_BUSY_RETRIES', DEFAULT_BUSY_RETRIES)
+    backoff = config.get('SQLITE_BUSY_BACKOFF', DEFAULT_BUSY_BACKOFF)
+    attempt = 0
+    while True:
+        try:
+            return operation()
+        except OperationalError as error:
+            if attempt >= retries or not is_busy(error):
+                raise
+            if on_retry is not None:
+                on_retry()
+            delay = min(MAX_BUSY_BACKOFF, backoff * 2 ** attempt)
+            attempt += 1
+            logger.warning('Database busy, retry %d/%d within %.0f ms', attempt, retries, delay * 1000)
+            # Full jitter: writers that collided do not all come back at the same time
+            time.sleep(random.uniform(0, delay))
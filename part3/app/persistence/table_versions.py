@@ -0,0 +1,70 @@
+"""Per-table write counters: the validators of the collection ETags.
+
+Every write to a table bumps its row of table_versions in the same
+transaction: ORM flushes through after_flush (tables of the new, modified and
+deleted instances), and the INSERT / UPDATE / DELETE statements run with
+Session.execute (bulk imports, aggregate recomputations) through
+do_orm_execute. The version of a list is then read with a primary key lookup,
+where (count(*), max(updated_at)) scanned the whole table on every request.
+
+Writes that bypass the session (raw connections, another program) must call
+bump() themselves.
+"""
+from datetime import datetime
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+_model = None
+
+
+def version_statement(table_names):
+    """SELECT (table_name, version, updated_at) of tables: rows of table_versions, by primary key"""
+    return select(_model.table_name, _model.version, _model.updated_at).where(_model.table_name.in_(table_names))
+
+def version_of(rows, table_names):
+    """Version tuple of the tables, in order, from the rows of version_statement; a table never written to is at (0, None)"""
+    found = {row[0]: tuple(row[1:]) for row in rows}
+    return sum((found.get(name, (0, None)) for name in table_names), ())
+
+def bump(connection, table_names):
+    """Increment the counters of the given tables on this connection (inside its transaction)"""
+    versions = _model.__table__
+    now = datetime.utcnow()
+    # Always in the same order: two transactions never wait on each other's rows
+    for name in sorted(table_names):
+        updated = connection.execute(
+            versions.update().where(versions.c.table_name == name)
+            .values(version=versions.c.version + 1, updated_at=now)
+        ).rowcount
+        if not updated:
+            connection.execute(versions.insert().values(table_name=name, version=1, updated_at=now))
+
+def _tables(obj):
+    return {table.name for table in inspect(obj).mapper.tables}
+
+def _after_flush(session, flush_context):
+    names = set()
+    for obj in list(session.new) + list(session.deleted):
+        names |= _tables(obj)
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            names |= _tables(obj)
+    names.discard(_model.__tablename__)
+    if names:
+        bump(session.connection(), names)
+
+def _do_orm_execute(state):
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    name = getattr(state.statement.table, 'name', None)
+    if name and name != _model.__tablename__:
+        bump(state.session.connection(), [name])
+
+def install(model):
+    """Keep the counters of model (the table_versions table) up to date on every session write"""
+    global _model
+    _model = model
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'do_orm_execute', _do_orm_execute)
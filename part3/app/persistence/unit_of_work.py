@@ -0,0 +1,113 @@
+"""Unit of work: one flush and one commit per facade operation.
+
+Inside an active unit of work the repositories only stage their changes in
+the session; the unit flushes and commits them together when the outermost
+scope exits, or rolls everything back if it raises. Nested scopes join the
+outer one, so a facade method calling another facade method still commits
+once. With a batch_size the unit also commits every batch_size changes, for
+bulk work that should not hold one huge transaction.
+
+A facade method whose commit finds SQLite busy (after busy_timeout) is rolled
+back and replayed as a whole by @transactional, on fresh copies of its
+arguments since the method may have consumed them.
+"""
+import copy
+from contextvars import ContextVar
+from functools import wraps
+
+_active_unit = ContextVar('active_unit_of_work', default=None)
+
+
+def current_unit_of_work():
+    """The unit of work active in this context, or None"""
+    return _active_unit.get()
+
+
+class UnitOfWork:
+    def __init__(self, session, batch_size=None):
+        self.session = session
+        self.batch_size = batch_size
+        self.pending = 0
+        self.commits = 0
+        self._token = None
+        self._no_autoflush = None
+
+    def __enter__(self):
+        from app.persistence.replica import expire_replica_reads
+        # The unit writes from the primary, never from instances read on the replica
+        expire_replica_reads(self.session)
+        self._token = _active_unit.set(self)
+        # Queries issued inside the unit must not flush half-finished changes
+        self._no_autoflush = self.session.no_autoflush
+        self._no_autoflush.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._no_autoflush.__exit__(exc_type, exc, tb)
+        _active_unit.reset(self._token)
+        if exc_type is not None:
+            self.session.rollback()
+            return False
+        self.commit()
+        return False
+
+    def register_change(self):
+        """Called by the repositories for every staged add/update/delete"""
+        self.pending += 1
+        if self.batch_size and self.pending >= self.batch_size:
+            self.commit()
+
+    def commit(self):
+        self.session.commit()
+        self.pending = 0
+        self.commits += 1
+
+
+class _JoinedUnit:
+    """Scope nested in an already active unit: the outer unit commits"""
+    def __init__(self, unit):
+        self.unit = unit
+
+    def __enter__(self):
+        return self.unit
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+def unit_of_work(batch_size=None):
+    """Open a unit of work, or join the one already active in this context"""
+    active = current_unit_of_work()
+    if active is not None:
+        return _JoinedUnit(active)
+    from app import db
+    return UnitOfWork(db.session, batch_size)
+
+
+def transactional(method=None, *, coordinated=True):
+    """Run the decorated facade method in a unit of work, replayed if the database is busy.
+
+    In write-coordinator mode the method runs on the writer thread, batched with
+    other writes (app/persistence/write_coordinator.py). coordinated=False keeps
+    it on the calling thread: methods that hash passwords would hold the single
+    writer for the whole bcrypt computation.
+    """
+    if method is None:
+        return lambda method: transactional(method, coordinated=coordinated)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if current_unit_of_work() is not None:
+            # Joined to an outer unit: only the outermost scope may replay the transaction
+            return method(self, *args, **kwargs)
+        from app import write_coordinator
+        if coordinated and write_coordinator.accepts():
+            return write_coordinator.run(method, self, args, kwargs)
+        from app.persistence.sqlite_profile import retry_on_busy
+
+        def attempt():
+            call_args, call_kwargs = copy.deepcopy((args, kwargs))
+            with unit_of_work():
+                return method(self, *call_args, **call_kwargs)
+        return retry_on_busy(attempt)
+    return wrapper
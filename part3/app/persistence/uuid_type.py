@@ -0,0 +1,119 @@
+"""Storage of the entity ids: canonical 36-character text, or 16-byte UUID BLOBs (ID_STORAGE).
+
+Every primary key and every foreign key to it repeats the id, so its width
+sets the size of the tables and of every index on them, and the number of
+bytes each join compares. 'binary' keeps the 16 bytes of the UUID instead of
+its 36 characters. The application always sees the canonical string: the
+type converts on the way in and out, and the API does not change. Only the
+canonical spelling is stored as 16 bytes; any other text (a lookup by a
+malformed id) becomes a marked blob that matches no id and reads back as
+sent, never as another UUID.
+
+The mode is set once per process by create_app, before any query. A fresh
+database created in binary mode declares the columns BLOB; an existing one
+is converted in place by the migration f2b8d4a6c913: SQLite lets a BLOB live
+in a VARCHAR column, so only the values change and the rowids that the
+spatial and full-text indexes are keyed on stay the same.
+"""
+import uuid
+
+from sqlalchemy.types import BINARY, LargeBinary, String, TypeDecorator
+
+ID_STORAGES = ('text', 'binary')
+DEFAULT_ID_STORAGE = 'text'
+
+# Every column holding an entity id: primary keys and the foreign keys to them
+ID_COLUMNS = {
+    'users': ['id'],
+    'amenities': ['id'],
+    'places': ['id', 'owner_id'],
+    'reviews': ['id', 'user_id', 'place_id'],
+    'place_amenities': ['place_id', 'amenity_id'],
+}
+
+_storage = DEFAULT_ID_STORAGE
+_TEXT_MARKER = b'\xff'
+
+
+def configure(app):
+    global _storage
+    storage = app.config.get('ID_STORAGE', DEFAULT_ID_STORAGE)
+    if storage not in ID_STORAGES:
+        raise ValueError(f"ID_STORAGE must be one of {', '.join(ID_STORAGES)}, not {storage!r}")
+    _storage = storage
+
+
+def id_storage():
+    return _storage
+
+
+def is_canonical_uuid(value):
+    """True for the canonical text of a UUID (lower case, with dashes): the only form that round-trips as 16 bytes"""
+    try:
+        return str(uuid.UUID(value)) == value
+    except (TypeError, ValueError, AttributeError):
+        return False
+
+
+def to_bytes(value):
+    """The 16 bytes of a canonical UUID string; ValueError for any other text"""
+    if not is_canonical_uuid(value):
+        # 16 characters of text would read back as another UUID, other spellings reformatted
+        raise ValueError(f'Not a canonical UUID: {value!r}')
+    return uuid.UUID(value).bytes
+
+
+def _to_blob(value):
+    """16 bytes for a canonical UUID; any other text as a marked blob that is never 16 bytes long"""
+    if is_canonical_uuid(value):
+        return to_bytes(value)
+    # 0xFF never occurs in UTF-8: from_bytes() strips the markers and gets the text back as it was
+    blob = _TEXT_MARKER + value.encode()
+    return blob + _TEXT_MARKER if len(blob) == 16 else blob
+
+
+def from_bytes(value):
+    if len(value) == 16:
+        return str(uuid.UUID(bytes=value))
+    return value.replace(_TEXT_MARKER, b'').decode()
+
+
+def convert_ids(connection, storage):
+    """Rewrite the ids of a SQLite database in place to the given storage; rows already in it are skipped"""
+    function, from_type, convert = (('uuid_to_blob', 'text', _to_blob) if storage == 'binary'
+                                    else ('uuid_to_text', 'blob', from_bytes))
+    connection.connection.driver_connection.create_function(function, 1, convert, deterministic=True)
+    # Parents and children are rewritten one after the other: check the keys at commit only
+    connection.exec_driver_sql('PRAGMA defer_foreign_keys = ON')
+    for table, columns in ID_COLUMNS.items():
+        for column in columns:
+            connection.exec_driver_sql(
+                f"UPDATE {table} SET {column} = {function}({column}) WHERE typeof({column}) = '{from_type}'")
+
+
+class UUIDString(TypeDecorator):
+    """Entity id column: a UUID string in Python, stored as text or as 16 bytes depending on ID_STORAGE"""
+    impl = String(36)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if _storage == 'binary':
+            # BLOB on SQLite, where any type name holds any value; a fixed-size binary elsewhere
+            return dialect.type_descriptor(LargeBinary() if dialect.name == 'sqlite' else BINARY(16))
+        return dialect.type_descriptor(String(36))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, uuid.UUID):
+            value = str(value)
+        if _storage == 'binary':
+            # Other text equals no 16-byte id, and is never read back as one
+            return value if isinstance(value, bytes) else _to_blob(value)
+        return value
+
+    def process_result_value(self, value, dialect):
+        # Text rows read in binary mode (a database not migrated yet) pass through unchanged
+        if isinstance(value, (bytes, memoryview)):
+            return from_bytes(bytes(value))
+        return value
@@ -0,0 +1,273 @@
+"""Single-writer group commit for facade mutations (optional, WRITE_COORDINATOR_ENABLED).
+
+SQLite runs one writer at a time. When every request thread commits its own
+transaction, a burst of writes turns into a queue of threads waiting for the
+lock, each paying its own commit. In coordinator mode @transactional hands
+the facade method to one writer thread instead. The writer takes every job
+waiting in the queue (up to WRITE_COORDINATOR_MAX_BATCH) and runs them in
+one transaction, opened with BEGIN IMMEDIATE, then commits once. Each job
+runs in its own SAVEPOINT, so a job that raises (validation error, unique
+constraint) is rolled back alone and its exception is returned to its
+caller. The more writes arrive together, the larger the batches and the
+fewer the commits: throughput grows with the offered load.
+
+Each call gets a concurrent.futures.Future, resolved once the batch is
+committed. Entities in the result are sent back as EntityRef and loaded
+again in the caller's session: ORM objects must not cross threads.
+
+The writer thread starts on the first write of each process (after the
+gunicorn fork). It needs a file database: the pooled in-memory SQLite
+connection would be shared between threads.
+"""
+import atexit
+import copy
+import logging
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+from sqlalchemy.orm.base import instance_state
+
+from app.persistence.replica import stick_to_primary
+from app.persistence.sqlite_profile import is_file_database, retry_on_busy
+from app.persistence.unit_of_work import unit_of_work
+from app.utils.metrics import COUNT_BUCKETS, SECONDS_BUCKETS, Histogram, histogram_lines
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH = 100
+DEFAULT_MAX_DELAY = 0.0  # seconds the writer waits for more jobs once one is queued
+DEFAULT_TIMEOUT = 30  # seconds a caller waits for its commit
+
+EntityRef = namedtuple('EntityRef', 'model identity')
+# What a job's Future resolves to: its return value (entities as EntityRef) and the
+# identity keys of the entities it deleted, to drop from the caller's session
+WriteResult = namedtuple('WriteResult', 'value deleted')
+
+
+def _portable(value):
+    """The result of a job as it may leave the writer thread"""
+    try:
+        state = instance_state(value)
+    except AttributeError:
+        return value
+    return EntityRef(state.mapper.class_, state.identity)
+
+
+class _Job:
+    __slots__ = ('method', 'instance', 'args', 'kwargs', 'future', 'submitted')
+
+    def __init__(self, method, instance, args, kwargs):
+        self.method = method
+        self.instance = instance
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.submitted = time.perf_counter()
+
+
+class WriteCoordinator:
+    """One writer thread committing the queued facade mutations in batches, configured like a Flask extension"""
+    def __init__(self):
+        self.enabled = False
+        self.app = None
+        self.max_batch = DEFAULT_MAX_BATCH
+        self.max_delay = DEFAULT_MAX_DELAY
+        self.timeout = DEFAULT_TIMEOUT
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+        atexit.register(self.shutdown)
+
+    def init_app(self, app):
+        self.shutdown()
+        enabled = app.config.get('WRITE_COORDINATOR_ENABLED', False)
+        if enabled and not is_file_database(app.config['SQLALCHEMY_DATABASE_URI']):
+            raise ValueError('The write coordinator needs a file database: an in-memory SQLite '
+                             'connection cannot be shared by the writer thread')
+        self.enabled = enabled
+        self.max_batch = app.config.get('WRITE_COORDINATOR_MAX_BATCH', DEFAULT_MAX_BATCH)
+        self.max_delay = app.config.get('WRITE_COORDINATOR_MAX_DELAY', DEFAULT_MAX_DELAY)
+        self.timeout = app.config.get('WRITE_COORDINATOR_TIMEOUT', DEFAULT_TIMEOUT)
+        self.app = app
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.batches = self.jobs = self.failed = self.retries = 0
+            self.batch_size = Histogram(COUNT_BUCKETS)
+            self.wait_seconds = Histogram(SECONDS_BUCKETS)
+            self.latency_seconds = Histogram(SECONDS_BUCKETS)
+            self.commit_seconds = Histogram(SECONDS_BUCKETS)
+
+    def accepts(self):
+        """True if writes should go through the writer: enabled, and not called by the writer itself"""
+        return self.enabled and threading.current_thread() is not self._thread
+
+    # Caller side
+
+    def submit(self, method, instance, args=(), kwargs=None):
+        """Queue method(instance, *args, **kwargs); the Future resolves to a WriteResult after the commit.
+
+        The arguments are copied for each attempt, the method may consume them.
+        """
+        job = _Job(method, instance, args, kwargs or {})
+        self._ensure_started()
+        self._queue.put(job)
+        return job.future
+
+    def run(self, method, instance, args=(), kwargs=None):
+        """submit() and wait: returns the result with its entity loaded in the caller's session"""
+        return self.attach(self.submit(method, instance, args, kwargs).result(timeout=self.timeout))
+
+    @staticmethod
+    def attach(result):
+        """The value of a WriteResult, its entity loaded in the caller's session"""
+        from app import db
+        session = db.session()
+        # The writer changed rows this session may hold: reload them on next access, from the primary
+        stick_to_primary(session)
+        session.expire_all()
+        for key in result.deleted:
+            obj = session.identity_map.get(key)
+            if obj is not None:
+                session.expunge(obj)
+        if not isinstance(result.value, EntityRef):
+            return result.value
+        return session.get(result.value.model, result.value.identity)
+
+    # Writer side
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            # First write of this process (threads do not survive a fork)
+            self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name='hbnb-writer', daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        with self.app.app_context():
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    return
+                batch = [job]
+                deadline = time.perf_counter() + self.max_delay
+                while len(batch) < self.max_batch:
+                    try:
+                        remaining = deadline - time.perf_counter()
+                        job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is None:
+                        self._queue.put(None)  # stop after this batch
+                        break
+                    batch.append(job)
+                self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        from app import db
+        started = time.perf_counter()
+        attempts = []
+
+        def attempt():
+            attempts.append(1)
+            outcomes = []
+            with unit_of_work():
+                connection = db.session.connection()
+                if connection.dialect.name == 'sqlite':
+                    # Take the write lock now (waiting busy_timeout): the savepoints then nest in it
+                    connection.exec_driver_sql('BEGIN IMMEDIATE')
+                for job in batch:
+                    args, kwargs = copy.deepcopy((job.args, job.kwargs))
+                    try:
+                        with db.session.begin_nested():
+                            value = job.method(job.instance, *args, **kwargs)
+                            deleted = [instance_state(obj).key for obj in db.session.deleted]
+                    except Exception as error:
+                        outcomes.append((False, error))
+                    else:
+                        outcomes.append((True, (value, deleted)))
+                # Identities are only final after the flush of the savepoints
+                outcomes = [(ok, WriteResult(_portable(result[0]), result[1]) if ok else result)
+                            for ok, result in outcomes]
+            return outcomes
+
+        try:
+            outcomes = retry_on_busy(attempt, on_retry=db.session.rollback)
+        except Exception as error:
+            logger.exception('Write batch of %d jobs failed', len(batch))
+            db.session.rollback()
+            outcomes = [(False, error)] * len(batch)
+        finally:
+            db.session.remove()
+        committed = time.perf_counter()
+
+        with self._lock:
+            self.batches += 1
+            self.jobs += len(batch)
+            self.retries += len(attempts) - 1
+            self.batch_size.observe(len(batch))
+            self.commit_seconds.observe(committed - started)
+            for job, (ok, _) in zip(batch, outcomes):
+                self.failed += not ok
+                self.wait_seconds.observe(started - job.submitted)
+                self.latency_seconds.observe(committed - job.submitted)
+        for job, (ok, value) in zip(batch, outcomes):
+            if ok:
+                job.future.set_result(value)
+            else:
+                job.future.set_exception(value)
+
+    def shutdown(self, timeout=10):
+        """Let the writer finish the queued jobs, then stop it"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            self._queue.put(None)
+            thread.join(timeout)
+
+    # Reports
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'queued': self._queue.qsize() if self._queue is not None else 0,
+                'batches': self.batches,
+                'jobs': self.jobs,
+                'failed': self.failed,
+                'retries': self.retries,
+                'batch_size': self.batch_size.to_dict(),
+                'wait_seconds': self.wait_seconds.to_dict(),
+                'latency_seconds': self.latency_seconds.to_dict(),
+                'commit_seconds': self.commit_seconds.to_dict(),
+            }
+
+    def to_prometheus(self):
+        with self._lock:
+            lines = []
+            for name, value, help_text in (
+                    ('batches', self.batches, 'Group commits'),
+                    ('jobs', self.jobs, 'Facade mutations run by the writer'),
+                    ('failed', self.failed, 'Mutations that raised, rolled back to their savepoint'),
+                    ('retries', self.retries, 'Batches replayed because the database was busy')):
+                metric = f'hbnb_write_coordinator_{name}_total'
+                lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter', f'{metric} {value}']
+            for name, histogram, help_text in (
+                    ('batch_size', self.batch_size, 'Mutations per group commit'),
+                    ('wait_seconds', self.wait_seconds, 'Time a mutation waited in the queue'),
+                    ('latency_seconds', self.latency_seconds, 'Time from submission to commit'),
+                    ('commit_seconds', self.commit_seconds, 'Time to run and commit a batch')):
+                metric = f'hbnb_write_coordinator_{name}'
+                lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+                lines += histogram_lines(metric, '', histogram)
+        return '\n'.join(lines) + '\n'
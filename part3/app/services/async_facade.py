@@ -0,0 +1,70 @@
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+
+from app.persistence.async_repository import AsyncSQLAlchemyRepository
+from app.services.repositories.place_repository import PlaceRepository, latest, place_version_statement
+from app.services.repositories.review_repository import REVIEWS_NEWEST_FIRST
+from app.persistence.repository import QuerySpec
+
+
+class AsyncHBnBFacade:
+    """
+    Chemin de lecture asynchrone de la façade (mode ASGI, app/asgi.py) : mêmes requêtes,
+    mêmes profils de chargement et mêmes curseurs que HBnBFacade, mais chaque méthode
+    est une coroutine qui libère la boucle d'événements pendant l'accès à la base.
+    Les écritures restent servies par HBnBFacade (application WSGI).
+    """
+    def __init__(self, database):
+        self.database = database
+        self.place_repo = AsyncSQLAlchemyRepository(Place, database, PlaceRepository.loading_profiles)
+        self.review_repo = AsyncSQLAlchemyRepository(Review, database)
+        self.amenity_repo = AsyncSQLAlchemyRepository(Amenity, database)
+        # Ne construit que les critères SQL des listes de lieux, sans jamais toucher à la session
+        self.place_specs = PlaceRepository()
+
+    # --- Versions (ETag) ---
+    async def get_place_version(self, place_id):
+        """Dernière modification du lieu, de ses agréments ou de son propriétaire, ou None s'il n'existe pas."""
+        return latest((await self.database.session.execute(place_version_statement(place_id))).first())
+
+    async def get_places_version(self):
+        return await self.place_repo.get_collection_version(Amenity, User)
+
+    async def get_amenity_version(self, amenity_id):
+        return await self.amenity_repo.get_version(amenity_id)
+
+    async def get_amenities_version(self):
+        return await self.amenity_repo.get_collection_version()
+
+    # --- Places ---
+    async def get_place_details(self, place_id):
+        """Récupère un lieu par ID avec son propriétaire et ses agréments déjà chargés."""
+        return await self.place_repo.get_with_relations(place_id, 'detail')
+
+    async def get_places_page(self, limit=50, cursor=None, sort=None, **filters):
+        """
+        Récupère une page de lieux filtrée et triée par la base, paginée par curseur.
+        :return: Tuple (liste de Place, curseur de la page suivante ou None).
+        :raises ValueError: Si le curseur ou le tri est invalide.
+        """
+        spec = self.place_specs.build_spec(sort=sort, **filters)
+        return await self.place_repo.get_page(limit, cursor, spec)
+
+    # --- Reviews ---
+    async def get_place_reviews_page(self, place_id, limit=20, cursor=None):
+        """
+        Récupère une page des critiques d'un lieu, les plus récentes d'abord.
+        :return: Tuple (liste de Review, curseur de la page suivante ou None).
+        :raises ValueError: Si le curseur est invalide.
+        """
+        spec = QuerySpec(filters=[Review.place_id == place_id], order_by=REVIEWS_NEWEST_FIRST)
+        return await self.review_repo.get_page(limit, cursor, spec)
+
+    # --- Amenities ---
+    async def get_amenity(self, amenity_id):
+        return await self.amenity_repo.get(amenity_id)
+
+    async def get_all_amenities(self):
+        return await self.amenity_repo.get_all()
@@ -0,0 +1,355 @@
+"""Deterministic synthetic data for scale testing (flask hbnb generate).
+
+The same parameters and seed always produce the same rows:
+- users: hosts first, then guests;
+- places: clustered around a few dozen cities, prices lognormal per city
+  and growing with the number of rooms;
+- amenity links: 0 to 8 per place, in place_amenities;
+- reviews: a heavily skewed count per place (lognormal around the requested
+  average), from distinct guests, created after their place.
+
+Two sinks:
+- write_database() inserts straight into the tables with executemany, one
+  transaction per chunk of places. The rating aggregates are computed while
+  generating and written with the place rows, and the full-text index is
+  fed per chunk. It skips the lookups of the bulk importer: every row is new
+  and every reference is known to be valid, except amenities, which are
+  looked up by name since their names do not depend on the seed. Into empty tables, the secondary
+  indexes of places and reviews are built once at the end rather than
+  updated at random positions by every insert.
+- write_ndjson() emits the records of the bulk importer, so the same data
+  can be loaded later with `flask hbnb import`.
+
+Ids and emails are derived from the seed and the row number, so reviews can
+reference any user or place without keeping them in memory: 10M reviews
+take a few hundred MB at most.
+"""
+import bisect
+import hashlib
+import itertools
+import json
+import random
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+DEFAULT_SEED = 42
+DEFAULT_AMENITIES = 60
+# Places per transaction, with their amenity links and reviews (about 60k rows). Every commit rewrites
+# the index pages it touched, spread over the whole file by the random ids: fewer, larger commits load faster
+DEFAULT_CHUNK_SIZE = 20_000
+PLACES_PER_HOST = 10
+GUESTS_PER_PLACE = 0.25
+REVIEW_SPREAD = 1.0  # sigma of the lognormal review count: higher is more skewed
+REVIEW_TEXT_BITS = 12  # reviews draw their text from a seeded pool of 4096: building one per review was the slowest step
+HISTORY_DAYS = 3 * 365
+
+# (latitude, longitude, relative share of the places, median price per night)
+CITIES = [
+    (48.8566, 2.3522, 12, 120), (51.5074, -0.1278, 12, 140), (40.7128, -74.0060, 14, 180),
+    (34.0522, -118.2437, 8, 160), (37.7749, -122.4194, 6, 200), (25.7617, -80.1918, 5, 150),
+    (41.3874, 2.1686, 7, 100), (40.4168, -3.7038, 5, 90), (41.9028, 12.4964, 6, 110),
+    (45.4642, 9.1900, 4, 120), (52.3676, 4.9041, 5, 150), (52.5200, 13.4050, 5, 95),
+    (50.0755, 14.4378, 3, 70), (48.2082, 16.3738, 3, 90), (38.7223, -9.1393, 4, 85),
+    (43.7102, 7.2620, 3, 140), (35.6762, 139.6503, 8, 110), (34.6937, 135.5023, 3, 80),
+    (13.7563, 100.5018, 4, 45), (1.3521, 103.8198, 3, 150), (-8.4095, 115.1889, 4, 60),
+    (-33.8688, 151.2093, 5, 160), (-37.8136, 144.9631, 3, 130), (-22.9068, -43.1729, 4, 70),
+    (-34.6037, -58.3816, 3, 55), (19.4326, -99.1332, 4, 60), (45.5017, -73.5673, 3, 100),
+    (49.2827, -123.1207, 3, 150), (30.0444, 31.2357, 2, 40), (-33.9249, 18.4241, 3, 75),
+    (25.2048, 55.2708, 3, 170), (41.0082, 28.9784, 3, 65), (55.7558, 37.6173, 2, 70),
+    (64.1466, -21.9426, 1, 190), (46.2044, 6.1432, 1, 200), (59.3293, 18.0686, 2, 130),
+]
+CITY_SPREAD_DEGREES = 0.08  # standard deviation around the centre, about 9 km
+
+FIRST_NAMES = ('Alice Bruno Chloe David Emma Farid Giulia Hugo Ines Jules Kenji Lea Malik Nora Oscar Paula '
+               'Quentin Rosa Samir Tess Ugo Vera Wei Xavier Yasmine Zoe').split()
+LAST_NAMES = ('Martin Bernard Dubois Thomas Robert Richard Petit Durand Leroy Moreau Simon Laurent Lefebvre '
+              'Michel Garcia David Bertrand Roux Vincent Fournier Morel Girard Andre Mercier Blanc').split()
+PLACE_KINDS = 'studio loft flat apartment house villa cabin cottage room suite bungalow townhouse'.split()
+PLACE_ADJECTIVES = ('cosy sunny quiet spacious modern rustic charming bright renovated elegant '
+                    'stylish peaceful historic airy').split()
+PLACE_FEATURES = ('garden terrace balcony pool view fireplace patio rooftop courtyard workspace '
+                  'parking sauna library').split()
+WORDS = ('the a with near in close to walking distance metro beach old town market park river '
+         'kitchen bed shower wifi quiet street fully equipped perfect for families couples friends '
+         'business trips light breakfast host friendly clean comfortable great location').split()
+REVIEW_WORDS = ('great lovely clean comfortable perfect noisy small spotless friendly helpful host '
+                'location view stay again recommend would bed kitchen quiet cosy amazing nice '
+                'check-in easy value price walk centre breakfast thanks').split()
+AMENITY_NAMES = ('Wifi Kitchen Washer Dryer Air_conditioning Heating Workspace TV Hair_dryer Iron Pool '
+                 'Hot_tub Free_parking EV_charger Crib Gym BBQ_grill Breakfast Fireplace Smoking_allowed '
+                 'Beachfront Waterfront Ski-in/ski-out Balcony Garden Elevator Dishwasher Coffee_maker '
+                 'Microwave Oven').split()
+RATING_WEIGHTS = (2, 3, 10, 30, 55)  # 1 to 5 stars: most reviews are good
+ROOM_WEIGHTS = (30, 30, 20, 10, 6, 4)  # 1 to 6 rooms
+
+# One generated place: its row (rating aggregates included), the user numbers of its owner and
+# reviewers, its amenity numbers and its review rows
+GeneratedPlace = namedtuple('GeneratedPlace', 'row owner amenities reviews reviewers')
+
+_MASK_128 = (1 << 128) - 1
+_MULTIPLIER = 0x9E3779B97F4A7C15F39CC0605CEDC835  # odd: number -> id is a bijection
+_VERSION_4 = (0xffffffffffff0fff3fffffffffffffff, 0x00000000000040008000000000000000)  # (keep, set) masks
+
+
+def uuid4_string(value):
+    """Canonical text of a version 4 UUID built from a 128-bit integer (what str(uuid.UUID(...)) gives, faster)"""
+    value = value & _VERSION_4[0] | _VERSION_4[1]
+    text = '%032x' % value
+    return f'{text[:8]}-{text[8:12]}-{text[12:16]}-{text[16:20]}-{text[20:]}'
+
+
+class DataGenerator:
+    """Rows of a synthetic dataset; nothing is written until a sink consumes them"""
+    def __init__(self, places, password_hash, users=None, reviews=None, amenities=DEFAULT_AMENITIES,
+                 seed=DEFAULT_SEED, now=None):
+        self.places = places
+        self.users = users or max(2, places // PLACES_PER_HOST + int(places * GUESTS_PER_PLACE))
+        self.hosts = max(1, min(self.users - 1, places // PLACES_PER_HOST))
+        self.guests = self.users - self.hosts
+        self.reviews = 3 * places if reviews is None else reviews
+        self.amenities = amenities
+        self.seed = seed
+        self.password_hash = password_hash
+        self.now = now or datetime(2025, 1, 1)
+        self._offset = int.from_bytes(hashlib.blake2b(str(seed).encode(), digest_size=16).digest(), 'big')
+        self._cities = [city[:2] + city[3:] for city in CITIES]
+        self._city_weights = list(itertools.accumulate(city[2] for city in CITIES))
+        self._rating_weights = list(itertools.accumulate(RATING_WEIGHTS))
+        texts = random.Random(f'{seed}-reviews')
+        self._review_texts = [' '.join(texts.choices(REVIEW_WORDS, k=texts.randint(4, 30))).capitalize() + '.'
+                              for _ in range(1 << REVIEW_TEXT_BITS)]
+        self._room_weights = list(itertools.accumulate(ROOM_WEIGHTS))
+
+    # --- Ids derived from (seed, kind, number): no table of ids in memory ---
+    def _id(self, kind, number):
+        # Spread like random UUIDs yet computed, not stored. Unique: the version bits cleared by
+        # uuid4_string are all above bit 61, and two row numbers differ far below that
+        return uuid4_string(((number << 2 | kind) * _MULTIPLIER + self._offset) & _MASK_128)
+
+    def user_id(self, number):
+        return self._id(0, number)
+
+    def user_email(self, number):
+        return f'user{number}.{self.seed}@generated.example'
+
+    def amenity_id(self, number):
+        return self._id(1, number)
+
+    def amenity_name(self, number):
+        base = AMENITY_NAMES[number % len(AMENITY_NAMES)].replace('_', ' ')
+        return base if number < len(AMENITY_NAMES) else f'{base} {number // len(AMENITY_NAMES) + 1}'
+
+    def place_id(self, number):
+        return self._id(2, number)
+
+    # --- Rows ---
+    def user_rows(self):
+        for number in range(self.users):
+            yield {
+                'id': self.user_id(number),
+                'first_name': FIRST_NAMES[number % len(FIRST_NAMES)],
+                'last_name': LAST_NAMES[(number // len(FIRST_NAMES)) % len(LAST_NAMES)],
+                'email': self.user_email(number),
+                'password': self.password_hash,
+                'is_admin': False,
+            }
+
+    def amenity_rows(self):
+        for number in range(self.amenities):
+            yield {'id': self.amenity_id(number), 'name': self.amenity_name(number)}
+
+    def place_rows(self):
+        """A GeneratedPlace per place"""
+        rng = random.Random(self.seed)
+        average_reviews = self.reviews / self.places if self.places else 0
+        mu = -REVIEW_SPREAD ** 2 / 2  # lognormal of mean 1
+        rating_weights, rating_total = self._rating_weights, self._rating_weights[-1]
+        review_texts = self._review_texts
+        for number in range(self.places):
+            lat, lng, median_price = rng.choices(self._cities, cum_weights=self._city_weights)[0]
+            rooms = rng.choices((1, 2, 3, 4, 5, 6), cum_weights=self._room_weights)[0]
+            created_at = self.now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+            place_id = self.place_id(number)
+            owner = int(self.hosts * rng.random() ** 2)  # a few hosts own many places
+            place = {
+                'id': place_id,
+                'title': f'{rng.choice(PLACE_ADJECTIVES).capitalize()} {rng.choice(PLACE_KINDS)} '
+                         f'with {rng.choice(PLACE_FEATURES)}',
+                'description': ' '.join(rng.choices(WORDS, k=rng.randint(10, 60))),
+                'price_by_night': round(median_price * (1 + 0.3 * (rooms - 1)) * rng.lognormvariate(0, 0.45), 2),
+                'latitude': round(max(-90.0, min(90.0, lat + rng.gauss(0, CITY_SPREAD_DEGREES))), 6),
+                'longitude': round((lng + rng.gauss(0, CITY_SPREAD_DEGREES) + 180) % 360 - 180, 6),
+                'number_rooms': rooms,
+                'number_bathrooms': max(1, rooms - rng.randint(0, 2)),
+                'max_guests': rooms * 2 - rng.randint(0, 1),
+                'owner_id': self.user_id(owner),
+                'created_at': created_at,
+                'updated_at': created_at,
+            }
+            amenity_numbers = rng.sample(range(self.amenities), min(self.amenities, rng.randint(0, 8)))
+
+            count = min(self.guests, int(average_reviews * rng.lognormvariate(mu, REVIEW_SPREAD) + rng.random()))
+            reviews = []
+            histogram = [0] * 5
+            age = (self.now - created_at).total_seconds()
+            reviewers = [self.hosts + guest for guest in rng.sample(range(self.guests), count)]
+            for reviewer in reviewers:
+                rating = 1 + bisect.bisect(rating_weights, rng.random() * rating_total)
+                histogram[rating - 1] += 1
+                reviewed_at = created_at + timedelta(seconds=rng.random() * age)
+                reviews.append({
+                    'id': uuid4_string(rng.getrandbits(128)),
+                    'text': review_texts[rng.getrandbits(REVIEW_TEXT_BITS)],
+                    'rating': rating,
+                    'user_id': self.user_id(reviewer),
+                    'place_id': place_id,
+                    'created_at': reviewed_at,
+                    'updated_at': reviewed_at,
+                })
+            total = sum(rating * n for rating, n in enumerate(histogram, 1))
+            place.update(review_count=count, rating_sum=total, rating_average=total / count if count else 0.0,
+                         **{f'rating_{rating}': n for rating, n in enumerate(histogram, 1)})
+            yield GeneratedPlace(place, owner, amenity_numbers, reviews, reviewers)
+
+    # --- Bulk importer records (NDJSON) ---
+    def records(self):
+        for user in self.user_rows():
+            yield {'type': 'user', 'first_name': user['first_name'], 'last_name': user['last_name'],
+                   'email': user['email'], 'password_hash': user['password']}
+        for amenity in self.amenity_rows():
+            yield {'type': 'amenity', 'name': amenity['name']}
+        for place, owner, amenity_numbers, reviews, reviewers in self.place_rows():
+            yield {'type': 'place', 'id': place['id'], 'title': place['title'], 'description': place['description'],
+                   'price_by_night': place['price_by_night'], 'latitude': place['latitude'],
+                   'longitude': place['longitude'], 'number_rooms': place['number_rooms'],
+                   'number_bathrooms': place['number_bathrooms'], 'max_guests': place['max_guests'],
+                   'owner_email': self.user_email(owner),
+                   'amenities': [self.amenity_name(number) for number in amenity_numbers]}
+            for review, reviewer in zip(reviews, reviewers):
+                yield {'type': 'review', 'place_id': place['id'], 'rating': review['rating'], 'text': review['text'],
+                       'user_email': self.user_email(reviewer)}
+
+
+class GeneratorReport:
+    def __init__(self):
+        self.created = {'user': 0, 'amenity': 0, 'place': 0, 'place_amenity': 0, 'review': 0}
+
+    def to_dict(self):
+        return {'created': dict(self.created)}
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_database(generator, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Insert the dataset in the application database, one transaction per chunk.
+    :raises ValueError: if this dataset (same seed) was already generated in the database.
+    """
+    from app import db
+    from app.models.user import User
+
+    if db.session.execute(db.select(User.id).where(User.email == generator.user_email(0))).first():
+        raise ValueError(f'A dataset with seed {generator.seed} is already in the database')
+
+    report = GeneratorReport()
+    with _deferred_indexes():
+        _write_rows(generator, chunk_size, progress, report)
+    return report
+
+
+@contextmanager
+def _deferred_indexes():
+    """Drop the secondary indexes of places and reviews while they are empty, and build them after the load"""
+    from app import db
+    from app.models.place import Place
+    from app.models.review import Review
+
+    deferred = []
+    for table in (Place.__table__, Review.__table__):
+        if db.session.execute(db.select(1).select_from(table).limit(1)).first() is None:
+            deferred.extend(table.indexes)
+    connection = db.session.connection()
+    for index in deferred:
+        index.drop(bind=connection)
+    db.session.commit()
+    try:
+        yield
+    finally:
+        db.session.rollback()
+        connection = db.session.connection()
+        for index in deferred:
+            index.create(bind=connection)
+        db.session.commit()
+
+
+def _write_rows(generator, chunk_size, progress, report):
+    from app import db
+    from app.models.amenity import Amenity
+    from app.models.place import Place
+    from app.models.place_amenities import place_amenities
+    from app.models.review import Review
+    from app.models.user import User
+    from app.persistence import search
+    from app.persistence.unit_of_work import unit_of_work
+
+    # Amenity names do not depend on the seed: those already in the database (another seed,
+    # or created through the API) are reused, only the missing ones are inserted
+    amenities = list(generator.amenity_rows())
+    with unit_of_work():
+        existing = {}
+        for rows in _chunks(amenities, 500):  # under the limit of bound parameters of SQLite
+            existing.update(db.session.execute(
+                db.select(Amenity.name, Amenity.id).where(Amenity.name.in_([row['name'] for row in rows]))
+            ).all())
+        missing = [row for row in amenities if row['name'] not in existing]
+        if missing:
+            db.session.execute(Amenity.__table__.insert(), missing)
+    amenity_ids = [existing.get(row['name'], row['id']) for row in amenities]
+    report.created['amenity'] = len(missing)
+    for users in _chunks(generator.user_rows(), chunk_size * 10):
+        with unit_of_work():
+            db.session.execute(User.__table__.insert(), users)
+        report.created['user'] += len(users)
+
+    for chunk in _chunks(generator.place_rows(), chunk_size):
+        places = [generated.row for generated in chunk]
+        links = [{'place_id': generated.row['id'], 'amenity_id': amenity_ids[number]}
+                 for generated in chunk for number in generated.amenities]
+        reviews = [review for generated in chunk for review in generated.reviews]
+        with unit_of_work():
+            db.session.execute(Place.__table__.insert(), places)
+            if links:
+                db.session.execute(place_amenities.insert(), links)
+            if reviews:
+                db.session.execute(Review.__table__.insert(), reviews)
+            # Core inserts: the full-text index is not fed by the ORM events (the R*Tree has triggers)
+            search.index_places(db.session.connection(), [place['id'] for place in places])
+        report.created['place'] += len(places)
+        report.created['place_amenity'] += len(links)
+        report.created['review'] += len(reviews)
+        if progress:
+            progress(report)
+
+
+def write_ndjson(generator, stream, progress=None, every=100_000):
+    """Write the dataset as bulk importer records, one JSON object per line"""
+    report = GeneratorReport()
+    for number, record in enumerate(generator.records(), 1):
+        stream.write(json.dumps(record, separators=(',', ':')))
+        stream.write('\n')
+        report.created[record['type']] += 1
+        if record['type'] == 'place':
+            report.created['place_amenity'] += len(record['amenities'])
+        if progress and number % every == 0:
+            progress(report)
+    return report
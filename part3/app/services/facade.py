@@ -7,14 +7,75 @@ from app.services.repositories.user_repository import UserRepository
 from app.services.repositories.place_repository import PlaceRepository
 from app.services.repositories.review_repository import ReviewRepository
 from app.services.repositories.amenity_repository import AmenityRepository
+from app.services.repositories.revoked_token_repository import RevokedTokenRepository
+from app.persistence.unit_of_work import transactional, unit_of_work
+from app.persistence.cache import CachedRepository
+from app.persistence.replica import primary_reads
+from sqlalchemy.exc import IntegrityError
+
+
+class ReviewAlreadyExistsError(ValueError):
+    """Un utilisateur ne peut laisser qu'une critique par lieu (index unique reviews(user_id, place_id))."""
+
+
+class TokenAlreadyRevokedError(ValueError):
+    """Jeton de rafraîchissement déjà utilisé ou révoqué (clé primaire revoked_tokens.jti)."""
 
 
 class HBnBFacade:
     def __init__(self):
-        self.user_repo = UserRepository()
-        self.place_repo = PlaceRepository()
+        from app import entity_cache
+        self.entity_cache = entity_cache
+        # Lectures par ID servies par le cache d'entités (lieux, utilisateurs et agréments changent peu)
+        self.user_repo = CachedRepository(UserRepository(), entity_cache)
+        self.place_repo = CachedRepository(PlaceRepository(), entity_cache)
         self.review_repo = ReviewRepository()
-        self.amenity_repo = AmenityRepository()
+        self.amenity_repo = CachedRepository(AmenityRepository(), entity_cache)
+        self.revoked_token_repo = RevokedTokenRepository()
+
+    # --- Transactions ---
+    def transaction(self):
+        """
+        Ouvre une unité de travail : les opérations de la façade exécutées dans le bloc
+        sont écrites en un seul flush et un seul commit à la sortie (rollback en cas d'exception).
+        """
+        return unit_of_work()
+
+    def batch(self, batch_size=1000):
+        """
+        Unité de travail pour les traitements en masse : commit toutes les batch_size modifications
+        au lieu d'un commit par opération (ou d'une seule transaction géante).
+        """
+        return unit_of_work(batch_size=batch_size)
+
+    # --- Versions (GET conditionnels : ETag / Last-Modified calculés sans charger les entités) ---
+    def get_user_version(self, user_id):
+        """Date de dernière modification d'un utilisateur, ou None s'il n'existe pas."""
+        return self.user_repo.get_version(user_id)
+
+    def get_users_version(self):
+        """Version de la liste des utilisateurs : (compteur d'écritures de la table, dernière écriture)."""
+        return self.user_repo.get_collection_version()
+
+    def get_amenity_version(self, amenity_id):
+        return self.amenity_repo.get_version(amenity_id)
+
+    def get_amenities_version(self):
+        return self.amenity_repo.get_collection_version()
+
+    def get_place_version(self, place_id):
+        """Dernière modification du lieu, de ses agréments ou de son propriétaire, ou None s'il n'existe pas."""
+        return self.place_repo.get_version(place_id)
+
+    def get_places_version(self):
+        """Version des listes de lieux, qui contiennent aussi les agréments et les propriétaires."""
+        return self.place_repo.get_collection_version(Amenity, User)
+
+    def get_review_version(self, review_id):
+        return self.review_repo.get_version(review_id)
+
+    def get_reviews_version(self):
+        return self.review_repo.get_collection_version()
 
     # --- User operations ---
     def create_user(self, user_data):
@@ -24,16 +85,42 @@ class HBnBFacade:
         :return: L'objet User créé.
         :raises ValueError: Si l'email existe déjà ou les données sont invalides.
         """
+        # Un email déjà pris est refusé avant le hachage : bcrypt est le coût dominant de l'inscription.
+        # _add_user vérifie de nouveau dans la transaction (deux inscriptions simultanées)
+        if self.user_repo.email_exists(user_data.get('email')):
+            raise ValueError("Cet email est déjà enregistré.")
+        if 'password' in user_data:
+            # Hachage avant la transaction : bcrypt n'occupe pas l'écrivain unique (mode coordinateur)
+            from app import password_hasher
+            user_data = dict(user_data, password=password_hasher.hash(user_data['password']))
+        return self._add_user(user_data)
+
+    @transactional
+    def _add_user(self, user_data):
+        """Ajoute l'utilisateur, mot de passe déjà haché."""
         if self.user_repo.get_user_by_email(user_data.get('email')):
             raise ValueError("Cet email est déjà enregistré.")
 
         user = User(**user_data)
-        if 'password' in user_data:
-            user.set_password(user_data['password'])
-            
         self.user_repo.add(user)
         return user
 
+    @transactional(coordinated=False)
+    def authenticate(self, email, password):
+        """
+        Vérifie les identifiants ; si le hachage stocké n'a pas le coût bcrypt configuré,
+        le mot de passe (connu à cet instant seulement) est haché à nouveau.
+        :return: L'objet User, ou None si l'email ou le mot de passe est incorrect.
+        :raises PasswordHasherBusy: Si trop de hachages sont déjà en cours.
+        """
+        user = self.user_repo.get_user_by_email(email)
+        if not user or not user.verify_password(password):
+            return None
+        if user.password_needs_rehash():
+            user.hash_password(password)
+            self.user_repo.update(user.id, {'password': user.password})
+        return user
+
     def get_user(self, user_id):
         """Récupère un utilisateur par ID."""
         return self.user_repo.get(user_id)
@@ -46,6 +133,14 @@ class HBnBFacade:
         """Récupère tous les utilisateurs."""
         return self.user_repo.get_all()
 
+    def has_users(self):
+        """
+        Indique si au moins un utilisateur existe, sans charger la table.
+        :return: True dès qu'un utilisateur a été enregistré (mémorisé ensuite, sans requête).
+        """
+        return self.user_repo.has_any_users()
+
+    @transactional(coordinated=False)
     def update_user(self, user_id, user_data):
         """
         Met à jour un utilisateur par ID.
@@ -63,16 +158,53 @@ class HBnBFacade:
                 raise ValueError("Cet email est déjà enregistré par un autre utilisateur.")
 
         if 'password' in user_data and user_data['password']:
-            user.set_password(user_data['password'])
-            
+            user.hash_password(user_data['password'])
+        # Le hachage est déjà sur l'objet : ne pas le remplacer par le mot de passe en clair
+        user_data = {key: value for key, value in user_data.items() if key != 'password'}
+
         self.user_repo.update(user_id, user_data)
         return self.user_repo.get(user_id)
 
+    @transactional
     def delete_user(self, user_id):
-        """Supprime un utilisateur par ID."""
-        return self.user_repo.delete(user_id)
+        """
+        Supprime un utilisateur par ID, avec ses lieux et ses critiques (cascade) ; les agrégats
+        des lieux qu'il avait notés sont recalculés dans la même transaction.
+        """
+        place_ids = self.review_repo.get_place_ids_by_user(user_id)
+        deleted = self.user_repo.delete(user_id)
+        if place_ids:
+            # Les critiques supprimées par la cascade doivent être écrites avant le recalcul
+            self.user_repo.flush()
+            self.place_repo.recompute_rating_aggregates(place_ids)
+            from app import db
+            self.entity_cache.invalidate_on_commit(db.session(), Place, place_ids)
+        return deleted
+
+    # --- Refresh tokens ---
+    def is_token_revoked(self, jti):
+        """Indique si le jeton de rafraîchissement (par son identifiant jti) a été révoqué."""
+        # Lu sur la base principale : une réplique en retard accepterait un jeton tout juste révoqué
+        with primary_reads():
+            return self.revoked_token_repo.is_revoked(jti)
+
+    @transactional
+    def revoke_token(self, jti, expires_at):
+        """
+        Révoque un jeton de rafraîchissement jusqu'à son expiration ; purge au passage les
+        révocations expirées, pour que la table ne garde que les jetons encore valides.
+        :param jti: Identifiant du jeton (claim 'jti').
+        :param expires_at: Date d'expiration du jeton (claim 'exp'), en UTC naïf.
+        :raises TokenAlreadyRevokedError: Si le jeton était déjà révoqué (rotation concurrente ou rejeu).
+        """
+        self.revoked_token_repo.purge_expired()
+        try:
+            self.revoked_token_repo.revoke(jti, expires_at)
+        except IntegrityError:
+            raise TokenAlreadyRevokedError("Ce jeton de rafraîchissement a déjà été utilisé.")
 
     # --- Amenity operations ---
+    @transactional
     def create_amenity(self, amenity_data):
         """Crée une nouvelle instance Amenity et l'ajoute au dépôt."""
         if 'name' not in amenity_data or not amenity_data['name']:
@@ -86,10 +218,22 @@ class HBnBFacade:
         """Récupère un agrément par ID."""
         return self.amenity_repo.get(amenity_id)
 
+    def get_amenity_by_name(self, name):
+        """Récupère un agrément par nom (contrôle d'unicité de l'API)."""
+        return self.amenity_repo.get_by_attribute('name', name)
+
     def get_all_amenities(self):
         """Récupère tous les agréments."""
         return self.amenity_repo.get_all()
 
+    def prime_amenity_cache(self):
+        """
+        Charge tout le catalogue des agréments (petit, rarement modifié) dans le cache d'entités.
+        :return: Nombre d'agréments mis en cache.
+        """
+        return self.amenity_repo.prime()
+
+    @transactional
     def update_amenity(self, amenity_id, amenity_data):
         """Met à jour un agrément par ID."""
         amenity = self.amenity_repo.get(amenity_id)
@@ -98,11 +242,13 @@ class HBnBFacade:
             return self.amenity_repo.get(amenity_id)
         return None
 
+    @transactional
     def delete_amenity(self, amenity_id):
         """Supprime un agrément par ID."""
         return self.amenity_repo.delete(amenity_id)
 
     # --- Place operations ---
+    @transactional
     def create_place(self, place_data):
         """
         Crée une nouvelle instance Place et l'ajoute au dépôt, en gérant les amenities.
@@ -118,12 +264,14 @@ class HBnBFacade:
         # Extraire amenity_ids du dictionnaire place_data avant de créer l'objet Place
         amenity_ids = place_data.pop('amenity_ids', [])
 
-        user = self.user_repo.get(place_data['user_id'])
+        # user_id désigne le créateur : ce n'est pas une colonne de Place
+        user_id = place_data.pop('user_id')
+        user = self.user_repo.get(user_id)
         if not user:
-            raise ValueError(f"L'utilisateur (créateur) avec l'ID '{place_data['user_id']}' n'existe pas.")
+            raise ValueError(f"L'utilisateur (créateur) avec l'ID '{user_id}' n'existe pas.")
 
         if 'owner_id' not in place_data or place_data['owner_id'] is None:
-            place_data['owner_id'] = place_data['user_id']
+            place_data['owner_id'] = user_id
         else:
             owner = self.user_repo.get(place_data['owner_id'])
             if not owner:
@@ -148,10 +296,57 @@ class HBnBFacade:
         """Récupère un lieu par ID."""
         return self.place_repo.get(place_id)
 
+    def get_place_details(self, place_id):
+        """Récupère un lieu par ID avec son propriétaire, ses agréments et ses critiques déjà chargés."""
+        return self.place_repo.get_with_relations(place_id, 'detail')
+
     def get_all_places(self):
-        """Récupère tous les lieux."""
-        return self.place_repo.get_all()
+        """Récupère tous les lieux (relations chargées en un nombre constant de requêtes)."""
+        return self.place_repo.get_all_with_relations('list')
+
+    def get_places_page(self, limit=50, cursor=None, sort=None, **filters):
+        """
+        Récupère une page de lieux filtrée et triée par la base, paginée par curseur.
+        :param limit: Nombre maximum de lieux à retourner.
+        :param cursor: Curseur opaque renvoyé par la page précédente, ou None pour la première page.
+        :param sort: 'price', 'newest', 'rating' ou None (ordre de création).
+        :param filters: min_price, max_price, min_guests, min_rooms (None = pas de filtre).
+        :return: Tuple (liste de Place, curseur de la page suivante ou None).
+        :raises ValueError: Si le curseur ou le tri est invalide.
+        """
+        spec = self.place_repo.build_spec(sort=sort, **filters)
+        return self.place_repo.get_page(limit, cursor, spec)
 
+    def get_places_in_bbox(self, bbox, limit=50, **filters):
+        """
+        Récupère les lieux situés dans une boîte géographique (index spatial R*Tree).
+        :param bbox: Tuple (min_lng, min_lat, max_lng, max_lat); min_lng > max_lng traverse l'antiméridien.
+        :param limit: Nombre maximum de lieux à retourner.
+        :param filters: Mêmes filtres que get_places_page.
+        :return: Liste de tuples (Place, distance au centre de la boîte en km), du plus proche au plus éloigné.
+        """
+        spec = self.place_repo.build_spec(**filters)
+        return self.place_repo.find_in_bbox(*bbox, limit, spec)
+
+    def get_places_near(self, latitude, longitude, radius_km, limit=50, **filters):
+        """
+        Récupère les lieux situés à moins de radius_km d'un point (distance haversine exacte).
+        :return: Liste de tuples (Place, distance en km), du plus proche au plus éloigné.
+        """
+        spec = self.place_repo.build_spec(**filters)
+        return self.place_repo.find_near(latitude, longitude, radius_km, limit, spec)
+
+    def search_places(self, query, limit=20):
+        """
+        Recherche plein texte dans le titre et la description des lieux (préfixes acceptés).
+        :param query: Texte saisi par l'utilisateur.
+        :param limit: Nombre maximum de résultats.
+        :return: Liste de tuples (Place, score, titre surligné, extrait surligné), du plus pertinent au moins pertinent.
+        :raises ValueError: Si la recherche ne contient aucun mot.
+        """
+        return self.place_repo.search(query, limit)
+
+    @transactional
     def update_place(self, place_id, place_data):
         """
         Met à jour un lieu par ID, en gérant les amenities.
@@ -187,16 +382,18 @@ class HBnBFacade:
                 if not amenity:
                     raise ValueError(f"L'agrément avec l'ID '{amenity_id}' n'existe pas.")
                 current_amenities.append(amenity)
-            place.amenities = current_amenities # Met à jour la relation (remplace les anciennes)
-            self.place_repo.db_session.commit() # Commit la mise à jour des relations
+            place.amenities = current_amenities # Met à jour la relation (remplace les anciennes), commitée avec le reste par l'unité de travail
+            place.save() # Seule la table d'association change : on date quand même la modification du lieu (ETag)
 
-        return self.place_repo.get(place_id) # Récupère le lieu mis à jour pour s'assurer que les relations sont chargées
+        return self.place_repo.get_with_relations(place_id, 'detail') # Récupère le lieu mis à jour avec ses relations chargées
 
+    @transactional
     def delete_place(self, place_id):
         """Supprime un lieu par ID."""
         return self.place_repo.delete(place_id)
 
     # --- Review operations ---
+    @transactional
     def create_review(self, review_data):
         """
         Crée une nouvelle instance Review et l'ajoute au dépôt.
@@ -216,18 +413,45 @@ class HBnBFacade:
         if not place:
             raise ValueError(f"Le lieu avec l'ID '{review_data['place_id']}' n'existe pas.")
 
+        if self.review_repo.exists_for_user_and_place(user.id, place.id):
+            raise ReviewAlreadyExistsError("Vous avez déjà laissé une critique pour ce lieu.")
+
         review = Review(**review_data)
-        self.review_repo.add(review)
+        place.add_rating(review.rating) # Agrégats du lieu mis à jour dans la même transaction
+        try:
+            self.review_repo.add(review)
+            self.review_repo.flush()
+        except IntegrityError:
+            # Deux requêtes concurrentes ont passé la vérification : l'index unique tranche
+            raise ReviewAlreadyExistsError("Vous avez déjà laissé une critique pour ce lieu.")
         return review
 
     def get_review(self, review_id):
         """Récupère une critique par ID."""
         return self.review_repo.get(review_id)
 
+    def get_place_reviews_page(self, place_id, limit=20, cursor=None):
+        """
+        Récupère une page des critiques d'un lieu, les plus récentes d'abord.
+        :param cursor: Curseur opaque renvoyé par la page précédente, ou None pour la première page.
+        :return: Tuple (liste de Review, curseur de la page suivante ou None).
+        :raises ValueError: Si le curseur est invalide.
+        """
+        return self.review_repo.get_page_for_place(place_id, limit, cursor)
+
+    def get_reviews_by_place(self, place_id):
+        """Récupère toutes les critiques d'un lieu (préférer get_place_reviews_page pour l'affichage)."""
+        return self.review_repo.get_by_place(place_id)
+
+    def has_reviewed_place(self, user_id, place_id):
+        """Indique si l'utilisateur a déjà laissé une critique pour ce lieu (lookup indexé)."""
+        return self.review_repo.exists_for_user_and_place(user_id, place_id)
+
     def get_all_reviews(self):
         """Récupère toutes les critiques."""
         return self.review_repo.get_all()
 
+    @transactional
     def update_review(self, review_id, review_data):
         """
         Met à jour une critique par ID.
@@ -239,6 +463,7 @@ class HBnBFacade:
         review = self.review_repo.get(review_id)
         if not review:
             return None
+        old_place_id, old_rating = review.place_id, review.rating
 
         if 'user_id' in review_data and review_data['user_id']:
             user = self.user_repo.get(review_data['user_id'])
@@ -248,10 +473,37 @@ class HBnBFacade:
             place = self.place_repo.get(review_data['place_id'])
             if not place:
                 raise ValueError(f"Le lieu avec l'ID '{review_data['place_id']}' n'existe pas.")
+        new_user_id = review_data.get('user_id') or review.user_id
+        new_place_id = review_data.get('place_id') or review.place_id
+        if (new_user_id, new_place_id) != (review.user_id, review.place_id) and \
+                self.review_repo.exists_for_user_and_place(new_user_id, new_place_id):
+            raise ReviewAlreadyExistsError("Cet utilisateur a déjà laissé une critique pour ce lieu.")
 
         self.review_repo.update(review_id, review_data)
+        place = self.place_repo.get(review.place_id)
+        if review.place_id != old_place_id or review.rating != old_rating:
+            self.place_repo.get(old_place_id).remove_rating(old_rating)
+            place.add_rating(review.rating)
+        # La première page des critiques est servie avec le lieu : sa version (ETag) doit changer
+        place.save()
         return self.review_repo.get(review_id)
 
+    @transactional
     def delete_review(self, review_id):
-        """Supprime une critique par ID."""
+        """Supprime une critique par ID et retire sa note des agrégats du lieu."""
+        review = self.review_repo.get(review_id)
+        if review:
+            self.place_repo.get(review.place_id).remove_rating(review.rating)
         return self.review_repo.delete(review_id)
+
+    def recompute_rating_aggregates(self, place_ids=None):
+        """
+        Recalcule review_count, rating_sum, rating_average et l'histogramme des lieux depuis les critiques.
+        :param place_ids: Lieux à réparer, ou None pour tous.
+        :return: Nombre de lieux ayant au moins une critique.
+        """
+        with unit_of_work():
+            updated = self.place_repo.recompute_rating_aggregates(place_ids)
+        # UPDATE en masse, invisible pour les événements de flush : on vide le cache d'entités après le commit
+        self.entity_cache.clear()
+        return updated
@@ -1,6 +1,233 @@
+import heapq
+from datetime import datetime
+
+from sqlalchemy import and_, bindparam, case, func, literal_column, text, update
+from sqlalchemy.orm import selectinload
+
+from app import db
+from app.models.amenity import Amenity
 from app.models.place import Place
-from app.persistence.repository import SQLAlchemyRepository
+from app.models.place_amenities import place_amenities
+from app.models.review import Review
+from app.models.user import User
+from app.persistence.repository import SQLAlchemyRepository, QuerySpec
+from app.persistence import search as fulltext
+from app.persistence.spatial import (MAX_DISTANCE_KM, bbox_ranges, haversine_km, intersect_ranges, places_rtree,
+                                     radius_bbox, range_contains)
+
+# Tris disponibles pour la liste des lieux : (expression, décroissant), l'id en dernier départage les ex aequo
+PLACE_SORTS = {
+    'price': [(Place.price_by_night, False), (Place.id, False)],
+    'newest': [(Place.created_at, True), (Place.id, True)],
+    'rating': [(Place.rating_average, True), (Place.id, False)],
+}
+
+# Recherche géographique : rayon du premier cercle autour du point, et lecture des candidats par lots
+INITIAL_SEARCH_RADIUS_KM = 1.0
+CANDIDATE_BATCH_SIZE = 1000
+
+# Relations sérialisées par les endpoints des lieux, chargées en une requête chacune
+# (SELECT ... WHERE id IN (...)) au lieu d'une requête par lieu
+PLACE_RELATIONS = [
+    selectinload(Place.owner),
+    selectinload(Place.amenities),
+]
+
+def place_version_statement(place_id):
+    """
+    (updated_at du lieu, dernier updated_at de ses agréments, updated_at de son propriétaire) :
+    la version sérialisée du lieu, qui contient aussi le propriétaire.
+    """
+    amenities_updated_at = (
+        db.select(func.max(Amenity.updated_at))
+        .join(place_amenities, place_amenities.c.amenity_id == Amenity.id)
+        .where(place_amenities.c.place_id == Place.id)
+        .scalar_subquery()
+    )
+    owner_updated_at = db.select(User.updated_at).where(User.id == Place.owner_id).scalar_subquery()
+    return db.select(Place.updated_at, amenities_updated_at, owner_updated_at).where(Place.id == place_id)
+
+def latest(row):
+    """Plus récente des dates d'une ligne de place_version_statement, None si le lieu n'existe pas."""
+    if row is None:
+        return None
+    return max(value for value in row if value is not None)
 
 class PlaceRepository(SQLAlchemyRepository):
+    loading_profiles = {
+        'list': PLACE_RELATIONS,
+        'detail': PLACE_RELATIONS,
+    }
+
     def __init__(self):
         super().__init__(Place)
+
+    def build_spec(self, min_price=None, max_price=None, min_guests=None, min_rooms=None, sort=None):
+        """Traduit les filtres de la liste des lieux en QuerySpec exécutée par la base."""
+        if sort is not None and sort not in PLACE_SORTS:
+            raise ValueError(f"Tri inconnu: '{sort}' (valeurs possibles: {', '.join(PLACE_SORTS)})")
+
+        filters = []
+        if min_price is not None:
+            filters.append(Place.price_by_night >= min_price)
+        if max_price is not None:
+            filters.append(Place.price_by_night <= max_price)
+        if min_guests is not None:
+            filters.append(Place.max_guests >= min_guests)
+        if min_rooms is not None:
+            filters.append(Place.number_rooms >= min_rooms)
+        return QuerySpec(filters=filters, order_by=PLACE_SORTS.get(sort), options=self.loader_options('list'))
+
+    def get_version(self, place_id):
+        """Dernière modification du lieu ou de l'un de ses agréments (sérialisés avec lui), None si absent."""
+        return latest(db.session.execute(place_version_statement(place_id)).first())
+
+    def increment_rating_aggregates(self, ratings_by_place):
+        """
+        Ajoute des notes aux agrégats de plusieurs lieux en un seul executemany (import en masse).
+        :param ratings_by_place: {place_id: liste des notes ajoutées}.
+        """
+        places = Place.__table__
+        rows = []
+        for place_id, ratings in ratings_by_place.items():
+            row = {'b_id': place_id, 'b_count': len(ratings), 'b_sum': sum(ratings)}
+            row.update({f'b_{rating}': ratings.count(rating) for rating in Place.RATINGS})
+            rows.append(row)
+        if not rows:
+            return
+        count = places.c.review_count + bindparam('b_count')
+        total = places.c.rating_sum + bindparam('b_sum')
+        statement = update(places).where(places.c.id == bindparam('b_id')).values(
+            review_count=count,
+            rating_sum=total,
+            rating_average=case((count > 0, total * 1.0 / count), else_=0.0),
+            **{f'rating_{rating}': places.c[f'rating_{rating}'] + bindparam(f'b_{rating}') for rating in Place.RATINGS},
+        )
+        db.session.execute(statement, rows)
+
+    def recompute_rating_aggregates(self, place_ids=None):
+        """
+        Recalcule les agrégats des critiques depuis la table reviews (remplissage initial ou réparation).
+        Un seul passage GROUP BY sur reviews, puis UPDATE ... FROM.
+        :param place_ids: Lieux à recalculer, ou None pour tous. Leur updated_at (et donc leur ETag) change.
+        :return: Nombre de lieux qui ont au moins une critique.
+        """
+        places = Place.__table__
+        stats = db.select(
+            Review.place_id.label('place_id'),
+            func.count().label('count'),
+            func.sum(Review.rating).label('total'),
+            *[func.sum(case((Review.rating == rating, 1), else_=0)).label(f'r{rating}') for rating in Place.RATINGS],
+        ).group_by(Review.place_id)
+        reset = update(places).values(
+            review_count=0, rating_sum=0, rating_average=0.0,
+            **{f'rating_{rating}': 0 for rating in Place.RATINGS},
+        )
+        if place_ids is not None:
+            stats = stats.where(Review.place_id.in_(list(place_ids)))
+            reset = reset.where(places.c.id.in_(list(place_ids))).values(updated_at=datetime.utcnow())
+        stats = stats.subquery()
+        fill = update(places).where(places.c.id == stats.c.place_id).values(
+            review_count=stats.c.count,
+            rating_sum=stats.c.total,
+            rating_average=stats.c.total * 1.0 / stats.c.count,
+            **{f'rating_{rating}': stats.c[f'r{rating}'] for rating in Place.RATINGS},
+        )
+        db.session.execute(reset)
+        return db.session.execute(fill).rowcount
+
+    def find_in_bbox(self, min_lng, min_lat, max_lng, max_lat, limit, spec=None):
+        """Lieux dans la boîte, du plus proche au plus éloigné de son centre: [(Place, distance_km)]."""
+        ranges = bbox_ranges(min_lng, min_lat, max_lng, max_lat)
+        center_lat = (min_lat + max_lat) / 2
+        center_lng = (min_lng + max_lng) / 2 if min_lng <= max_lng else (min_lng + max_lng + 360) / 2
+        if center_lng > 180:
+            center_lng -= 360
+        return self._nearest(ranges, center_lat, center_lng, None, limit, spec)
+
+    def find_near(self, lat, lng, radius_km, limit, spec=None):
+        """Lieux à moins de radius_km du point, du plus proche au plus éloigné: [(Place, distance_km)]."""
+        ranges = bbox_ranges(*radius_bbox(lat, lng, radius_km))
+        return self._nearest(ranges, lat, lng, radius_km, limit, spec)
+
+    def _nearest(self, ranges, lat, lng, radius_km, limit, spec):
+        # Cercle de recherche élargi (x2) tant qu'il contient moins de `limit` lieux : tout lieu à moins
+        # de r km est dans radius_bbox(r), donc les `limit` plus proches du cercle sont les plus proches
+        # de toute la zone. On ne lit que les candidats de ce cercle, pas toute la boîte demandée.
+        spec = spec or QuerySpec()
+        max_radius = radius_km if radius_km is not None else MAX_DISTANCE_KM
+        search_radius = min(INITIAL_SEARCH_RADIUS_KM, max_radius)
+        while True:
+            window = bbox_ranges(*radius_bbox(lat, lng, search_radius))
+            # Toute la zone demandée est lue : les lieux hors du cercle comptent aussi (boîte)
+            covered = search_radius >= max_radius or \
+                all(any(range_contains(w, r) for w in window) for r in ranges)
+            pieces = [piece for r in ranges for w in window for piece in [intersect_ranges(r, w)] if piece]
+            ranked = heapq.nsmallest(limit, self._candidates(pieces, lat, lng, spec,
+                                                             None if covered and radius_km is None else search_radius))
+            if len(ranked) >= limit or covered:
+                break
+            search_radius = min(search_radius * 2, max_radius)
+
+        # Chargement des seuls lieux retenus, dans l'ordre des distances
+        ids = [place_id for _, place_id in ranked]
+        places = {place.id: place for place in
+                  self.model.query.options(*spec.options).filter(Place.id.in_(ids))}
+        return [(places[place_id], distance) for distance, place_id in ranked if place_id in places]
+
+    def _candidates(self, pieces, lat, lng, spec, within_km):
+        """(distance, id) des lieux des plages pieces (à moins de within_km si donné), lus en flux via le R*Tree."""
+        sqlite = db.session.get_bind().dialect.name == 'sqlite'
+        for piece in pieces:
+            # (id, lat, lng) sans hydrater d'objets, une requête par plage : le R*Tree n'indexe pas les OR
+            query = db.session.query(Place.id, Place.latitude, Place.longitude).filter(*spec.filters)
+            if sqlite:
+                query = query.join(places_rtree, places_rtree.c.id == literal_column('places.rowid'))
+                low_lat, high_lat = places_rtree.c.min_lat, places_rtree.c.max_lat
+                low_lng, high_lng = places_rtree.c.min_lng, places_rtree.c.max_lng
+            else:
+                low_lat = high_lat = Place.latitude
+                low_lng = high_lng = Place.longitude
+            query = query.filter(high_lat >= piece[0], low_lat <= piece[1], high_lng >= piece[2], low_lng <= piece[3])
+            for place_id, p_lat, p_lng in query.yield_per(CANDIDATE_BATCH_SIZE):
+                # Raffinement exact : le R*Tree stocke des float 32 bits arrondis vers l'extérieur
+                if not (piece[0] <= p_lat <= piece[1] and piece[2] <= p_lng <= piece[3]):
+                    continue
+                distance = haversine_km(lat, lng, p_lat, p_lng)
+                if within_km is None or distance <= within_km:
+                    yield distance, place_id
+
+    def search(self, query, limit):
+        """
+        Recherche plein texte (FTS5) sur le titre et la description, classée par BM25.
+        :return: Liste de tuples (Place, score, titre surligné, extrait de description surligné) ;
+            titre et extrait sont du HTML échappé, seules les balises <mark> y sont interprétables.
+        """
+        match = fulltext.match_expression(query)
+        if db.session.get_bind().dialect.name != 'sqlite':
+            # Sans FTS5 : simple recherche par sous-chaîne, sans classement ni extrait
+            words = [Place.title.ilike(f'%{word}%') for word in query.split()]
+            return [(place, 0.0, fulltext.render_highlight(place.title), fulltext.render_highlight(place.description))
+                    for place in self.model.query.filter(and_(*words)).limit(limit).all()]
+
+        rows = db.session.execute(text(
+            f"""SELECT places.id,
+                       bm25({fulltext.FTS_TABLE}, :title_weight, :description_weight) AS score,
+                       highlight({fulltext.FTS_TABLE}, 0, :open, :close) AS title_hl,
+                       snippet({fulltext.FTS_TABLE}, 1, :open, :close, '…', 16) AS description_hl
+                FROM {fulltext.FTS_TABLE}
+                JOIN places ON places.rowid = {fulltext.FTS_TABLE}.rowid
+                WHERE {fulltext.FTS_TABLE} MATCH :match
+                ORDER BY score
+                LIMIT :limit"""
+        ).columns(id=Place.id.type), {
+            'match': match, 'limit': limit,
+            'title_weight': fulltext.TITLE_WEIGHT, 'description_weight': fulltext.DESCRIPTION_WEIGHT,
+            'open': fulltext.MATCH_START, 'close': fulltext.MATCH_END,
+        }).all()
+
+        places = {place.id: place for place in self.model.query.filter(Place.id.in_([row.id for row in rows]))}
+        # bm25() est négatif (plus petit = plus pertinent) : on expose un score positif
+        return [(places[row.id], -row.score, fulltext.render_highlight(row.title_hl),
+                 fulltext.render_highlight(row.description_hl)) for row in rows if row.id in places]
+
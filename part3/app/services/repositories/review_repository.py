@@ -1,6 +1,30 @@
+from sqlalchemy import exists
+
+from app import db
 from app.models.review import Review
-from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.repository import SQLAlchemyRepository, QuerySpec
+
+# Critiques d'un lieu, les plus récentes d'abord (index ix_reviews_place_id_created_at)
+REVIEWS_NEWEST_FIRST = [(Review.created_at, True), (Review.id, True)]
 
 class ReviewRepository(SQLAlchemyRepository):
     def __init__(self):
         super().__init__(Review)
+
+    def get_page_for_place(self, place_id, limit, cursor=None):
+        """Une page des critiques d'un lieu : (critiques, curseur suivant ou None)."""
+        spec = QuerySpec(filters=[Review.place_id == place_id], order_by=REVIEWS_NEWEST_FIRST)
+        return self.get_page(limit, cursor, spec)
+
+    def get_by_place(self, place_id):
+        return self.model.query.filter(Review.place_id == place_id).all()
+
+    def exists_for_user_and_place(self, user_id, place_id):
+        """EXISTS sur l'index unique (user_id, place_id) : O(log n), quel que soit le nombre de critiques."""
+        return db.session.execute(
+            db.select(exists().where(Review.user_id == user_id, Review.place_id == place_id))
+        ).scalar()
+
+    def get_place_ids_by_user(self, user_id):
+        """Lieux notés par un utilisateur, lus sur l'index unique (user_id, place_id) sans charger les critiques."""
+        return db.session.execute(db.select(Review.place_id).where(Review.user_id == user_id)).scalars().all()
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from app.models.revoked_token import RevokedToken
+from app.persistence.repository import SQLAlchemyRepository
+
+class RevokedTokenRepository(SQLAlchemyRepository):
+    def __init__(self):
+        super().__init__(RevokedToken)
+
+    def is_revoked(self, jti):
+        # Primary key lookup, no entity hydrated
+        from app import db
+        return db.session.execute(db.select(db.select(RevokedToken.jti).where(RevokedToken.jti == jti).exists())).scalar()
+
+    def revoke(self, jti, expires_at):
+        # The INSERT is the check: a jti revoked twice (two concurrent refreshes) fails on the primary key
+        self.add(RevokedToken(jti=jti, expires_at=expires_at))
+        self.flush()
+
+    def purge_expired(self, now=None):
+        # An expired token is already rejected on its exp claim: its row is no longer needed
+        from app import db
+        result = db.session.execute(db.delete(RevokedToken).where(RevokedToken.expires_at < (now or datetime.utcnow())))
+        return result.rowcount
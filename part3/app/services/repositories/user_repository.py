@@ -1,9 +1,31 @@
+import weakref
+
 from app.models.user import User
 from app.persistence.repository import SQLAlchemyRepository
 
+# Bases (moteurs) qui ont déjà au moins un utilisateur : une fois vrai, ça le reste
+_populated_engines = weakref.WeakSet()
+
 class UserRepository(SQLAlchemyRepository):
     def __init__(self):
         super().__init__(User)
 
     def get_user_by_email(self, email):
         return self.model.query.filter_by(email=email).first()
+
+    def email_exists(self, email):
+        # EXISTS on the unique index of email, without loading the user
+        from app import db
+        return db.session.execute(db.select(db.select(User.id).where(User.email == email).exists())).scalar()
+
+    def has_any_users(self):
+        # Constant cost: one EXISTS probe until the first user shows up, then no query at all.
+        # A database emptied afterwards does not reopen the first-admin bootstrap.
+        from app import db
+        engine = db.engine
+        if engine in _populated_engines:
+            return True
+        if self.exists():
+            _populated_engines.add(engine)
+            return True
+        return False
@@ -0,0 +1,93 @@
+"""Conditional GET support: ETag / Last-Modified validators and 304 responses.
+
+The decorated GET handler receives a version function that computes the
+validators with a cheap query (an updated_at lookup, or the write counter of
+the table for a collection) before anything is loaded or serialized. If
+the client already holds that version the handler is skipped and 304 is
+returned.
+"""
+import hashlib
+from datetime import timezone
+from functools import wraps
+
+from flask import Response, current_app, request
+from werkzeug.http import parse_date, parse_etags
+
+
+class Version:
+    """Validators of a resource: a strong ETag and, for single entities, the Last-Modified date.
+
+    full_path (path?query) defaults to the current Flask request; the ASGI mode passes its own.
+    """
+    def __init__(self, *parts, last_modified=None, full_path=None):
+        full_path = request.full_path if full_path is None else full_path
+        digest = hashlib.sha1(repr((full_path,) + parts).encode('utf-8')).hexdigest()
+        self.etag = digest[:32]
+        self.last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0) if last_modified else None
+
+    def not_modified(self, request_headers=None):
+        """RFC 9110: If-None-Match takes precedence over If-Modified-Since"""
+        if request_headers is None:
+            if_none_match, if_modified_since = request.if_none_match, request.if_modified_since
+        else:
+            if_none_match = parse_etags(request_headers.get('if-none-match'))
+            if_modified_since = parse_date(request_headers.get('if-modified-since'))
+        if if_none_match:
+            return if_none_match.contains_weak(self.etag)
+        if self.last_modified and if_modified_since:
+            return self.last_modified <= if_modified_since
+        return False
+
+    def headers(self, private, max_age=None):
+        if max_age is None:
+            max_age = current_app.config.get('HTTP_CACHE_MAX_AGE', 0)
+        headers = {
+            'ETag': f'"{self.etag}"',
+            # no-cache: the client may store the body but must revalidate (a cheap 304) before reusing it
+            'Cache-Control': f"{'private' if private else 'public'}, "
+                             f"{f'max-age={max_age}' if max_age else 'no-cache'}",
+        }
+        if self.last_modified:
+            headers['Last-Modified'] = self.last_modified.strftime('%a, %d %b %Y %H:%M:%S GMT')
+        return headers
+
+
+def entity_version(updated_at, full_path=None):
+    """Version of a single entity from its updated_at (None: the entity does not exist)"""
+    if updated_at is None:
+        return None
+    return Version(updated_at.isoformat(), last_modified=updated_at, full_path=full_path)
+
+
+def collection_version(*parts, full_path=None):
+    """Version of a list from (table version, last write) tuples; no Last-Modified, shared by every page"""
+    return Version(*parts, full_path=full_path)
+
+
+def conditional_get(version_func, private=False):
+    """
+    Decorate a Resource GET method. version_func is called with the view arguments and
+    returns a Version, or None when the resource does not exist (the handler then
+    answers, typically with a 404). Use private=True for responses that depend on the user.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            version = version_func(**kwargs)
+            if version is None:
+                return f(*args, **kwargs)
+            headers = version.headers(private)
+            if version.not_modified():
+                return Response(status=304, headers=headers)
+
+            result = f(*args, **kwargs)
+            if isinstance(result, tuple):
+                data, status = result[0], result[1] if len(result) > 1 else 200
+                extra = result[2] if len(result) > 2 else {}
+            else:
+                data, status, extra = result, 200, {}
+            if status != 200:
+                return result
+            return data, status, {**headers, **extra}
+        return wrapper
+    return decorator
@@ -0,0 +1,207 @@
+"""Per-request SQL and timing instrumentation.
+
+Every statement sent through a SQLAlchemy engine during a Flask request is
+counted and timed (before/after_cursor_execute). At the end of the request:
+
+* a Server-Timing header reports the database time, the number of queries
+  and the total time spent in the application;
+* the request is added to the histograms of its route (the URL rule, so
+  /api/v1/places/<place_id> is one series), served by GET /api/v1/admin/metrics.
+
+"rows" counts the rows written by INSERT/UPDATE/DELETE (cursor.rowcount) and
+the entities loaded by the ORM. Rows read by Core SELECTs (counts, search,
+spatial queries) are not seen: the DBAPI does not report them.
+
+The histograms are per process: behind gunicorn each worker keeps its own.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Mapper
+
+# Prometheus client defaults for latencies, and a power-of-ten-ish scale for counts
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# (name in the JSON report, Prometheus metric, buckets, help)
+HISTOGRAMS = (
+    ('duration_seconds', 'hbnb_http_request_duration_seconds', SECONDS_BUCKETS,
+     'Time spent handling the request'),
+    ('db_seconds', 'hbnb_http_request_db_seconds', SECONDS_BUCKETS,
+     'Time spent executing SQL statements during the request'),
+    ('queries', 'hbnb_http_request_queries', COUNT_BUCKETS,
+     'SQL statements executed during the request'),
+    ('rows', 'hbnb_http_request_rows', COUNT_BUCKETS,
+     'Rows written by DML statements plus entities loaded by the ORM during the request'),
+)
+
+
+class Histogram:
+    """Cumulative histogram: per-bucket counts, plus the count and sum of the observations"""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """(upper bound, observations <= bound) pairs, ending with ('+Inf', count)"""
+        total, pairs = 0, []
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'buckets': {str(bound): count for bound, count in self.cumulative()},
+        }
+
+
+class RouteStats:
+    """Histograms and status counters of one route"""
+    def __init__(self):
+        self.histograms = {name: Histogram(buckets) for name, _, buckets, _ in HISTOGRAMS}
+        self.statuses = {}
+
+    def observe(self, status, values):
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        for name, value in values.items():
+            self.histograms[name].observe(value)
+
+    def to_dict(self):
+        return {
+            'requests': sum(self.statuses.values()),
+            'status': {str(status): count for status, count in sorted(self.statuses.items())},
+            **{name: histogram.to_dict() for name, histogram in self.histograms.items()},
+        }
+
+
+def histogram_lines(metric, labels, histogram):
+    """Prometheus _bucket/_sum/_count samples of a histogram; labels is 'name="value",...' or ''"""
+    prefix = f'{labels},' if labels else ''
+    lines = [f'{metric}_bucket{{{prefix}le="{bound}"}} {count}' for bound, count in histogram.cumulative()]
+    suffix = f'{{{labels}}}' if labels else ''
+    lines.append(f'{metric}_sum{suffix} {histogram.sum:.6f}')
+    lines.append(f'{metric}_count{suffix} {histogram.count}')
+    return lines
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RequestMetrics:
+    """Flask extension recording SQL statements and timings per request and per route"""
+    _listening = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}
+
+    def init_app(self, app):
+        self.reset()
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        if not RequestMetrics._listening:
+            # Every engine (each app has its own) and every mapper, registered once per process
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            event.listen(Mapper, 'load', self._on_load)
+            RequestMetrics._listening = True
+
+    def reset(self):
+        with self._lock:
+            self.routes = {}
+
+    # SQLAlchemy events: only statements run inside a request are recorded
+
+    @staticmethod
+    def _current():
+        return g.get('_request_metrics') if has_request_context() else None
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # On the execution context, dropped with it: a statement that raises (after_cursor_execute
+        # never fires) leaves nothing behind on the pooled connection
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_metrics_started', None)
+        elapsed = time.perf_counter() - started if started is not None else 0.0
+        current = self._current()
+        if current is not None:
+            current['queries'] += 1
+            current['db_seconds'] += elapsed
+            if context is not None and (context.isinsert or context.isupdate or context.isdelete) \
+                    and cursor.rowcount > 0:
+                current['rows'] += cursor.rowcount
+
+    def _on_load(self, target, context):
+        current = self._current()
+        if current is not None:
+            current['rows'] += 1
+
+    # Flask hooks
+
+    def _before_request(self):
+        g._request_metrics = {'started': time.perf_counter(), 'queries': 0, 'db_seconds': 0.0, 'rows': 0}
+
+    def _after_request(self, response):
+        current = g.pop('_request_metrics', None)
+        if current is None:
+            return response
+        duration = time.perf_counter() - current.pop('started')
+        response.headers.add('Server-Timing', f'db;dur={current["db_seconds"] * 1000:.2f};'
+                                              f'desc="{current["queries"]} queries"')
+        response.headers.add('Server-Timing', f'app;dur={duration * 1000:.2f}')
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        self.observe(request.method, route, response.status_code, dict(current, duration_seconds=duration))
+        return response
+
+    def observe(self, method, route, status, values):
+        """Adds one request to its route: values holds duration_seconds, db_seconds, queries and rows"""
+        with self._lock:
+            stats = self.routes.get((method, route))
+            if stats is None:
+                stats = self.routes[(method, route)] = RouteStats()
+            stats.observe(status, values)
+
+    # Reports
+
+    def to_dict(self):
+        with self._lock:
+            return {f'{method} {route}': stats.to_dict()
+                    for (method, route), stats in sorted(self.routes.items())}
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            routes = sorted(self.routes.items())
+            lines = ['# HELP hbnb_http_requests_total Requests handled, by route and status',
+                     '# TYPE hbnb_http_requests_total counter']
+            for (method, route), stats in routes:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f'hbnb_http_requests_total{{method="{method}",route="{_label(route)}",'
+                                 f'status="{status}"}} {count}')
+            for name, metric, _, help_text in HISTOGRAMS:
+                lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+                for (method, route), stats in routes:
+                    labels = f'method="{method}",route="{_label(route)}"'
+                    lines += histogram_lines(metric, labels, stats.histograms[name])
+        return '\n'.join(lines) + '\n'
+
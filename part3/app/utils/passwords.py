@@ -0,0 +1,149 @@
+"""Password hashing and verification off the request thread.
+
+bcrypt is deliberately slow (about 250 ms at cost 12), so running it inline
+blocks a worker for the whole hash, and a burst of logins starves every
+other endpoint. PasswordHasher sends the work to a bounded process pool, so
+the number of CPU-bound hashes running at once is PASSWORD_HASH_WORKERS
+whatever the number of server threads. Each server process has its own
+pool: with several workers (serve.py) the value is per worker, and
+ProductionConfig divides the cores between them. Jobs in flight are capped as well:
+past PASSWORD_HASH_MAX_PENDING the caller gets PasswordHasherBusy at once
+instead of queueing behind the storm. A job keeps its slot until the pool
+has finished it, even when its caller gave up after PASSWORD_HASH_TIMEOUT
+(also reported as PasswordHasherBusy). hash_many() hashes a batch (bulk
+imports) on every worker at once, outside that per-request cap.
+
+The work factor comes from BCRYPT_LOG_ROUNDS. Stored hashes with another
+cost are still verified, and needs_rehash() tells the login to re-hash them.
+"""
+import atexit
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import bcrypt as _bcrypt
+
+DEFAULT_ROUNDS = 12
+DEFAULT_MAX_PENDING = 64
+DEFAULT_TIMEOUT = 10  # seconds
+
+
+class PasswordHasherBusy(Exception):
+    """Too many hashes already in flight: the request should be retried later"""
+
+
+def _hash(password, rounds):
+    return _bcrypt.hashpw(password.encode('utf-8'), _bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _verify(password, hashed):
+    try:
+        return _bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    except ValueError:
+        # Not a bcrypt hash (e.g. a plain value written directly in the table)
+        return False
+
+
+def hash_rounds(hashed):
+    """Work factor of a bcrypt hash ($2b$12$...), or None if it is not one"""
+    parts = (hashed or '').split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class PasswordHasher:
+    """bcrypt hashing in a bounded process pool, configured like a Flask extension.
+
+    With PASSWORD_HASH_WORKERS = 0 the work runs inline on the calling thread
+    (tests, one-off scripts); the pool is otherwise started on first use.
+    """
+    def __init__(self):
+        self.rounds = DEFAULT_ROUNDS
+        self.workers = 0
+        self.max_pending = DEFAULT_MAX_PENDING
+        self.timeout = DEFAULT_TIMEOUT
+        self._pool = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self.reset_stats()
+        atexit.register(self.shutdown)
+
+    def init_app(self, app):
+        self.shutdown()
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', DEFAULT_ROUNDS)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', DEFAULT_MAX_PENDING)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', DEFAULT_TIMEOUT)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hashed = self.verified = self.rejected = 0
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: never fork a process that may already run server threads
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def _run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHasherBusy('Too many password hashes in progress')
+        try:
+            future = self._executor().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Released when the pool is done with the job, not when its caller stops waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self.rejected += 1
+            raise PasswordHasherBusy('Password hash timed out')
+
+    def hash(self, password):
+        self.hashed += 1
+        return self._run(_hash, password, self.rounds)
+
+    def hash_many(self, passwords):
+        """Hashes of a batch of passwords, in order, computed in parallel by the whole pool"""
+        passwords = list(passwords)
+        self.hashed += len(passwords)
+        if not self.workers:
+            return [_hash(password, self.rounds) for password in passwords]
+        # A few chunks per worker: few round trips, and the workers finish together
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return list(self._executor().map(_hash, passwords, itertools.repeat(self.rounds), chunksize=chunksize))
+
+    def verify(self, password, hashed):
+        self.verified += 1
+        return self._run(_verify, password, hashed)
+
+    def needs_rehash(self, hashed):
+        return hash_rounds(hashed) != self.rounds
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def stats(self):
+        return {
+            'rounds': self.rounds,
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'hashed': self.hashed,
+            'verified': self.verified,
+            'rejected': self.rejected,
+        }
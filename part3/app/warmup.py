@@ -0,0 +1,62 @@
+"""Warm-up of a freshly built app, before it accepts traffic.
+
+Run once by the production launcher (serve.py) in the master process, before
+the workers are forked, so that every worker starts with:
+- the amenity catalog in the entity cache;
+- the SQL of the hot endpoints compiled in SQLAlchemy's statement cache, and
+  the Flask/flask-restx routing and marshalling code paths already imported;
+- the Swagger specification rendered (flask-restx builds it on first access).
+
+The database connections opened on the way are closed at the end: a SQLite
+connection must never be shared between forked processes.
+"""
+import time
+from contextlib import contextmanager
+
+# Endpoints whose queries are compiled by the warm-up ({place_id}: a place of the database)
+HOT_ENDPOINTS = [
+    '/api/v1/places',
+    '/api/v1/places?sort=price',
+    '/api/v1/places?sort=newest',
+    '/api/v1/places?sort=rating',
+    '/api/v1/places/{place_id}',
+    '/api/v1/places/{place_id}/reviews',
+    '/api/v1/amenities/',
+]
+
+
+@contextmanager
+def _timed(timings, step):
+    start = time.perf_counter()
+    yield
+    timings[step] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def warm_up(app):
+    """Warm the app up; returns the duration of each step in ms"""
+    from app import db
+    from app.models.place import Place
+    from app.services import facade
+
+    timings = {}
+    with app.app_context():
+        with _timed(timings, 'amenity_cache_ms'):
+            timings['amenities'] = facade.prime_amenity_cache()
+
+        with _timed(timings, 'hot_queries_ms'):
+            place_id = db.session.execute(db.select(Place.id).limit(1)).scalar()
+            client = app.test_client()
+            # An endpoint that fails (e.g. schema not migrated) is logged by Flask and counted, not fatal
+            timings['failed_endpoints'] = 0
+            for endpoint in HOT_ENDPOINTS:
+                if '{place_id}' in endpoint and place_id is None:
+                    continue
+                if client.get(endpoint.format(place_id=place_id)).status_code >= 500:
+                    timings['failed_endpoints'] += 1
+
+        with _timed(timings, 'swagger_ms'):
+            app.test_client().get('/swagger.json')
+
+        db.session.remove()
+        db.engine.dispose()
+    return timings
@@ -0,0 +1,9 @@
+# Point d'entrée ASGI (mode asynchrone, voir app/asgi.py) :
+#   uvicorn asgi:app --host 0.0.0.0 --port 5000 --limit-concurrency 4096 --backlog 4096
+# Les GET des lieux, critiques et agréments sont servis par des coroutines (aiosqlite) ;
+# les autres requêtes passent par l'application Flask habituelle.
+import os
+
+from app.asgi import create_asgi_app
+
+app = create_asgi_app(os.getenv('HBNB_CONFIG', 'config.DevelopmentConfig'))
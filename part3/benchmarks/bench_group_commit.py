@@ -0,0 +1,144 @@
+"""Write throughput under a burst of review creations: one commit per request vs group commit.
+
+Threads call HBnBFacade.create_review directly (no HTTP), each on a distinct
+(user, place) pair, for --duration seconds per load level. The same run is
+repeated with WRITE_COORDINATOR_ENABLED off (every thread commits its own
+transaction and waits for the SQLite lock) and on (one writer thread commits
+the queued reviews in batches). Each database is a fresh SQLite file with the
+Config pragma profile; --synchronous FULL syncs the WAL on every commit, as
+on a database that must not lose a commit on power loss.
+
+    python benchmarks/bench_group_commit.py --clients 1 4 16 64 --duration 5 --synchronous FULL
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PLACES = 500
+USERS = 400
+
+
+def make_app(database, coordinated, synchronous):
+    from app import create_app
+    from config import Config
+
+    class BenchConfig:
+        SECRET_KEY = 'bench-group-commit-secret-key-0123456789'
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        PASSWORD_HASH_WORKERS = 0
+        BCRYPT_LOG_ROUNDS = 4
+        METRICS_ENABLED = False
+        SQLITE_PRAGMAS = dict(Config.SQLITE_PRAGMAS, synchronous=synchronous)
+        SQLITE_POOL_SIZE = 80
+        WRITE_COORDINATOR_ENABLED = coordinated
+
+    return create_app(BenchConfig)
+
+
+def seed(app):
+    from app import db
+    from app.services.facade import HBnBFacade
+
+    facade = HBnBFacade()
+    with app.app_context():
+        db.create_all()
+        owner = facade.create_user({'first_name': 'Host', 'last_name': 'Bench', 'email': 'host@bench.example',
+                                    'password': 'secret1'})
+        users = [facade.create_user({'first_name': 'Guest', 'last_name': f'{i}',
+                                     'email': f'guest{i}@bench.example', 'password': 'secret1'}).id
+                 for i in range(USERS)]
+        places = [facade.create_place({'title': f'Place {i}', 'price_by_night': 100.0, 'latitude': 45.0,
+                                       'longitude': 5.0, 'number_rooms': 1, 'number_bathrooms': 1,
+                                       'max_guests': 2, 'user_id': owner.id}).id
+                  for i in range(PLACES)]
+        db.session.remove()
+    return users, places
+
+
+def burst(app, users, places, counter, clients, duration):
+    from app import db, write_coordinator
+    from app.services.facade import HBnBFacade
+
+    facade = HBnBFacade()
+    lock = threading.Lock()
+    latencies, errors = [], []
+    stop = time.perf_counter() + duration
+
+    def client():
+        mine = []
+        with app.app_context():
+            while time.perf_counter() < stop:
+                with lock:
+                    n = next(counter)
+                data = {'text': 'Bench review', 'rating': 1 + n % 5,
+                        'user_id': users[n // len(places)], 'place_id': places[n % len(places)]}
+                start = time.perf_counter()
+                try:
+                    facade.create_review(data)
+                except Exception as error:
+                    errors.append(type(error).__name__)
+                    continue
+                finally:
+                    db.session.remove()
+                mine.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(mine)
+
+    write_coordinator.reset_stats()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    result = {
+        'clients': clients,
+        'writes_per_sec': round(len(latencies) / duration, 1),
+        'p50_ms': round(statistics.median(latencies), 2) if latencies else None,
+        'p99_ms': round(latencies[max(0, int(len(latencies) * 0.99) - 1)], 2) if latencies else None,
+        'errors': {name: errors.count(name) for name in set(errors)},
+    }
+    if write_coordinator.enabled:
+        stats = write_coordinator.stats()
+        result['commits'] = stats['batches']
+        result['mean_batch'] = round(stats['jobs'] / stats['batches'], 1) if stats['batches'] else None
+    return result
+
+
+def run_mode(coordinated, args):
+    from app import db, write_coordinator
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, 'bench.db'), coordinated, args.synchronous)
+        users, places = seed(app)
+        counter = iter(range(len(users) * len(places)))  # (user, place) pairs never reviewed yet
+        for clients in args.clients:
+            results.append(burst(app, users, places, counter, clients, args.duration))
+        write_coordinator.shutdown()
+        with app.app_context():
+            db.engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16, 64], help='load levels (threads)')
+    parser.add_argument('--duration', type=float, default=5, help='seconds per load level')
+    parser.add_argument('--synchronous', choices=['NORMAL', 'FULL'], default='NORMAL')
+    args = parser.parse_args()
+    report = {'cores': os.cpu_count(), 'synchronous': args.synchronous,
+              'direct': run_mode(False, args), 'group_commit': run_mode(True, args)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Index size and join speed with text ids (36 characters) vs binary ids (16-byte UUIDs).
+
+Both databases are copies of the same generated dataset (see dataset.py); the
+binary one is converted in place with the migration's convert_ids(), then both
+are vacuumed so that their sizes compare. Sizes come from the dbstat virtual
+table, per table and index. The joins are timed on raw sqlite3 connections
+(no ORM), median of --repeat runs:
+
+    detail    the reviews of a place with their authors, for --samples places
+    reviews   every review joined to its place and to the place owner
+    amenities every place/amenity link joined to both sides
+
+    python benchmarks/bench_ids.py --size 100k --repeat 5
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dataset import SIZES, dataset_copy  # noqa: E402
+
+QUERIES = {
+    'reviews': """SELECT count(*), sum(length(users.email)) FROM reviews
+                  JOIN places ON places.id = reviews.place_id
+                  JOIN users ON users.id = places.owner_id""",
+    'amenities': """SELECT count(*), sum(length(amenities.name)) FROM place_amenities
+                    JOIN places ON places.id = place_amenities.place_id
+                    JOIN amenities ON amenities.id = place_amenities.amenity_id""",
+}
+DETAIL = """SELECT reviews.rating, users.first_name FROM reviews
+            JOIN users ON users.id = reviews.user_id
+            WHERE reviews.place_id = ? ORDER BY reviews.created_at DESC"""
+
+
+def convert(path, storage):
+    from sqlalchemy import create_engine
+    from app.persistence.uuid_type import convert_ids
+    engine = create_engine(f'sqlite:///{path}')
+    with engine.begin() as connection:
+        convert_ids(connection, storage)
+    engine.dispose()
+
+
+def sizes(conn):
+    rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall()
+    objects = dict(conn.execute("SELECT name, type FROM sqlite_master").fetchall())
+    tables = {name: size for name, size in rows if objects.get(name) == 'table'}
+    indexes = {name: size for name, size in rows if objects.get(name) == 'index' or name.startswith('sqlite_autoindex')}
+    page_count, page_size = conn.execute('PRAGMA page_count').fetchone()[0], conn.execute('PRAGMA page_size').fetchone()[0]
+    return {
+        'file_mb': round(page_count * page_size / 2 ** 20, 2),
+        'tables_mb': round(sum(tables.values()) / 2 ** 20, 2),
+        'indexes_mb': round(sum(indexes.values()) / 2 ** 20, 2),
+        'largest_indexes_kb': {name: size // 1024 for name, size in
+                               sorted(indexes.items(), key=lambda item: -item[1])[:6]},
+    }
+
+
+def timed(run, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        durations.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(durations), 2)
+
+
+def measure(path, samples, repeat):
+    conn = sqlite3.connect(path)
+    conn.execute('VACUUM')
+    conn.execute('PRAGMA cache_size = -64000')
+    place_ids = [row[0] for row in conn.execute('SELECT id FROM places ORDER BY rowid LIMIT ?', (samples,))]
+    result = {'id_type': conn.execute('SELECT typeof(id) FROM places LIMIT 1').fetchone()[0], **sizes(conn)}
+    timings = {}
+    for name, query in QUERIES.items():
+        conn.execute(query).fetchall()  # warm the page cache
+        timings[f'{name}_ms'] = timed(lambda query=query: conn.execute(query).fetchall(), repeat)
+
+    def details():
+        for place_id in place_ids:
+            conn.execute(DETAIL, (place_id,)).fetchall()
+    details()
+    timings[f'detail_x{len(place_ids)}_ms'] = timed(details, repeat)
+    result['joins'] = timings
+    conn.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', choices=SIZES, default='100k')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--samples', type=int, default=2000, help='places of the detail query')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for storage in ('text', 'binary'):
+            path = dataset_copy(SIZES[args.size], args.seed, os.path.join(tmp, f'{storage}.db'))
+            if storage == 'binary':
+                convert(path, storage)
+            results[storage] = measure(path, args.samples, args.repeat)
+    print(json.dumps({'size': args.size, 'sqlite': sqlite3.sqlite_version, **results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
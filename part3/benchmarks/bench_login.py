@@ -0,0 +1,109 @@
+"""Login throughput: bcrypt inline on the request thread vs the hashing pool.
+
+Runs POST /api/v1/auth/login from concurrent client threads against a
+temporary SQLite database and reports logins/sec, logins/sec per core, and
+the latency of a cheap GET /api/v1/amenities/ issued during the storm.
+
+    python benchmarks/bench_login.py --threads 16 --logins 200 --rounds 12
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db, password_hasher  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+def make_config(database, rounds, workers):
+    class BenchConfig:
+        SECRET_KEY = JWT_SECRET_KEY = 'bench-secret-key-bench-secret-key'
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        BCRYPT_LOG_ROUNDS = rounds
+        PASSWORD_HASH_WORKERS = workers
+        PASSWORD_HASH_MAX_PENDING = 1024
+        ENTITY_CACHE_MAX_SIZE = 0
+    return BenchConfig
+
+
+def run(rounds, workers, threads, logins):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(make_config(os.path.join(tmp, 'bench.db'), rounds, workers))
+        with app.app_context():
+            db.create_all()
+            user = User(first_name='Bench', last_name='User', email='bench@example.com', password='-')
+            user.hash_password('secret1')
+            db.session.add(user)
+            db.session.commit()
+            # Start the pool before timing
+            password_hasher.verify('secret1', user.password)
+
+        client = app.test_client()
+        remaining = iter(range(logins))
+        lock = threading.Lock()
+        failures = []
+        side_latencies = []
+        done = threading.Event()
+
+        def login_worker():
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                response = client.post('/api/v1/auth/login', json={'email': 'bench@example.com', 'password': 'secret1'})
+                if response.status_code != 200:
+                    failures.append(response.status_code)
+
+        def side_traffic():
+            while not done.is_set():
+                start = time.perf_counter()
+                client.get('/api/v1/amenities/')
+                side_latencies.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.01)
+
+        side = threading.Thread(target=side_traffic)
+        workers_threads = [threading.Thread(target=login_worker) for _ in range(threads)]
+        start = time.perf_counter()
+        side.start()
+        for thread in workers_threads:
+            thread.start()
+        for thread in workers_threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        done.set()
+        side.join()
+        password_hasher.shutdown()
+
+    cores = workers or 1
+    rate = (logins - len(failures)) / elapsed
+    return {
+        'mode': f'pool x{workers}' if workers else 'inline',
+        'logins_per_sec': round(rate, 1),
+        'logins_per_sec_per_core': round(rate / cores, 1),
+        'failures': len(failures),
+        'side_get_p50_ms': round(statistics.median(side_latencies), 1) if side_latencies else None,
+        'side_get_max_ms': round(max(side_latencies), 1) if side_latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost')
+    parser.add_argument('--threads', type=int, default=16, help='concurrent login clients')
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='pool size to compare with inline')
+    args = parser.parse_args()
+
+    print(f'bcrypt cost {args.rounds}, {args.threads} client threads, {args.logins} logins, {os.cpu_count()} cores')
+    for workers in (0, args.workers):
+        print(run(args.rounds, workers, args.threads, args.logins))
+
+
+if __name__ == '__main__':
+    main()
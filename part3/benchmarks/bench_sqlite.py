@@ -0,0 +1,167 @@
+"""Mixed read/write throughput of serve.py with the default SQLite settings vs the tuned profile.
+
+Both runs start the production launcher on a fresh copy of the same
+generated dataset (see dataset.py) and replay, from concurrent keep-alive
+clients, place pages and place details mixed with price updates by the
+place owners (PUT /api/v1/places/<id>). Only the SQLite settings differ,
+through the environment read by config.py:
+
+    default   rollback journal, synchronous=FULL, 2 MB page cache, no mmap,
+              the 5 s busy timeout of Python's sqlite3, no retry
+    tuned     the Config profile: WAL, synchronous=NORMAL, 64 MB page
+              cache, 256 MB mmap, busy retries, one pooled connection per thread
+    replica   tuned, with the reads routed to a snapshot of the database
+              refreshed every second (app/persistence/replica.py)
+
+    python benchmarks/bench_sqlite.py --size 1k --workers 2 --threads 4 --clients 16 --write-ratio 0.2
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_wsgi import wait_for  # noqa: E402
+from dataset import SIZES, dataset_copy  # noqa: E402
+
+PORT = 5058
+SECRET_KEY = 'bench-sqlite-secret-key-long-enough-for-hs256'
+
+PROFILES = {
+    'default': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_BUSY_TIMEOUT_MS': '5000',
+                'SQLITE_CACHE_SIZE_KB': '2000', 'SQLITE_MMAP_SIZE': '0', 'SQLITE_BUSY_RETRIES': '0',
+                'SQLITE_POOL_SIZE': '5'},
+    'tuned': {},
+    # {tmp}: the temporary directory of the run
+    'replica': {'REPLICA_SNAPSHOT_PATH': '{tmp}/replica.db', 'REPLICA_REFRESH_SECONDS': '1'},
+}
+
+
+def owner_tokens(database, samples):
+    """(place id, access token of its owner) for the first places of the dataset, by id"""
+    with sqlite3.connect(database) as conn:
+        places = conn.execute('SELECT id, owner_id FROM places ORDER BY id LIMIT ?', (samples,)).fetchall()
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+
+    class TokenConfig:
+        SECRET_KEY = SECRET_KEY
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+        PASSWORD_HASH_WORKERS = 0
+
+    with create_app(TokenConfig).app_context():
+        return [(place_id, create_access_token(identity=owner_id)) for place_id, owner_id in places]
+
+
+def load(places, clients, duration, write_ratio):
+    latencies = {'read': [], 'write': []}
+    errors = {}
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def client(number):
+        rng = random.Random(number)
+        conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=60)
+        mine = {'read': [], 'write': []}
+        while time.perf_counter() < stop:
+            place_id, token = rng.choice(places)
+            if rng.random() < write_ratio:
+                kind, method, path = 'write', 'PUT', f'/api/v1/places/{place_id}'
+                body = json.dumps({'price_by_night': round(rng.uniform(20, 400), 2)})
+                headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+            else:
+                kind, method, body, headers = 'read', 'GET', None, {}
+                path = f'/api/v1/places/{place_id}' if rng.random() < 0.7 else '/api/v1/places?limit=20'
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                status = 'connection'
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=60)
+            if status == 200:
+                mine[kind].append((time.perf_counter() - start) * 1000)
+            else:
+                with lock:
+                    errors[f'{kind} {status}'] = errors.get(f'{kind} {status}', 0) + 1
+        with lock:
+            for key in mine:
+                latencies[key].extend(mine[key])
+
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    result = {'requests_per_sec': round(sum(map(len, latencies.values())) / duration, 1)}
+    for kind, values in latencies.items():
+        values.sort()
+        result[kind] = {
+            'per_sec': round(len(values) / duration, 1),
+            'p50_ms': round(statistics.median(values), 2) if values else None,
+            'p99_ms': round(values[max(0, int(len(values) * 0.99) - 1)], 2) if values else None,
+        }
+    result['errors'] = errors
+    return result
+
+
+def run_profile(name, args, tmp):
+    database = dataset_copy(SIZES[args.size], args.seed, os.path.join(tmp, f'{name}.db'))
+    places = owner_tokens(database, args.samples)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}', SECRET_KEY=SECRET_KEY,
+               PASSWORD_HASH_WORKERS='0',
+               **{key: value.format(tmp=tmp) for key, value in PROFILES[name].items()})
+    process = subprocess.Popen([sys.executable, 'serve.py', '--bind', f'127.0.0.1:{PORT}',
+                                '--workers', str(args.workers), '--threads', str(args.threads)],
+                               cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=True)
+    try:
+        if not wait_for(PORT):
+            return {'profile': name, 'error': 'did not start'}
+        with sqlite3.connect(database) as conn:
+            journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        return {'profile': name, 'journal_mode': journal_mode,
+                **load(places, args.clients, args.duration, args.write_ratio)}
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', choices=SIZES, default='1k')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--samples', type=int, default=200, help='places read and updated')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent keep-alive clients')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load per profile')
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--profile', choices=PROFILES, action='append', help='default: all')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [run_profile(name, args, tmp) for name in args.profile or PROFILES]
+    print(json.dumps({'cores': os.cpu_count(), 'size': args.size, 'clients': args.clients,
+                      'workers': args.workers, 'threads': args.threads, 'write_ratio': args.write_ratio,
+                      'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""Throughput of the development server (run.py) vs the production launcher (serve.py).
+
+Seeds a temporary SQLite database, starts each server on it, then replays a
+mix of read endpoints from concurrent keep-alive clients and reports
+requests/sec, p50/p99 latency and the latency of the very first request
+(what the warm-up removes).
+
+    python benchmarks/bench_wsgi.py --clients 16 --duration 10 --workers 4 --threads 4
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEV_PORT = 5000  # run.py does not take a port
+PROD_PORT = 5057
+
+
+def seed(database, places, reviews_per_place):
+    from app import create_app, db
+    from app.services.bulk_import import BulkImporter
+
+    class SeedConfig:
+        SECRET_KEY = 'bench'
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        PASSWORD_HASH_WORKERS = 0
+        BCRYPT_LOG_ROUNDS = 4
+
+    def records():
+        for i in range(10):
+            yield {'type': 'amenity', 'name': f'Amenity {i}'}
+        for i in range(reviews_per_place + 1):
+            yield {'type': 'user', 'first_name': 'Bench', 'last_name': f'User{i}',
+                   'email': f'user{i}@bench.example', 'password': 'secret1'}
+        for i in range(places):
+            yield {'type': 'place', 'title': f'Place {i}', 'description': 'Benchmark place',
+                   'price_by_night': random.uniform(20, 400), 'latitude': random.uniform(-60, 60),
+                   'longitude': random.uniform(-170, 170), 'number_rooms': 2, 'number_bathrooms': 1,
+                   'max_guests': 4, 'owner_email': 'user0@bench.example',
+                   'amenities': [f'Amenity {i % 10}']}
+
+    app = create_app(SeedConfig)
+    with app.app_context():
+        db.create_all()
+        BulkImporter().run(enumerate(records(), 1))
+        from app.models.place import Place
+        return [place_id for (place_id,) in db.session.execute(db.select(Place.id).limit(200))]
+
+
+def wait_for(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def load(port, paths, clients, duration):
+    latencies, errors = [], []
+    stop = time.perf_counter() + duration
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        mine = []
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', random.choice(paths))
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors.append(response.status)
+            except (OSError, http.client.HTTPException):
+                errors.append('connection')
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            mine.append((time.perf_counter() - start) * 1000)
+        latencies.extend(mine)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return {
+        'requests_per_sec': round(len(latencies) / duration, 1),
+        'p50_ms': round(statistics.median(latencies), 2) if latencies else None,
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1], 2) if latencies else None,
+        'errors': len(errors),
+    }
+
+
+def run_server(name, command, port, env, paths, args):
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=True)
+    try:
+        if not wait_for(port):
+            return {'server': name, 'error': 'did not start'}
+        # First request: pays the lazy imports, query compilation and Swagger rendering unless warmed up
+        first_start = time.perf_counter()
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.request('GET', paths[1])
+        conn.getresponse().read()
+        first_ms = round((time.perf_counter() - first_start) * 1000, 1)
+        result = {'server': name, 'startup_s': round(first_start - started, 2), 'first_request_ms': first_ms}
+        result.update(load(port, paths, args.clients, args.duration))
+        return result
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--places', type=int, default=2000)
+    parser.add_argument('--reviews-per-place', type=int, default=0)
+    parser.add_argument('--clients', type=int, default=16, help='concurrent keep-alive clients')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load per server')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'bench.db')
+        place_ids = seed(database, args.places, args.reviews_per_place)
+        paths = ['/api/v1/places', '/api/v1/places?sort=price', '/api/v1/amenities/'] + \
+                [f'/api/v1/places/{place_id}' for place_id in place_ids[:50]]
+        env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}', PASSWORD_HASH_WORKERS='0')
+
+        results = [
+            run_server('run.py (Werkzeug, debug)', [sys.executable, 'run.py'], DEV_PORT, env, paths, args),
+            run_server(f'serve.py ({args.workers} workers x {args.threads} threads)',
+                       [sys.executable, 'serve.py', '--bind', f'127.0.0.1:{PROD_PORT}',
+                        '--workers', str(args.workers), '--threads', str(args.threads)],
+                       PROD_PORT, env, paths, args),
+        ]
+    print(json.dumps({'cores': os.cpu_count(), 'places': args.places, 'clients': args.clients,
+                      'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
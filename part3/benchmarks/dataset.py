@@ -0,0 +1,48 @@
+"""Reproducible datasets for the benchmarks: 1k, 100k or 1M places.
+
+The rows come from app/services/data_generator.py (flask hbnb generate), with
+its default fan-out: a host per 10 places, a guest per 4 places, 0 to 8
+amenities and on average 3 reviews per place, heavily skewed. The same
+(size, seed) always gives the same database. It is built once and cached in
+benchmarks/.data/; every run works on a copy.
+"""
+import os
+import shutil
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data')
+SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+
+def seed_database(path, places, seed=42):
+    """Generate the dataset into a new SQLite file; returns the GeneratorReport"""
+    from app import create_app, db, password_hasher
+    from app.services.data_generator import DataGenerator, write_database
+
+    class SeedConfig:
+        SECRET_KEY = 'dataset'
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        PASSWORD_HASH_WORKERS = 0
+        BCRYPT_LOG_ROUNDS = 4  # dataset users never log in: the benchmark creates its own accounts
+
+    app = create_app(SeedConfig)
+    with app.app_context():
+        db.create_all()
+        report = write_database(DataGenerator(places, password_hasher.hash('dataset'), seed=seed))
+        db.session.remove()
+        db.engine.dispose()
+    return report
+
+
+def dataset_copy(places, seed, destination):
+    """Copy the cached dataset (built on first use) to destination, a database the run may modify"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    cached = os.path.join(DATA_DIR, f'generated-{places}-seed-{seed}.db')
+    if not os.path.exists(cached):
+        partial = cached + '.partial'
+        if os.path.exists(partial):
+            os.remove(partial)
+        seed_database(partial, places, seed)
+        os.replace(partial, cached)
+    shutil.copyfile(cached, destination)
+    return destination
@@ -0,0 +1,432 @@
+"""Endpoint benchmark suite over a reproducible seeded dataset.
+
+Every route of places, reviews, users, amenities and auth is replayed against
+a copy of a seeded database (see dataset.py), through either driver:
+
+    client   Flask test client: the app alone, no sockets
+    http     Werkzeug server on a local port, one keep-alive http.client
+             connection: adds parsing, headers and socket IO
+
+Both run in this process, so the SQL statements of each request are counted
+with an engine event. For each scenario the report gives p50/p95/p99
+latency, queries per request and the peak RSS of the process so far.
+
+    python benchmarks/suite.py --size 1k --driver client --save-baseline benchmarks/baselines/1k-client.json
+    python benchmarks/suite.py --size 1k --driver client --baseline benchmarks/baselines/1k-client.json
+
+Every distinct statement is also planned with EXPLAIN QUERY PLAN after the
+run (app/persistence/index_advisor.py): each scenario lists the tables it
+reads with a full scan, and the report ends with the indexes that would avoid
+them. --index-migration writes those indexes as a new Alembic revision in
+migrations/versions.
+
+With --baseline the run fails (exit status 1) when a scenario is slower than
+the baseline beyond --tolerance (on p50 by default, see --metric), runs more
+queries per request, or scans a table its baseline did not. The tail percentiles of a few dozen requests move
+a lot on a shared machine: gate on them only on a quiet, dedicated one.
+A full scan in a list scenario (the paginated, filtered, spatial and
+full-text lists of places, the reviews of a place) fails every run, with or
+without --baseline, and is never saved as a baseline: those lists must be
+served from an index at any size.
+Whole-table routes (GET /reviews/, GET /users/) are skipped above 100k
+places: they return every row by design and would only measure JSON
+serialization of a huge list.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dataset import SIZES, dataset_copy  # noqa: E402
+
+PASSWORD = 'bench-password'
+UNBOUNDED_LIMIT = 100_000
+MIN_DELTA_MS = 2.0  # below this, a latency difference is noise whatever the tolerance
+
+
+class Scenario:
+    """One route: request(i) returns (method, path, json body, token) for iteration i"""
+    def __init__(self, name, request, status=200, unbounded=False, listing=False, collect=None):
+        self.name = name
+        self.request = request
+        self.status = status
+        self.unbounded = unbounded
+        self.listing = listing  # paginated list: must be served from indexes, never a full scan
+        self.collect = collect  # list receiving the ids created by the scenario
+
+
+class ClientDriver:
+    name = 'client'
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+    def close(self):
+        pass
+
+
+class HTTPDriver:
+    name = 'http'
+
+    def __init__(self, app):
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class KeepAliveHandler(WSGIRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self.server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=KeepAliveHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.connection = http.client.HTTPConnection('127.0.0.1', self.server.server_port, timeout=60)
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        self.connection.request(method, path, body=payload, headers=headers)
+        response = self.connection.getresponse()
+        raw = response.read()
+        try:
+            return response.status, json.loads(raw) if raw else None
+        except ValueError:
+            return response.status, None
+
+    def close(self):
+        self.connection.close()
+        self.server.shutdown()
+
+
+DRIVERS = {'client': ClientDriver, 'http': HTTPDriver}
+
+
+def create_bench_app(database, bcrypt_rounds):
+    from app import create_app
+
+    class BenchConfig:
+        SECRET_KEY = 'benchmark-suite-secret-key-0123456789'
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        BCRYPT_LOG_ROUNDS = bcrypt_rounds
+        PASSWORD_HASH_WORKERS = 0  # hashing cost stays inside the measured request
+
+    return create_app(BenchConfig)
+
+
+class Fixtures:
+    """Accounts, tokens and id samples the scenarios refer to, created untimed before the run"""
+    def __init__(self, app, needed):
+        from flask_jwt_extended import create_access_token, create_refresh_token
+        from app import db
+        from app.models.amenity import Amenity
+        from app.models.place import Place
+        from app.models.review import Review
+        from app.models.user import User
+        from app.services import facade
+
+        with app.app_context():
+            def account(name, is_admin=False):
+                user = facade.create_user({'first_name': 'Bench', 'last_name': name, 'email': f'{name}@bench.example',
+                                           'password': PASSWORD, 'is_admin': is_admin})
+                claims = {'is_admin': is_admin}
+                return user.id, create_access_token(identity=user.id, additional_claims=claims)
+
+            self.admin_id, self.admin = account('admin', is_admin=True)
+            self.host_id, self.host = account('host')
+            # The guest has no review in the dataset: it can review any sampled place once
+            self.guest_id, self.guest = account('guest')
+            self.guest_email = 'guest@bench.example'
+            self.refresh = create_refresh_token(identity=self.guest_id, additional_claims={'is_admin': False})
+            self.logout_tokens = [create_refresh_token(identity=self.guest_id, additional_claims={'is_admin': False})
+                                  for _ in range(needed)]
+
+            def sample(column, *where):
+                # Dataset rows only: the accounts above get random ids that would make runs differ
+                statement = db.select(column).where(*where).order_by(column).limit(needed)
+                return [value for (value,) in db.session.execute(statement)]
+
+            self.place_ids = sample(Place.id)
+            self.review_ids = sample(Review.id)
+            self.user_ids = sample(User.id, User.email.not_like('%@bench.example'))
+            self.amenity_ids = sample(Amenity.id)
+            if len(self.place_ids) < needed:
+                raise SystemExit(f'The dataset has fewer places than the {needed} iterations')
+            db.session.remove()
+
+        self.created = {'place': [], 'review': [], 'user': [], 'amenity': []}
+
+
+def place_body(i):
+    return {'title': f'Bench place {i}', 'description': 'Created by the benchmark suite', 'number_rooms': 2,
+            'number_bathrooms': 1, 'max_guests': 4, 'price_by_night': 80.0 + i,
+            'latitude': 48.85, 'longitude': 2.35}
+
+
+def scenarios(f):
+    """Every route, in an order where each write finds what it needs (PUT/DELETE reuse the POSTed ids)"""
+    def rotate(ids):
+        return lambda i: ids[i % len(ids)]
+
+    place, review, user, amenity = (rotate(f.place_ids), rotate(f.review_ids),
+                                    rotate(f.user_ids), rotate(f.amenity_ids))
+    created = f.created
+
+    def refresh(i):
+        return 'POST', '/api/v1/auth/refresh', None, f.refresh
+
+    return [
+        # --- places ---
+        Scenario('GET /places', lambda i: ('GET', '/api/v1/places', None, None), listing=True),
+        Scenario('GET /places?sort=price', lambda i: ('GET', '/api/v1/places?sort=price', None, None), listing=True),
+        Scenario('GET /places?sort=rating&min_guests', lambda i: ('GET', '/api/v1/places?sort=rating&min_guests=4', None, None), listing=True),
+        Scenario('GET /places?min_price&max_price', lambda i: ('GET', '/api/v1/places?min_price=50&max_price=150', None, None), listing=True),
+        Scenario('GET /places?bbox', lambda i: ('GET', '/api/v1/places?bbox=2.25,48.80,2.45,48.90', None, None), listing=True),
+        Scenario('GET /places?near', lambda i: ('GET', '/api/v1/places?near=48.8566,2.3522&radius_km=5', None, None), listing=True),
+        Scenario('GET /places/search', lambda i: ('GET', '/api/v1/places/search?q=garden%20view', None, None), listing=True),
+        Scenario('GET /places/<id>', lambda i: ('GET', f'/api/v1/places/{place(i)}', None, None)),
+        Scenario('GET /places/<id>/reviews', lambda i: ('GET', f'/api/v1/places/{place(i)}/reviews', None, None),
+                 listing=True),
+        Scenario('POST /places', lambda i: ('POST', '/api/v1/places', place_body(i), f.host), 201, collect=created['place']),
+        Scenario('PUT /places/<id>', lambda i: ('PUT', f"/api/v1/places/{created['place'][i]}", place_body(i + 1), f.host)),
+        Scenario('DELETE /places/<id>', lambda i: ('DELETE', f"/api/v1/places/{created['place'][i]}", None, f.host), 204),
+        # --- reviews ---
+        Scenario('POST /reviews', lambda i: ('POST', '/api/v1/reviews/', {'text': 'Great stay', 'rating': 5, 'place_id': f.place_ids[i]},
+                                             f.guest), 201, collect=created['review']),
+        Scenario('GET /reviews', lambda i: ('GET', '/api/v1/reviews/', None, None), unbounded=True),
+        Scenario('GET /reviews/<id>', lambda i: ('GET', f'/api/v1/reviews/{review(i)}', None, None)),
+        Scenario('PUT /reviews/<id>', lambda i: ('PUT', f"/api/v1/reviews/{created['review'][i]}",
+                                                 {'text': 'Still great', 'rating': 4, 'place_id': f.place_ids[i]}, f.guest)),
+        Scenario('DELETE /reviews/<id>', lambda i: ('DELETE', f"/api/v1/reviews/{created['review'][i]}", None, f.guest), 204),
+        # --- users ---
+        Scenario('POST /users', lambda i: ('POST', '/api/v1/users/', {'first_name': 'New', 'last_name': f'User{i}',
+                                                                    'email': f'new{i}@bench.example', 'password': PASSWORD},
+                                           None), 201, collect=created['user']),
+        Scenario('GET /users', lambda i: ('GET', '/api/v1/users/', None, f.admin), unbounded=True),
+        Scenario('GET /users/<id>', lambda i: ('GET', f'/api/v1/users/{user(i)}', None, f.admin)),
+        Scenario('PUT /users/<id>', lambda i: ('PUT', f'/api/v1/users/{f.host_id}', {'first_name': 'Bench', 'last_name': f'host{i}',
+                                                                                   'email': 'host@bench.example', 'password': PASSWORD},
+                                               f.host)),
+        Scenario('DELETE /users/<id>', lambda i: ('DELETE', f"/api/v1/users/{created['user'][i]}", None, f.admin), 204),
+        # --- amenities ---
+        Scenario('POST /amenities', lambda i: ('POST', '/api/v1/amenities/', {'name': f'Bench amenity {i}'}, f.admin), 201,
+                 collect=created['amenity']),
+        Scenario('GET /amenities', lambda i: ('GET', '/api/v1/amenities/', None, None)),
+        Scenario('GET /amenities/<id>', lambda i: ('GET', f'/api/v1/amenities/{amenity(i)}', None, None)),
+        Scenario('PUT /amenities/<id>', lambda i: ('PUT', f"/api/v1/amenities/{created['amenity'][i]}", {'name': f'Renamed amenity {i}'},
+                                                   f.admin)),
+        Scenario('DELETE /amenities/<id>', lambda i: ('DELETE', f"/api/v1/amenities/{created['amenity'][i]}", None, f.admin), 204),
+        # --- auth ---
+        Scenario('POST /auth/login', lambda i: ('POST', '/api/v1/auth/login', {'email': f.guest_email, 'password': PASSWORD}, None)),
+        Scenario('GET /auth/protected', lambda i: ('GET', '/api/v1/auth/protected', None, f.guest)),
+        Scenario('POST /auth/refresh', refresh),
+        Scenario('POST /auth/logout', lambda i: ('POST', '/api/v1/auth/logout', None, f.logout_tokens[i]), 204),
+    ]
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)  # bytes on macOS, KiB elsewhere
+
+
+def run_scenario(scenario, driver, counter, fixtures, warmup, iterations):
+    latencies, queries = [], []
+    for i in range(warmup + iterations):
+        method, path, body, token = scenario.request(i)
+        before = counter['queries']
+        start = time.perf_counter()
+        status, payload = driver.request(method, path, body, token)
+        elapsed = (time.perf_counter() - start) * 1000
+        if status != scenario.status:
+            raise RuntimeError(f'{scenario.name}: expected {scenario.status}, got {status} {payload}')
+        if scenario.collect is not None:
+            scenario.collect.append(payload['id'])
+        if scenario.name == 'POST /auth/refresh':
+            fixtures.refresh = payload['refresh_token']  # rotation: the next call needs the new token
+        if i >= warmup:
+            latencies.append(elapsed)
+            queries.append(counter['queries'] - before)
+    latencies.sort()
+    return {
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'queries_per_request': round(statistics.mean(queries), 2),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def advise(engine, recorder, report):
+    """Full scans per scenario, and the indexes that would avoid them"""
+    from app.persistence.index_advisor import IndexAdvisor
+    with engine.connect() as connection:
+        advisor = IndexAdvisor(connection)
+        scans = advisor.scans(recorder.statements.values())
+        suggestions, _ = advisor.suggest(scans)
+    for name, result in report['scenarios'].items():
+        result['full_scans'] = sorted({scan.table for scan in scans if name in scan.scopes})
+    report['index_advice'] = [{'index': suggestion.name, 'table': suggestion.table,
+                               'columns': list(suggestion.columns), 'reasons': suggestion.reasons}
+                              for suggestion in suggestions]
+    return suggestions
+
+
+def run(args):
+    from sqlalchemy import event
+    from app import db
+    from app.persistence.index_advisor import StatementRecorder, write_migration
+
+    places = SIZES[args.size]
+    needed = args.warmup + args.iterations
+    report = {'size': args.size, 'places': places, 'seed': args.seed, 'driver': args.driver,
+              'iterations': args.iterations, 'bcrypt_rounds': args.bcrypt_rounds,
+              'python': platform.python_version(), 'cores': os.cpu_count(), 'scenarios': {}, 'skipped': {}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = dataset_copy(places, args.seed, os.path.join(tmp, 'bench.db'))
+        app = create_bench_app(database, args.bcrypt_rounds)
+        fixtures = Fixtures(app, needed)
+
+        counter = {'queries': 0}
+
+        def count(*_):
+            counter['queries'] += 1
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', count)
+        recorder = StatementRecorder().listen(engine)
+
+        driver = DRIVERS[args.driver](app)
+        try:
+            for scenario in scenarios(fixtures):
+                if args.only and not any(word in scenario.name for word in args.only):
+                    continue
+                if scenario.unbounded and places > UNBOUNDED_LIMIT:
+                    report['skipped'][scenario.name] = f'returns every row, skipped above {UNBOUNDED_LIMIT} places'
+                    continue
+                recorder.scope = scenario.name
+                result = run_scenario(scenario, driver, counter, fixtures, args.warmup, args.iterations)
+                result['listing'] = scenario.listing
+                report['scenarios'][scenario.name] = result
+                if not args.quiet:
+                    print(f"{scenario.name:<40} p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  "
+                          f"p99 {result['p99_ms']:>8} ms  {result['queries_per_request']:>5} q/req", file=sys.stderr)
+            recorder.remove()
+            suggestions = advise(engine, recorder, report)
+            if not args.quiet:
+                for suggestion in suggestions:
+                    print(f"INDEX {suggestion.name} ({', '.join(suggestion.columns)}): "
+                          f"{'; '.join(suggestion.reasons)}", file=sys.stderr)
+            if args.index_migration and suggestions:
+                path = write_migration(os.path.join(ROOT, 'migrations'), suggestions)
+                print(f'Migration written to {path}', file=sys.stderr)
+        finally:
+            driver.close()
+            recorder.remove()
+            event.remove(engine, 'before_cursor_execute', count)
+            engine.dispose()
+    report['peak_rss_mb'] = peak_rss_mb()
+    return report
+
+
+def listing_scans(report):
+    """Full scans in the plans of list scenarios: a failure whatever the baseline says"""
+    return [f"{name}: full scan of {table} in a list scenario"
+            for name, result in report['scenarios'].items() if result.get('listing')
+            for table in result.get('full_scans', ())]
+
+
+def compare(report, baseline, tolerance, metric='p50_ms'):
+    """Regressions of report against baseline: latency beyond tolerance, more queries per request, new full scans"""
+    regressions = []
+    for name, base in baseline['scenarios'].items():
+        current = report['scenarios'].get(name)
+        if current is None:
+            continue
+        if current[metric] > base[metric] * (1 + tolerance) and current[metric] - base[metric] > MIN_DELTA_MS:
+            regressions.append(f"{name}: {metric[:3]} {current[metric]} ms > {base[metric]} ms + {tolerance:.0%}")
+        if current['queries_per_request'] > base['queries_per_request']:
+            regressions.append(f"{name}: {current['queries_per_request']} queries/request "
+                               f"> {base['queries_per_request']} in the baseline")
+        if 'full_scans' in base:
+            for table in sorted(set(current.get('full_scans', ())) - set(base['full_scans'])):
+                regressions.append(f"{name}: full scan of {table}, not in the baseline plan")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', choices=SIZES, default='1k', help='places in the seeded dataset')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--driver', choices=DRIVERS, default='client')
+    parser.add_argument('--iterations', type=int, default=50, help='measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=5, help='unmeasured requests per scenario')
+    parser.add_argument('--bcrypt-rounds', type=int, default=12, help='cost of the hashes made during the run')
+    parser.add_argument('--only', nargs='*', help='run the scenarios whose name contains one of these words')
+    parser.add_argument('--output', help='write the JSON report to this file (default: stdout)')
+    parser.add_argument('--save-baseline', metavar='FILE', help='write the report as the new baseline')
+    parser.add_argument('--baseline', metavar='FILE', help='compare with this baseline, exit 1 on regression')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed slowdown (0.5 = 50%%)')
+    parser.add_argument('--metric', choices=('p50', 'p95', 'p99'), default='p50', help='latency compared with the baseline')
+    parser.add_argument('--index-migration', action='store_true',
+                        help='write the suggested indexes as an Alembic revision in migrations/versions')
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    scans = listing_scans(report)
+    for line in scans:
+        print(f'REGRESSION {line}', file=sys.stderr)
+    # A plan with a full scan in a list scenario is never recorded as the reference
+    for path in filter(None, (args.output, None if scans else args.save_baseline)):
+        with open(path, 'w') as f:
+            f.write(text + '\n')
+    if not args.output:
+        print(text)
+    if scans:
+        return 1
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        keys = ('size', 'driver', 'bcrypt_rounds')
+        if [baseline[key] for key in keys] != [report[key] for key in keys]:
+            print(f"The baseline was measured with other settings: {', '.join(f'{key}={baseline[key]}' for key in keys)}",
+                  file=sys.stderr)
+            return 2
+        regressions = compare(report, baseline, args.tolerance, f'{args.metric}_ms')
+        for line in regressions:
+            print(f'REGRESSION {line}', file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regression against {args.baseline}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
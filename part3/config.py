@@ -1,15 +1,82 @@
 import os
+from datetime import timedelta
+
+def password_hash_workers(wsgi_workers):
+    """
+    Taille du pool de hachage de chaque worker WSGI : chaque processus démarre le sien, les cœurs
+    sont donc partagés entre les workers. PASSWORD_HASH_WORKERS (par worker) l'emporte s'il est défini.
+    """
+    if os.getenv('PASSWORD_HASH_WORKERS'):
+        return int(os.getenv('PASSWORD_HASH_WORKERS'))
+    return max(1, (os.cpu_count() or 1) // wsgi_workers)
 
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///hbnb.db'
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///hbnb.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     DEBUG = False
+    # Profil SQLite (app/persistence/sqlite_profile.py) : WAL, pragmas par connexion, pool, reprises si occupée
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KB', 64000)),
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'temp_store': 'MEMORY',
+    }
+    SQLITE_POOL_SIZE = int(os.getenv('SQLITE_POOL_SIZE', 5))
+    SQLITE_BUSY_RETRIES = int(os.getenv('SQLITE_BUSY_RETRIES', 5))
+    SQLITE_BUSY_BACKOFF = float(os.getenv('SQLITE_BUSY_BACKOFF', 0.05))
+    # Mode écrivain unique (app/persistence/write_coordinator.py) : mutations de la façade groupées en un commit
+    WRITE_COORDINATOR_ENABLED = os.getenv('WRITE_COORDINATOR_ENABLED', '0') == '1'
+    WRITE_COORDINATOR_MAX_BATCH = int(os.getenv('WRITE_COORDINATOR_MAX_BATCH', 100))
+    WRITE_COORDINATOR_MAX_DELAY = float(os.getenv('WRITE_COORDINATOR_MAX_DELAY', 0))
+    # Réplique de lecture (app/persistence/replica.py) : URI en lecture seule (ex.
+    # sqlite:///file:/chemin/hbnb.db?mode=ro&uri=true), ou instantané de la base copié
+    # toutes les REPLICA_REFRESH_SECONDS secondes ; aucune des deux = tout sur la base principale
+    SQLALCHEMY_REPLICA_URI = os.getenv('DATABASE_REPLICA_URL')
+    REPLICA_SNAPSHOT_PATH = os.getenv('REPLICA_SNAPSHOT_PATH')
+    REPLICA_REFRESH_SECONDS = float(os.getenv('REPLICA_REFRESH_SECONDS', 5))
+    # Stockage des identifiants (app/persistence/uuid_type.py) : 'text' (36 caractères) ou
+    # 'binary' (UUID sur 16 octets) ; une base existante se convertit par la migration f2b8d4a6c913
+    ID_STORAGE = os.getenv('ID_STORAGE', 'text')
+    # Cache d'entités en mémoire (app/persistence/cache.py) ; 0 le désactive
+    ENTITY_CACHE_MAX_SIZE = int(os.getenv('ENTITY_CACHE_MAX_SIZE', 1024))
+    ENTITY_CACHE_TTL = int(os.getenv('ENTITY_CACHE_TTL', 300))
+    # Cache-Control des GET : 0 = no-cache (revalidation par ETag à chaque requête), sinon max-age en secondes
+    HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', 0))
+    # Coût bcrypt (2^n itérations) ; les hachages d'un autre coût sont refaits à la connexion
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    # Hachage dans un pool de processus (app/utils/passwords.py) ; 0 = sur le thread de la requête
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 64))
+    # Compteurs SQL et durées par requête (en-tête Server-Timing, GET /api/v1/admin/metrics)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') != '0'
+    # Jeton d'accès court, renouvelé par POST /api/v1/auth/refresh sans revérifier le mot de passe
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 15 * 60)))
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv('JWT_REFRESH_TOKEN_EXPIRES', 30 * 24 * 3600)))
 
 class DevelopmentConfig(Config):
     DEBUG = True
 
+class ProductionConfig(Config):
+    # Serveur de production (serve.py) : plusieurs processus, chacun avec ses threads
+    WSGI_WORKERS = int(os.getenv('WSGI_WORKERS', 2 * (os.cpu_count() or 1) + 1))
+    WSGI_THREADS = int(os.getenv('WSGI_THREADS', 4))
+    # Une connexion SQLite ouverte par thread du worker
+    SQLITE_POOL_SIZE = int(os.getenv('SQLITE_POOL_SIZE', WSGI_THREADS))
+    # Un pool de hachage par worker : cpu_count chacun donnerait ~2n² processus bcrypt
+    PASSWORD_HASH_WORKERS = password_hash_workers(WSGI_WORKERS)
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_WORKERS = 0
+
 config = {
     'development': DevelopmentConfig,
+    'testing': TestingConfig,
+    'production': ProductionConfig,
     'default': DevelopmentConfig
 }
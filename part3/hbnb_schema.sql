@@ -115,6 +115,9 @@ CREATE INDEX idx_reviews_place ON reviews(place_id);
 -- Index on amenity name for faster searches
 CREATE INDEX idx_amenities_name ON amenities(name);
 
+-- Index on amenity_id: the primary key of place_amenities starts with place_id
+CREATE INDEX idx_place_amenities_amenity ON place_amenities(amenity_id);
+
 -- ================================================
 -- 4. CRUD OPERATIONS TESTING
 -- ================================================
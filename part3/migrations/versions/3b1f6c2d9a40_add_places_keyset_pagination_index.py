@@ -0,0 +1,24 @@
+"""Add places (created_at, id) index for keyset pagination
+
+Revision ID: 3b1f6c2d9a40
+Revises: 0e73775c44ef
+Create Date: 2026-10-18 09:12:04.318227
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b1f6c2d9a40'
+down_revision = '0e73775c44ef'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_places_created_at_id', 'places', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_places_created_at_id', table_name='places')
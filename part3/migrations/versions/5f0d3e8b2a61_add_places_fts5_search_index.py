@@ -0,0 +1,33 @@
+"""Add places FTS5 full-text search index
+
+Revision ID: 5f0d3e8b2a61
+Revises: d41a9b6e7c12
+Create Date: 2026-10-18 16:22:13.480551
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.persistence import search
+
+
+# revision identifiers, used by Alembic.
+revision = '5f0d3e8b2a61'
+down_revision = 'd41a9b6e7c12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 virtual table, then backfill from the existing places (SQLite only)
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in search.CREATE_STATEMENTS + search.rebuild_statements():
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in search.DROP_STATEMENTS:
+        op.execute(statement)
@@ -0,0 +1,31 @@
+"""Add indexes suggested by the index advisor
+
+Generated by app/persistence/index_advisor.py from the query plans of a
+benchmark run (python benchmarks/suite.py --index-migration):
+
+ix_place_amenities_amenity_id: full scan, 6 executions in DELETE /amenities/<id>; foreign key to amenities
+ix_places_owner_id: full scan, 6 executions in DELETE /users/<id>; foreign key to users
+
+Revision ID: 6ec643b4f7e6
+Revises: f2b8d4a6c913
+Create Date: 2026-10-18 08:18:43.211745
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6ec643b4f7e6'
+down_revision = 'f2b8d4a6c913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_place_amenities_amenity_id', 'place_amenities', ['amenity_id'], unique=False)
+    op.create_index('ix_places_owner_id', 'places', ['owner_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_places_owner_id', table_name='places')
+    op.drop_index('ix_place_amenities_amenity_id', table_name='place_amenities')
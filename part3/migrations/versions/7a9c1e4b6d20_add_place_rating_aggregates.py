@@ -0,0 +1,56 @@
+"""Add place rating aggregates
+
+Denormalized review_count, rating_sum, rating_average and a 1-5 histogram on
+places, backfilled from the reviews table, plus the index behind sort=rating.
+
+Revision ID: 7a9c1e4b6d20
+Revises: 5f0d3e8b2a61
+Create Date: 2026-10-18 15:02:41.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a9c1e4b6d20'
+down_revision = '5f0d3e8b2a61'
+branch_labels = None
+depends_on = None
+
+RATINGS = range(1, 6)
+
+
+def upgrade():
+    with op.batch_alter_table('places', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('review_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('rating_average', sa.Float(), nullable=False, server_default='0'))
+        for rating in RATINGS:
+            batch_op.add_column(sa.Column(f'rating_{rating}', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill: one GROUP BY pass over reviews
+    histogram = ', '.join(f'SUM(rating = {rating}) AS r{rating}' for rating in RATINGS)
+    op.execute(f"""
+        UPDATE places SET
+            review_count = stats.count,
+            rating_sum = stats.total,
+            rating_average = stats.total * 1.0 / stats.count,
+            {', '.join(f'rating_{rating} = stats.r{rating}' for rating in RATINGS)}
+        FROM (SELECT place_id, COUNT(*) AS count, SUM(rating) AS total, {histogram}
+              FROM reviews GROUP BY place_id) AS stats
+        WHERE places.id = stats.place_id
+    """)
+
+    op.create_index('ix_places_rating_average_id', 'places', [sa.text('rating_average DESC'), 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_places_rating_average_id', table_name='places')
+    # Plain ALTER TABLE ... DROP COLUMN (SQLite >= 3.35): a batch copy of the table would lose
+    # the R*Tree triggers and renumber the rowids the spatial and full-text indexes are keyed on
+    for rating in reversed(RATINGS):
+        op.drop_column('places', f'rating_{rating}')
+    op.drop_column('places', 'rating_average')
+    op.drop_column('places', 'rating_sum')
+    op.drop_column('places', 'review_count')
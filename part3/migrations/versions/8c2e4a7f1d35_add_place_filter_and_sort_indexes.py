@@ -0,0 +1,42 @@
+"""Add place filter and sort indexes
+
+Also brings the places table in line with the Place model (price renamed to
+price_by_night, room/bathroom/guest columns) so the indexed columns exist.
+
+Revision ID: 8c2e4a7f1d35
+Revises: 3b1f6c2d9a40
+Create Date: 2026-10-18 11:40:27.905113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2e4a7f1d35'
+down_revision = '3b1f6c2d9a40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {col['name'] for col in sa.inspect(op.get_bind()).get_columns('places')}
+    with op.batch_alter_table('places', schema=None) as batch_op:
+        if 'price' in columns and 'price_by_night' not in columns:
+            batch_op.alter_column('price', new_column_name='price_by_night')
+        if 'number_rooms' not in columns:
+            batch_op.add_column(sa.Column('number_rooms', sa.Integer(), nullable=False, server_default='0'))
+        if 'number_bathrooms' not in columns:
+            batch_op.add_column(sa.Column('number_bathrooms', sa.Integer(), nullable=False, server_default='0'))
+        if 'max_guests' not in columns:
+            batch_op.add_column(sa.Column('max_guests', sa.Integer(), nullable=False, server_default='1'))
+
+    op.create_index('ix_places_price_by_night_id', 'places', ['price_by_night', 'id'], unique=False)
+    op.create_index('ix_places_max_guests', 'places', ['max_guests'], unique=False)
+    op.create_index('ix_places_number_rooms', 'places', ['number_rooms'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_places_number_rooms', table_name='places')
+    op.drop_index('ix_places_max_guests', table_name='places')
+    op.drop_index('ix_places_price_by_night_id', table_name='places')
@@ -0,0 +1,39 @@
+"""Add table_versions table
+
+Write counter per table, bumped in the transaction of every write: the ETag
+of a list is read by primary key instead of count(*) and max(updated_at) over
+the whole table. The existing tables start at version 1.
+
+Revision ID: 9d3b7f2c5e18
+Revises: 6ec643b4f7e6
+Create Date: 2026-10-18 10:12:37.504219
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3b7f2c5e18'
+down_revision = '6ec643b4f7e6'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ['amenities', 'place_amenities', 'places', 'reviews', 'users']
+
+
+def upgrade():
+    table_versions = op.create_table('table_versions',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    now = datetime.utcnow()
+    op.bulk_insert(table_versions, [{'table_name': name, 'version': 1, 'updated_at': now} for name in VERSIONED_TABLES])
+
+
+def downgrade():
+    op.drop_table('table_versions')
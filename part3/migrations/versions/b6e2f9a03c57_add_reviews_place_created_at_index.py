@@ -0,0 +1,27 @@
+"""Add reviews (place_id, created_at, id) index
+
+Backs GET /api/v1/places/<id>/reviews: the reviews of one place, newest
+first, paginated by cursor.
+
+Revision ID: b6e2f9a03c57
+Revises: 7a9c1e4b6d20
+Create Date: 2026-10-18 16:21:09.554810
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e2f9a03c57'
+down_revision = '7a9c1e4b6d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_reviews_place_id_created_at', 'reviews', ['place_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_reviews_place_id_created_at', table_name='reviews')
@@ -0,0 +1,34 @@
+"""Add revoked_tokens table
+
+Revocation store of the refresh tokens (rotation on POST /api/v1/auth/refresh,
+POST /api/v1/auth/logout). A row only lives until the token expires; the
+expires_at index keeps the purge a range delete.
+
+Revision ID: c3f7a1d9e264
+Revises: e8d4c2b71f90
+Create Date: 2026-10-18 21:05:42.118307
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f7a1d9e264'
+down_revision = 'e8d4c2b71f90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('revoked_tokens',
+    sa.Column('jti', sa.String(length=36), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('jti')
+    )
+    op.create_index('ix_revoked_tokens_expires_at', 'revoked_tokens', ['expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_revoked_tokens_expires_at', table_name='revoked_tokens')
+    op.drop_table('revoked_tokens')
@@ -0,0 +1,33 @@
+"""Add places R*Tree spatial index
+
+Revision ID: d41a9b6e7c12
+Revises: 8c2e4a7f1d35
+Create Date: 2026-10-18 14:05:51.662390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.persistence import spatial
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41a9b6e7c12'
+down_revision = '8c2e4a7f1d35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Virtual table + sync triggers, then backfill from the existing places (SQLite only)
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in spatial.CREATE_STATEMENTS + spatial.rebuild_statements():
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in spatial.DROP_STATEMENTS:
+        op.execute(statement)
@@ -0,0 +1,54 @@
+"""Add unique index on reviews (user_id, place_id)
+
+One review per user and place, enforced by the database. Duplicates left by
+the old check-then-insert race are removed first (the earliest review of
+each pair is kept) and the rating aggregates of the affected places are
+recomputed.
+
+Revision ID: e8d4c2b71f90
+Revises: b6e2f9a03c57
+Create Date: 2026-10-18 17:03:44.120935
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8d4c2b71f90'
+down_revision = 'b6e2f9a03c57'
+branch_labels = None
+depends_on = None
+
+RATINGS = range(1, 6)
+
+
+def upgrade():
+    bind = op.get_bind()
+    duplicated_places = [row[0] for row in bind.execute(sa.text(
+        "SELECT DISTINCT place_id FROM reviews GROUP BY user_id, place_id HAVING COUNT(*) > 1"
+    ))]
+    if duplicated_places:
+        op.execute("""
+            DELETE FROM reviews WHERE rowid NOT IN (
+                SELECT MIN(rowid) FROM reviews GROUP BY user_id, place_id
+            )
+        """)
+        histogram = ', '.join(f'SUM(rating = {rating}) AS r{rating}' for rating in RATINGS)
+        update = sa.text(f"""
+            UPDATE places SET
+                review_count = stats.count,
+                rating_sum = stats.total,
+                rating_average = stats.total * 1.0 / stats.count,
+                {', '.join(f'rating_{rating} = stats.r{rating}' for rating in RATINGS)}
+            FROM (SELECT place_id, COUNT(*) AS count, SUM(rating) AS total, {histogram}
+                  FROM reviews WHERE place_id IN :place_ids GROUP BY place_id) AS stats
+            WHERE places.id = stats.place_id
+        """).bindparams(sa.bindparam('place_ids', expanding=True))
+        bind.execute(update, {'place_ids': duplicated_places})
+
+    op.create_index('uq_reviews_user_id_place_id', 'reviews', ['user_id', 'place_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_reviews_user_id_place_id', table_name='reviews')
@@ -0,0 +1,40 @@
+"""Convert ids to 16-byte binary UUIDs (ID_STORAGE=binary)
+
+Rewrites every id and every foreign key to an id (users, amenities, places,
+reviews, place_amenities) from its 36-character text to the 16 bytes of the
+UUID, in place: SQLite stores a BLOB in a VARCHAR column as is, so the tables
+are not copied, and their rowids, the R*Tree triggers and the spatial and
+full-text indexes keyed on them stay as they are. With ID_STORAGE=text the
+upgrade changes nothing. The downgrade turns binary ids back into text.
+
+To convert a database already at this revision: flask db downgrade c3f7a1d9e264,
+then flask db upgrade with ID_STORAGE=binary.
+
+Revision ID: f2b8d4a6c913
+Revises: c3f7a1d9e264
+Create Date: 2026-10-18 23:12:09.604518
+
+"""
+from alembic import op
+
+from app.persistence.uuid_type import convert_ids, id_storage
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8d4a6c913'
+down_revision = 'c3f7a1d9e264'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if id_storage() != 'binary':
+        return
+    if op.get_bind().dialect.name != 'sqlite':
+        raise NotImplementedError('Ids are converted to binary in place on SQLite only')
+    convert_ids(op.get_bind(), 'binary')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        convert_ids(op.get_bind(), 'text')
@@ -0,0 +1,79 @@
+# Dans holbertonschool-hbnb/part3/serve.py
+#
+# Lanceur de production (run.py reste le serveur de développement Werkzeug) :
+#   python serve.py --bind 0.0.0.0:5000 --workers 4 --threads 4
+#
+# L'application est construite une seule fois dans le processus maître (modèles,
+# namespaces et extensions importés), chauffée (app/warmup.py), puis gunicorn
+# crée les workers par fork : ils démarrent prêts, sans premier appel lent.
+
+import argparse
+import logging
+import os
+
+from gunicorn.app.base import BaseApplication
+from werkzeug.utils import import_string
+
+from app import create_app, db, read_replica
+from app.warmup import warm_up
+from config import password_hash_workers
+
+logger = logging.getLogger('hbnb.serve')
+
+
+class HBnBServer(BaseApplication):
+    def __init__(self, config_class, options):
+        self.config_class = config_class
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # Appelé une seule fois dans le maître (preload_app) avant les forks
+        app = create_app(self.config_class)
+        timings = warm_up(app)
+        logger.warning('Warm-up done: %s', timings)
+        return app
+
+
+def post_fork(server, worker):
+    # Chaque worker ouvre ses propres connexions (jamais de connexion SQLite héritée du maître)
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose()
+    if read_replica.engine is not None:
+        read_replica.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HBnB production server (gunicorn, preloaded and warmed up)')
+    parser.add_argument('--config', default=os.getenv('HBNB_CONFIG', 'config.ProductionConfig'))
+    parser.add_argument('--bind', default=os.getenv('WSGI_BIND', '0.0.0.0:5000'))
+    parser.add_argument('--workers', type=int, help='Worker processes (default: WSGI_WORKERS of the config)')
+    parser.add_argument('--threads', type=int, help='Threads per worker (default: WSGI_THREADS of the config)')
+    args = parser.parse_args()
+
+    config_class = import_string(args.config)
+    workers = args.workers or getattr(config_class, 'WSGI_WORKERS', 1)
+    if args.workers:
+        # Le pool de hachage de chaque worker suit le nombre de workers réellement lancés
+        config_class = type(config_class.__name__, (config_class,),
+                            {'PASSWORD_HASH_WORKERS': password_hash_workers(workers)})
+    options = {
+        'bind': args.bind,
+        'workers': workers,
+        'threads': args.threads or getattr(config_class, 'WSGI_THREADS', 1),
+        'worker_class': 'gthread',
+        'preload_app': True,
+        'post_fork': post_fork,
+        'keepalive': 5,
+        'accesslog': None,
+    }
+    HBnBServer(config_class, options).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+import unittest
+from app import create_app, db
+
+
+class AppTestCase(unittest.TestCase):
+    """Application on a fresh in-memory database, with its context pushed for the whole test"""
+    config = 'config.TestingConfig'
+
+    def setUp(self):
+        self.app = create_app(self.config)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def make_user(self, email="owner@example.com", first_name="Test", last_name="Owner", password="secret123", **fields):
+        """User with a hashed password, not yet added to the session"""
+        from app.models.user import User
+        user = User(first_name=first_name, last_name=last_name, email=email, **fields)
+        user.hash_password(password)
+        return user
@@ -0,0 +1,91 @@
+import asyncio
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+from app import create_app, db
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.user import User
+
+ASYNC_DEPENDENCIES = all(importlib.util.find_spec(name) for name in ('aiosqlite', 'greenlet', 'asgiref'))
+
+
+@unittest.skipUnless(ASYNC_DEPENDENCIES, 'the ASGI mode needs aiosqlite, greenlet and asgiref')
+class TestASGIReadPath(unittest.TestCase):
+    def setUp(self):
+        from app.asgi import HBnBASGI
+        self.tmp = tempfile.TemporaryDirectory()
+
+        class FileTestingConfig:
+            TESTING = True
+            SECRET_KEY = 'test'
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(self.tmp.name, 'test.db')}"
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            PASSWORD_HASH_WORKERS = 0
+
+        self.app = create_app(FileTestingConfig)
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        owner = User(first_name="Test", last_name="Owner", email="owner@example.com", password="x")
+        wifi = Amenity(name="Wifi")
+        for i in range(3):
+            db.session.add(Place(title=f"Place {i}", price_by_night=10.0 * (i + 1), latitude=0.0, longitude=0.0,
+                                 owner=owner, amenities=[wifi]))
+        db.session.commit()
+        self.place_id = Place.query.first().id
+        self.asgi = HBnBASGI(self.app)
+
+    def tearDown(self):
+        asyncio.run(self.asgi.database.dispose())
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        self.tmp.cleanup()
+
+    def get(self, path, query='', headers=()):
+        scope = {'type': 'http', 'http_version': '1.1', 'method': 'GET', 'scheme': 'http', 'root_path': '',
+                 'server': ('testserver', 80), 'path': path, 'query_string': query.encode(),
+                 'headers': [(name.lower().encode(), value.encode()) for name, value in headers]}
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(self.asgi(scope, receive, send))
+        start = messages[0]
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        return start['status'], {k.decode(): v.decode() for k, v in start['headers']}, body
+
+    def test_place_page_matches_flask(self):
+        status, headers, body = self.get('/api/v1/places', 'limit=2&sort=price')
+        flask_response = self.client.get('/api/v1/places?limit=2&sort=price')
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), flask_response.get_json())
+        self.assertEqual(headers['etag'], flask_response.headers['ETag'])
+
+    def test_place_detail_and_304(self):
+        status, headers, body = self.get(f'/api/v1/places/{self.place_id}')
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)['amenities'][0]['name'], 'Wifi')
+        status, _, body = self.get(f'/api/v1/places/{self.place_id}', headers=[('If-None-Match', headers['etag'])])
+        self.assertEqual((status, body), (304, b''))
+
+    def test_missing_place_and_bad_cursor(self):
+        self.assertEqual(self.get('/api/v1/places/nope')[0], 404)
+        self.assertEqual(self.get('/api/v1/places', 'cursor=garbage')[0], 400)
+
+    def test_other_requests_are_delegated_to_flask(self):
+        status, _, body = self.get('/api/v1/places/search', 'q=place')
+        self.assertEqual(status, 200)
+        self.assertEqual(len(json.loads(body)['places']), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from flask_jwt_extended import create_access_token
+
+from app import db
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+from app.services.bulk_import import BulkImporter, read_csv, read_ndjson
+from app.services.repositories.place_repository import PlaceRepository
+from app.utils.passwords import PasswordHasherBusy
+from tests.base import AppTestCase
+
+
+def ndjson(*records):
+    return '\n'.join(json.dumps(record) for record in records) + '\n'
+
+PLACE_ID = '0b6f3c1e-4a52-4d8e-9c47-2f1a8e5d7b90'
+
+SEED = ndjson(
+    {"type": "user", "first_name": "Ada", "last_name": "Host", "email": "ada@example.com", "password_hash": "x"},
+    {"type": "amenity", "name": "Wifi"},
+    {"type": "amenity", "name": "Pool"},
+    {"type": "place", "id": PLACE_ID, "title": "Seaside loft", "description": "Quiet loft",
+     "price_by_night": 120, "latitude": 43.3, "longitude": 5.4, "max_guests": 2,
+     "owner_email": "ada@example.com", "amenities": ["Wifi", "Pool"]},
+    {"type": "review", "text": "Lovely", "rating": 5, "user_email": "ada@example.com", "place_id": PLACE_ID},
+)
+
+
+class TestBulkImporter(AppTestCase):
+    def test_import_ndjson_resolves_references(self):
+        report = BulkImporter().run(read_ndjson(io.StringIO(SEED)))
+        self.assertEqual(report.created, {'user': 1, 'amenity': 2, 'place': 1, 'review': 1})
+        self.assertEqual(report.error_count, 0)
+
+        place = db.session.get(Place, PLACE_ID)
+        self.assertEqual(place.owner.email, 'ada@example.com')
+        self.assertEqual(sorted(a.name for a in place.amenities), ['Pool', 'Wifi'])
+        self.assertEqual(Review.query.one().place_id, PLACE_ID)
+
+    def test_imported_places_are_searchable(self):
+        BulkImporter().run(read_ndjson(io.StringIO(SEED)))
+        results = PlaceRepository().search('seaside', 10)
+        self.assertEqual([place.id for place, *_ in results], [PLACE_ID])
+
+    def test_reimport_skips_existing_rows(self):
+        BulkImporter().run(read_ndjson(io.StringIO(SEED)))
+        report = BulkImporter().run(read_ndjson(io.StringIO(SEED)))
+        self.assertEqual(report.skipped['user'], 1)
+        self.assertEqual(report.skipped['amenity'], 2)
+        self.assertEqual(report.skipped['place'], 1)
+        self.assertEqual(User.query.count(), 1)
+
+    def test_plain_passwords_are_hashed_in_the_pool_once_deduplicated(self):
+        from app import password_hasher
+        BulkImporter().run(read_ndjson(io.StringIO(SEED)))
+        users = ndjson({"type": "user", "first_name": "Ada", "last_name": "Host", "email": "ada@example.com",
+                        "password": "secret1"},
+                       {"type": "user", "first_name": "Bob", "last_name": "Guest", "email": "bob@example.com",
+                        "password": "secret2"})
+        password_hasher.reset_stats()
+        # Batch hashing: does not compete for the request slots of the pool
+        with mock.patch.object(password_hasher, 'hash', side_effect=PasswordHasherBusy):
+            report = BulkImporter().run(read_ndjson(io.StringIO(users)))
+        self.assertEqual((report.created['user'], report.skipped['user']), (1, 1))
+        self.assertEqual(password_hasher.hashed, 1)
+        self.assertTrue(User.query.filter_by(email='bob@example.com').one().verify_password('secret2'))
+
+    def test_place_ids_must_be_canonical_uuids(self):
+        BulkImporter().run(read_ndjson(io.StringIO(SEED)))
+        place = {"type": "place", "title": "Loft", "price_by_night": 80, "latitude": 0, "longitude": 0,
+                 "owner_email": "ada@example.com"}
+        ids = ['place-0000000001', PLACE_ID.replace('-', ''), '{%s}' % PLACE_ID, PLACE_ID.upper()]
+        report = BulkImporter().run(read_ndjson(io.StringIO(ndjson(*[dict(place, id=value) for value in ids]))))
+        self.assertEqual(report.created['place'], 0)
+        self.assertEqual([error['line'] for error in report.errors], [1, 2, 3, 4])
+
+    def test_invalid_records_are_reported_by_line(self):
+        data = SEED + ndjson(
+            {"type": "place", "title": "Nowhere", "price_by_night": -1, "latitude": 0, "longitude": 0,
+             "owner_email": "ada@example.com"},
+            {"type": "review", "text": "?", "rating": 4, "user_email": "ghost@example.com", "place_id": PLACE_ID},
+        ) + 'not json\n'
+        report = BulkImporter().run(read_ndjson(io.StringIO(data)))
+        self.assertEqual(report.error_count, 3)
+        self.assertEqual([error['line'] for error in report.errors], [8, 6, 7])
+        self.assertEqual(report.created['place'], 1)
+
+    def test_references_across_chunks(self):
+        report = BulkImporter(chunk_size=2).run(read_ndjson(io.StringIO(SEED)))
+        self.assertEqual(report.created, {'user': 1, 'amenity': 2, 'place': 1, 'review': 1})
+
+    def test_import_csv(self):
+        BulkImporter().run(read_ndjson(io.StringIO(SEED)))
+        data = ("title,price_by_night,latitude,longitude,owner_email,amenities\n"
+                "Mountain hut,80,45.9,6.8,ada@example.com,Wifi|Pool\n")
+        report = BulkImporter().run(read_csv(io.StringIO(data), 'place'))
+        self.assertEqual(report.created['place'], 1)
+        hut = Place.query.filter_by(title='Mountain hut').one()
+        self.assertEqual(len(hut.amenities), 2)
+
+    def test_cli_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as f:
+            f.write(SEED)
+        try:
+            result = self.app.test_cli_runner().invoke(args=['hbnb', 'import', f.name])
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(json.loads(result.output)['created']['place'], 1)
+
+
+class TestAdminBulkEndpoint(AppTestCase):
+    def headers(self, is_admin, content_type='application/x-ndjson'):
+        token = create_access_token(identity='someone', additional_claims={'is_admin': is_admin})
+        return {'Authorization': f'Bearer {token}', 'Content-Type': content_type}
+
+    def test_admin_can_import(self):
+        response = self.client.post('/api/v1/admin/bulk', data=SEED, headers=self.headers(True))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['created']['review'], 1)
+
+    def test_non_admin_is_rejected(self):
+        response = self.client.post('/api/v1/admin/bulk', data=SEED, headers=self.headers(False))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Place.query.count(), 0)
+
+    def test_csv_requires_type(self):
+        response = self.client.post('/api/v1/admin/bulk', data='name\nWifi\n',
+                                    headers=self.headers(True, 'text/csv'))
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/v1/admin/bulk?type=amenity', data='name\nWifi\n',
+                                    headers=self.headers(True, 'text/csv'))
+        self.assertEqual(response.get_json()['created']['amenity'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+from sqlalchemy import event
+from app import db, entity_cache
+from app.persistence.cache import LRUCache
+from app.services.facade import HBnBFacade
+from tests.base import AppTestCase
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2, ttl=None)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.evictions, 1)
+
+    def test_entries_expire(self):
+        clock = FakeClock()
+        cache = LRUCache(max_size=10, ttl=5, clock=clock)
+        cache.set('a', 1)
+        clock.now = 4
+        self.assertEqual(cache.get('a'), 1)
+        clock.now = 6
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['expirations'], 1)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_zero_size_disables_cache(self):
+        cache = LRUCache(max_size=0)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+
+class TestEntityCache(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.facade = HBnBFacade()
+
+        from app.models.place import Place
+        self.owner = self.make_user()
+        place = Place(title="Old title", price_by_night=10.0, latitude=0.0, longitude=0.0, owner=self.owner)
+        db.session.add_all([self.owner, place])
+        db.session.commit()
+        self.place_id = place.id
+        db.session.remove()
+
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self.record)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self.record)
+        super().tearDown()
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def get_in_new_session(self, place_id):
+        # Chaque requête HTTP a sa propre session
+        db.session.remove()
+        self.statements.clear()
+        return self.facade.get_place(place_id)
+
+    def test_second_read_is_served_from_cache(self):
+        self.get_in_new_session(self.place_id)
+        place = self.get_in_new_session(self.place_id)
+        self.assertEqual(self.statements, [])
+        self.assertEqual(place.title, 'Old title')
+        self.assertEqual(entity_cache.hits, 1)
+        # Les relations restent chargées à la demande
+        self.assertEqual(place.owner.email, 'owner@example.com')
+
+    def test_update_invalidates(self):
+        self.get_in_new_session(self.place_id)
+        self.facade.update_place(self.place_id, {'title': 'New title'})
+        place = self.get_in_new_session(self.place_id)
+        self.assertEqual(place.title, 'New title')
+        self.assertNotEqual(self.statements, [])
+
+    def test_flush_invalidates_changes_made_outside_the_repository(self):
+        place = self.get_in_new_session(self.place_id)
+        place.title = 'Edited directly'
+        db.session.commit()
+        self.assertEqual(self.get_in_new_session(self.place_id).title, 'Edited directly')
+
+    def test_delete_invalidates(self):
+        self.get_in_new_session(self.place_id)
+        self.facade.delete_place(self.place_id)
+        self.assertIsNone(self.get_in_new_session(self.place_id))
+
+    def test_unflushed_changes_are_not_overwritten(self):
+        self.get_in_new_session(self.place_id)
+        db.session.remove()
+        place = self.facade.get_place(self.place_id)
+        place.title = 'Pending'
+        self.assertEqual(self.facade.get_place(self.place_id).title, 'Pending')
+
+
+if __name__ == '__main__':
+    unittest.main()
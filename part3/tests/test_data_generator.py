@@ -0,0 +1,98 @@
+import io
+import json
+import unittest
+
+from app import db
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.place_amenities import place_amenities
+from app.models.review import Review
+from app.models.user import User
+from app.persistence import search
+from app.services.bulk_import import BulkImporter, read_ndjson
+from app.services.data_generator import DataGenerator, write_database, write_ndjson
+from app.services.repositories.place_repository import PlaceRepository
+from tests.base import AppTestCase
+
+
+def generator(seed=7):
+    return DataGenerator(200, 'x' * 60, reviews=1500, seed=seed)
+
+
+class TestDataGenerator(AppTestCase):
+    def test_same_seed_same_data(self):
+        first = [generated.row for generated in generator().place_rows()]
+        self.assertEqual(first, [generated.row for generated in generator().place_rows()])
+        self.assertNotEqual(first, [generated.row for generated in generator(seed=8).place_rows()])
+
+    def test_reviews_are_skewed_and_unique_per_user(self):
+        places = list(generator().place_rows())
+        counts = sorted(len(generated.reviews) for generated in places)
+        self.assertAlmostEqual(sum(counts) / 1500, 1, delta=0.2)
+        self.assertGreater(counts[-1], 4 * counts[len(counts) // 2])
+        for generated in places:
+            self.assertEqual(len(set(generated.reviewers)), len(generated.reviewers))
+
+    def test_write_database(self):
+        report = write_database(generator(), chunk_size=50)
+        self.assertEqual(report.created['place'], db.session.scalar(db.select(db.func.count(Place.id))))
+        self.assertEqual(report.created['review'], db.session.scalar(db.select(db.func.count(Review.id))))
+        self.assertEqual(report.created['user'], db.session.scalar(db.select(db.func.count(User.id))))
+
+        # The aggregates written with the places match the reviews
+        before = {place.id: (place.review_count, place.rating_sum, place.rating_5) for place in Place.query}
+        PlaceRepository().recompute_rating_aggregates()
+        db.session.commit()
+        db.session.expire_all()
+        self.assertEqual(before, {place.id: (place.review_count, place.rating_sum, place.rating_5)
+                                  for place in Place.query})
+
+        # Spatial (triggers) and full-text indexes were fed
+        self.assertEqual(db.session.execute(db.text('SELECT count(*) FROM places_rtree')).scalar(), 200)
+        self.assertEqual(db.session.execute(db.text(f'SELECT count(*) FROM {search.FTS_TABLE}')).scalar(), 200)
+
+        # The indexes deferred during the load are back
+        indexes = set(db.session.execute(db.text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+        self.assertTrue({index.name for index in Review.__table__.indexes | Place.__table__.indexes} <= indexes)
+
+    def test_second_run_with_same_seed_is_refused(self):
+        write_database(generator())
+        with self.assertRaises(ValueError):
+            write_database(generator())
+
+    def test_second_seed_reuses_the_amenities(self):
+        wifi = Amenity(name='Wifi')
+        db.session.add(wifi)
+        db.session.commit()
+        wifi_id = wifi.id
+        first = write_database(DataGenerator(10, 'x' * 60, seed=1))
+        second = write_database(DataGenerator(10, 'x' * 60, seed=2))
+        self.assertEqual(first.created['amenity'], DataGenerator(10, 'x').amenities - 1)
+        self.assertEqual(second.created['amenity'], 0)
+        self.assertEqual(db.session.scalar(db.select(db.func.count(Place.id))), 20)
+        self.assertEqual(db.session.scalar(db.select(Amenity.id).where(Amenity.name == 'Wifi')), wifi_id)
+        # Every link points to an existing amenity
+        orphans = db.session.execute(db.select(db.func.count()).select_from(place_amenities).where(
+            place_amenities.c.amenity_id.not_in(db.select(Amenity.id)))).scalar()
+        self.assertEqual(orphans, 0)
+
+    def test_ndjson_loads_with_the_bulk_importer(self):
+        stream = io.StringIO()
+        written = write_ndjson(generator(), stream)
+        stream.seek(0)
+        report = BulkImporter().run(read_ndjson(stream))
+        self.assertEqual(report.errors, [])
+        for record_type in ('user', 'amenity', 'place', 'review'):
+            self.assertEqual(report.created[record_type], written.created[record_type])
+
+    def test_cli_command(self):
+        result = self.app.test_cli_runner().invoke(args=['hbnb', 'generate', '--places', '30', '--reviews', '90',
+                                                         '--seed', '3'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        created = json.loads(result.stdout)['database']['created']
+        self.assertEqual(created['place'], 30)
+        self.assertEqual(db.session.scalar(db.select(db.func.count(Review.id))), created['review'])
+
+
+if __name__ == '__main__':
+    unittest.main()
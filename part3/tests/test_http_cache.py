@@ -0,0 +1,113 @@
+import unittest
+from datetime import datetime, timedelta
+from app import db
+from app.services.facade import HBnBFacade
+from tests.base import AppTestCase
+
+
+class TestConditionalGet(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.facade = HBnBFacade()
+
+        from app.models.amenity import Amenity
+        from app.models.place import Place
+        self.owner = self.make_user()
+        self.wifi = Amenity(name="WiFi")
+        self.place = Place(title="Loft", price_by_night=10.0, latitude=0.0, longitude=0.0,
+                           owner=self.owner, amenities=[self.wifi])
+        db.session.add_all([self.owner, self.wifi, self.place])
+        db.session.commit()
+
+    def revalidate(self, url, response):
+        return self.client.get(url, headers={'If-None-Match': response.headers['ETag']})
+
+    def test_place_detail_not_modified(self):
+        url = f'/api/v1/places/{self.place.id}'
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('no-cache', first.headers['Cache-Control'])
+        self.assertIn('Last-Modified', first.headers)
+
+        second = self.revalidate(url, first)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b'')
+        self.assertEqual(second.headers['ETag'], first.headers['ETag'])
+
+    def test_place_detail_changes_with_its_amenities(self):
+        url = f'/api/v1/places/{self.place.id}'
+        first = self.client.get(url)
+        self.facade.update_amenity(self.wifi.id, {'name': 'Fibre'})
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_place_detail_and_list_change_with_their_owner(self):
+        detail, listing = f'/api/v1/places/{self.place.id}', '/api/v1/places?limit=10'
+        first, first_list = self.client.get(detail), self.client.get(listing)
+        self.facade.update_user(self.owner.id, {'first_name': 'Renamed'})
+        self.assertEqual(self.revalidate(detail, first).status_code, 200)
+        self.assertEqual(self.revalidate(listing, first_list).status_code, 200)
+
+    def test_place_detail_if_modified_since(self):
+        url = f'/api/v1/places/{self.place.id}'
+        last_modified = self.client.get(url).headers['Last-Modified']
+        self.assertEqual(self.client.get(url, headers={'If-Modified-Since': last_modified}).status_code, 304)
+        earlier = (self.place.updated_at - timedelta(days=1)).strftime('%a, %d %b %Y %H:%M:%S GMT')
+        self.assertEqual(self.client.get(url, headers={'If-Modified-Since': earlier}).status_code, 200)
+
+    def test_list_etag_changes_on_insert_update_and_delete(self):
+        url = '/api/v1/places?limit=10'
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        self.facade.update_place(self.place.id, {'title': 'Renamed'})
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+        response = self.client.get(url)
+
+        self.facade.delete_place(self.place.id)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_list_etag_changes_on_bulk_writes(self):
+        # UPDATE / INSERT run with Session.execute, without the ORM flush
+        url = '/api/v1/places?limit=10'
+        response = self.client.get(url)
+        self.facade.recompute_rating_aggregates()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+        response = self.client.get(url)
+
+        from app.models.amenity import Amenity
+        db.session.execute(Amenity.__table__.insert(), [{'id': 'bulk-amenity', 'name': 'Sauna'}])
+        db.session.commit()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_list_version_is_a_primary_key_lookup(self):
+        from app.persistence import table_versions
+        statement = table_versions.version_statement(['places', 'amenities', 'users'])
+        statement = statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+        plan = ' '.join(row[3] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {statement}')))
+        self.assertNotIn('SCAN', plan)
+
+    def test_pages_have_distinct_etags(self):
+        first = self.client.get('/api/v1/places?limit=10')
+        other = self.client.get('/api/v1/places?limit=10&sort=price')
+        self.assertNotEqual(first.headers['ETag'], other.headers['ETag'])
+
+    def test_not_modified_skips_loading(self):
+        from sqlalchemy import event
+        url = '/api/v1/amenities/'
+        response = self.client.get(url)
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(len(statements), 1)
+
+    def test_missing_entity_is_still_404(self):
+        self.assertEqual(self.client.get('/api/v1/amenities/missing').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from app import db
+from app.models.place import Place
+from app.persistence.index_advisor import IndexAdvisor, StatementRecorder, filter_columns, migration_source
+from app.services.facade import HBnBFacade
+from tests.base import AppTestCase
+
+
+class TestIndexAdvisor(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.facade = HBnBFacade()
+        self.owner = self.make_user()
+        db.session.add_all([self.owner, Place(title="Loft", price_by_night=10.0, latitude=0.0, longitude=0.0,
+                                              owner=self.owner)])
+        db.session.commit()
+
+    def record(self, scope, call):
+        with StatementRecorder().listen(db.engine) as recorder:
+            recorder.scope = scope
+            call()
+        return recorder.statements.values()
+
+    def test_filter_columns(self):
+        statement = ("SELECT places.id FROM places JOIN users ON users.id = places.owner_id "
+                     "WHERE places.max_guests = ? AND places.price_by_night >= ? AND places.title != ?")
+        columns = {'id', 'owner_id', 'max_guests', 'price_by_night', 'title'}
+        self.assertEqual(filter_columns(statement, 'places', 'places', columns), ('max_guests', 'price_by_night'))
+        # No filter with a value: the join column
+        statement = "SELECT places_1.id FROM users JOIN places AS places_1 ON users.id = places_1.owner_id"
+        self.assertEqual(filter_columns(statement, 'places_1', 'places', columns), ('owner_id',))
+        self.assertEqual(filter_columns("UPDATE places SET title=? WHERE owner_id = ?", 'places', 'places', columns),
+                         ('owner_id',))
+
+    def test_indexed_lookups_are_not_flagged(self):
+        recorded = self.record('lookups', lambda: (self.facade.get_user_by_email('owner@example.com'),
+                                                   self.facade.get_place(self.owner.places[0].id)))
+        with db.engine.connect() as connection:
+            advisor = IndexAdvisor(connection)
+            suggestions, _ = advisor.suggest(advisor.scans(recorded))
+        self.assertEqual(suggestions, [])
+
+    def test_full_scan_gets_an_index(self):
+        # A query on a column no index starts with
+        recorded = self.record('by title', lambda: Place.query.filter(Place.title == 'Loft').all())
+        with db.engine.connect() as connection:
+            advisor = IndexAdvisor(connection)
+            scans = advisor.scans(recorded)
+            suggestions, unavoidable = advisor.suggest(scans)
+        self.assertEqual([scan.table for scan in scans], ['places'])
+        self.assertEqual([(suggestion.name, suggestion.columns) for suggestion in suggestions],
+                         [('ix_places_title', ('title',))])
+        self.assertIn('by title', suggestions[0].reasons[0])
+        self.assertEqual(unavoidable, [])
+
+    def test_whole_table_reads_have_no_suggestion(self):
+        recorded = self.record('all', lambda: self.facade.get_all_users())
+        with db.engine.connect() as connection:
+            advisor = IndexAdvisor(connection)
+            suggestions, unavoidable = advisor.suggest(advisor.scans(recorded))
+        self.assertEqual(suggestions, [])
+        self.assertEqual([scan.table for scan in unavoidable], ['users'])
+
+    def test_migration(self):
+        recorded = self.record('by title', lambda: Place.query.filter(Place.title == 'Loft').all())
+        with db.engine.connect() as connection:
+            advisor = IndexAdvisor(connection)
+            suggestions, _ = advisor.suggest(advisor.scans(recorded))
+        source = migration_source(suggestions, 'abc123', 'f2b8d4a6c913')
+        self.assertIn("op.create_index('ix_places_title', 'places', ['title'], unique=False)", source)
+        self.assertIn("down_revision = 'f2b8d4a6c913'", source)
+        compile(source, 'migration.py', 'exec')
+
+
+if __name__ == '__main__':
+    unittest.main()
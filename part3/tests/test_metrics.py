@@ -0,0 +1,80 @@
+import unittest
+from flask_jwt_extended import create_access_token
+from app import db, request_metrics
+from app.utils.metrics import Histogram
+from tests.base import AppTestCase
+
+
+class TestHistogram(unittest.TestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram((1, 5, 10))
+        for value in (0, 1, 3, 7, 50):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [(1, 2), (5, 3), (10, 4), ('+Inf', 5)])
+        self.assertEqual(histogram.sum, 61)
+
+
+class TestRequestMetrics(AppTestCase):
+    def headers(self, is_admin=True):
+        token = create_access_token(identity='someone', additional_claims={'is_admin': is_admin})
+        return {'Authorization': f'Bearer {token}'}
+
+    def test_server_timing_header(self):
+        self.client.post('/api/v1/amenities/', json={'name': 'Wifi'}, headers=self.headers())
+        response = self.client.get('/api/v1/amenities/')
+        self.assertEqual(response.status_code, 200)
+        timings = response.headers.getlist('Server-Timing')
+        self.assertRegex(timings[0], r'^db;dur=[\d.]+;desc="[1-9]\d* queries"$')
+        self.assertRegex(timings[1], r'^app;dur=[\d.]+$')
+
+    def test_json_histograms_per_route(self):
+        self.client.post('/api/v1/amenities/', json={'name': 'Wifi'}, headers=self.headers())
+        self.client.get('/api/v1/amenities/')
+        self.client.get('/api/v1/amenities/')
+        self.client.get('/api/v1/amenities/unknown')
+
+        routes = self.client.get('/api/v1/admin/metrics', headers=self.headers()).get_json()['routes']
+        listing = routes['GET /api/v1/amenities/']
+        self.assertEqual(listing['requests'], 2)
+        self.assertEqual(listing['status'], {'200': 2})
+        self.assertEqual(listing['duration_seconds']['buckets']['+Inf'], 2)
+        self.assertGreaterEqual(listing['queries']['sum'], 2)
+        self.assertGreaterEqual(listing['rows']['sum'], 2)  # the amenity, loaded by each request
+        self.assertEqual(routes['GET /api/v1/amenities/<string:amenity_id>']['status'], {'404': 1})
+        self.assertGreaterEqual(routes['POST /api/v1/amenities/']['rows']['sum'], 1)
+
+    def test_prometheus_format(self):
+        self.client.get('/api/v1/amenities/')
+        response = self.client.get('/api/v1/admin/metrics', headers={**self.headers(), 'Accept': 'text/plain'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        text = response.get_data(as_text=True)
+        self.assertIn('# TYPE hbnb_http_request_duration_seconds histogram', text)
+        self.assertIn('hbnb_http_requests_total{method="GET",route="/api/v1/amenities/",status="200"} 1', text)
+        self.assertIn('hbnb_http_request_queries_bucket{method="GET",route="/api/v1/amenities/",le="+Inf"} 1', text)
+        self.assertEqual(self.client.get('/api/v1/admin/metrics?format=prometheus',
+                                         headers=self.headers()).get_data(as_text=True).count('# TYPE'), 5)
+
+    def test_failed_statements_leave_nothing_on_the_connection(self):
+        connection = db.session.connection()
+        for _ in range(3):
+            with self.assertRaises(Exception):
+                connection.exec_driver_sql('SELECT * FROM no_such_table')
+        self.assertNotIn('_metrics_started', connection.info)
+        # The next statements are still timed
+        self.assertEqual(self.client.get('/api/v1/amenities/').status_code, 200)
+
+    def test_admin_only(self):
+        response = self.client.get('/api/v1/admin/metrics', headers=self.headers(is_admin=False))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.get('/api/v1/admin/metrics').status_code, 401)
+
+    def test_reset(self):
+        self.client.get('/api/v1/amenities/')
+        self.client.delete('/api/v1/admin/metrics', headers=self.headers())
+        # Only the DELETE itself, recorded after the reset, is left
+        self.assertEqual(list(request_metrics.to_dict()), ['DELETE /api/v1/admin/metrics'])
+
+
+if __name__ == '__main__':
+    unittest.main()
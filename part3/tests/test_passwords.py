@@ -0,0 +1,120 @@
+import threading
+import time
+import unittest
+from unittest import mock
+from app import db, password_hasher
+from app.models.user import User
+from app.utils.passwords import PasswordHasher, PasswordHasherBusy, _hash, _verify, hash_rounds
+from tests.base import AppTestCase
+
+
+class TestPasswordHasher(unittest.TestCase):
+    def test_hash_rounds(self):
+        self.assertEqual(hash_rounds(_hash('secret', 5)), 5)
+        self.assertIsNone(hash_rounds('plain text'))
+
+    def test_pool_hashes_and_verifies(self):
+        hasher = PasswordHasher()
+        hasher.rounds, hasher.workers = 4, 1
+        try:
+            hashed = hasher.hash('secret')
+            self.assertTrue(hasher.verify('secret', hashed))
+            self.assertFalse(hasher.verify('wrong', hashed))
+        finally:
+            hasher.shutdown()
+
+    def test_hash_many_uses_the_whole_pool_outside_the_request_cap(self):
+        hasher = PasswordHasher()
+        hasher.rounds, hasher.workers, hasher._slots = 4, 2, threading.BoundedSemaphore(1)
+        hasher._slots.acquire()
+        try:
+            hashes = hasher.hash_many(['a', 'b', 'c'])
+            self.assertEqual([_verify(password, hashed) for password, hashed in zip('abc', hashes)], [True] * 3)
+            self.assertEqual(hasher.hashed, 3)
+        finally:
+            hasher.shutdown()
+
+    def test_saturated_pool_rejects(self):
+        hasher = PasswordHasher()
+        hasher.workers, hasher._slots = 1, threading.BoundedSemaphore(1)
+        hasher._slots.acquire()
+        with self.assertRaises(PasswordHasherBusy):
+            hasher.hash('secret')
+        self.assertEqual(hasher.stats()['rejected'], 1)
+
+    def test_timed_out_job_keeps_its_slot_until_done(self):
+        hasher = PasswordHasher()
+        hasher.workers, hasher.max_pending, hasher._slots = 1, 1, threading.BoundedSemaphore(1)
+        try:
+            hasher._run(abs, -1)  # pool started
+            hasher.timeout = 0.05
+            with self.assertRaises(PasswordHasherBusy):
+                hasher._run(time.sleep, 0.5)
+            # Still running in the pool: its slot is not free yet
+            with self.assertRaises(PasswordHasherBusy):
+                hasher._run(abs, -1)
+            time.sleep(1)
+            self.assertEqual(hasher._run(abs, -1), 1)
+        finally:
+            hasher.shutdown()
+
+
+class TestLogin(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        # Hachage fait avec un autre coût que BCRYPT_LOG_ROUNDS (4 en test)
+        self.user = User(first_name="Test", last_name="User", email="user@example.com", password=_hash('secret1', 5))
+        db.session.add(self.user)
+        db.session.commit()
+
+    def login(self, password='secret1'):
+        return self.client.post('/api/v1/auth/login', json={'email': 'user@example.com', 'password': password})
+
+    def test_login_rehashes_with_configured_cost(self):
+        self.assertEqual(self.login().status_code, 200)
+        db.session.expire_all()
+        self.assertEqual(hash_rounds(db.session.get(User, self.user.id).password), 4)
+        self.assertEqual(self.login().status_code, 200)
+
+    def test_wrong_password_does_not_rehash(self):
+        self.assertEqual(self.login('wrong').status_code, 401)
+        db.session.expire_all()
+        self.assertEqual(hash_rounds(db.session.get(User, self.user.id).password), 5)
+
+    def test_saturated_pool_answers_503(self):
+        with mock.patch.object(password_hasher, 'verify', side_effect=PasswordHasherBusy):
+            response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+
+class TestRegistration(AppTestCase):
+    def test_saturated_pool_answers_503(self):
+        payload = {'first_name': 'Test', 'last_name': 'User', 'email': 'user@example.com', 'password': 'secret1'}
+        with mock.patch.object(password_hasher, 'hash', side_effect=PasswordHasherBusy):
+            response = self.client.post('/api/v1/users/', json=payload)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+        from flask_jwt_extended import create_access_token
+        user = self.make_user(email='user@example.com')
+        db.session.add(user)
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=user.id)}'}
+        with mock.patch.object(password_hasher, 'hash', side_effect=PasswordHasherBusy):
+            response = self.client.put(f'/api/v1/users/{user.id}', json=payload, headers=headers)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+    def test_duplicate_email_is_refused_before_hashing(self):
+        from app.services import facade
+        payload = {'first_name': 'Test', 'last_name': 'User', 'email': 'user@example.com', 'password': 'secret1'}
+        facade.create_user(payload)
+        password_hasher.reset_stats()
+        with self.assertRaises(ValueError):
+            facade.create_user(payload)
+        self.assertEqual(password_hasher.hashed, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,8 @@
 import unittest
-from app import create_app
+import json
+from datetime import datetime, timedelta
+from app import create_app, db
+from tests.base import AppTestCase
 
 class TestPlaceEndpoints(unittest.TestCase):
     def setUp(self):
@@ -98,3 +101,326 @@ class TestPlaceEndpoints(unittest.TestCase):
         self.assertEqual(data['title'], 'Updated Title')
         self.assertEqual(data['price'], 150.0)
 
+
+class TestPlacePagination(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        from app.models.place import Place
+        owner = self.make_user()
+        db.session.add(owner)
+        # Same created_at for several places so the id tie-breaker is exercised
+        base = datetime(2025, 1, 1)
+        for i in range(7):
+            db.session.add(Place(
+                title=f"Place {i}", price_by_night=50.0 + i, latitude=0.0, longitude=0.0,
+                owner=owner, created_at=base + timedelta(minutes=i // 2)
+            ))
+        db.session.commit()
+
+    def test_pages_cover_all_places_once(self):
+        seen = []
+        cursor = None
+        while True:
+            url = '/api/v1/places?limit=3' + (f'&cursor={cursor}' if cursor else '')
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.data)
+            self.assertLessEqual(len(data['places']), 3)
+            seen.extend(place['id'] for place in data['places'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+
+    def test_last_page_has_no_cursor(self):
+        response = self.client.get('/api/v1/places?limit=50')
+        data = json.loads(response.data)
+        self.assertEqual(len(data['places']), 7)
+        self.assertIsNone(data['next_cursor'])
+
+    def test_invalid_pagination_parameters(self):
+        self.assertEqual(self.client.get('/api/v1/places?cursor=not-a-cursor').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/places?limit=0').status_code, 400)
+
+
+
+class TestPlaceFilters(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        from app.models.place import Place
+        from app.models.review import Review
+        owner = self.make_user()
+        guest = self.make_user("guest@example.com", last_name="Guest")
+        db.session.add_all([owner, guest])
+        self.places = {}
+        for title, price, guests, rooms, rating in [("Cheap", 40.0, 2, 1, 3), ("Mid", 90.0, 4, 2, 5),
+                                                    ("Luxury", 300.0, 8, 4, None)]:
+            place = Place(title=title, price_by_night=price, max_guests=guests, number_rooms=rooms,
+                          latitude=0.0, longitude=0.0, owner=owner)
+            db.session.add(place)
+            if rating:
+                db.session.add(Review(text="ok", rating=rating, user=guest, place=place))
+                place.add_rating(rating)
+            self.places[title] = place
+        db.session.commit()
+
+    def titles(self, query):
+        response = self.client.get('/api/v1/places?' + query)
+        self.assertEqual(response.status_code, 200)
+        return [place['title'] for place in json.loads(response.data)['places']]
+
+    def test_price_and_capacity_filters(self):
+        self.assertEqual(self.titles('max_price=100&sort=price'), ['Cheap', 'Mid'])
+        self.assertEqual(self.titles('min_price=50&min_guests=5'), ['Luxury'])
+        self.assertEqual(self.titles('min_rooms=2&sort=price'), ['Mid', 'Luxury'])
+
+    def test_sort_orders(self):
+        self.assertEqual(self.titles('sort=price'), ['Cheap', 'Mid', 'Luxury'])
+        self.assertEqual(self.titles('sort=rating'), ['Mid', 'Cheap', 'Luxury'])
+
+    def test_sorted_pages_follow_cursor(self):
+        response = self.client.get('/api/v1/places?sort=price&limit=2')
+        data = json.loads(response.data)
+        self.assertEqual([p['title'] for p in data['places']], ['Cheap', 'Mid'])
+        self.assertEqual(self.titles(f"sort=price&limit=2&cursor={data['next_cursor']}"), ['Luxury'])
+
+    def test_unknown_sort_rejected(self):
+        self.assertEqual(self.client.get('/api/v1/places?sort=cheapest').status_code, 400)
+
+
+class TestPlaceGeoSearch(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        from app.models.place import Place
+        owner = self.make_user()
+        db.session.add(owner)
+        for title, lat, lng in [("Louvre", 48.8606, 2.3376), ("Eiffel", 48.8584, 2.2945),
+                                ("Versailles", 48.8049, 2.1204), ("Lyon", 45.7640, 4.8357),
+                                ("Fiji", -17.7134, 178.0650), ("Samoa", -13.7590, -172.1046)]:
+            db.session.add(Place(title=title, price_by_night=100.0, latitude=lat, longitude=lng, owner=owner))
+        db.session.commit()
+
+    def titles(self, query):
+        response = self.client.get('/api/v1/places?' + query)
+        self.assertEqual(response.status_code, 200)
+        return [place['title'] for place in json.loads(response.data)['places']]
+
+    def test_near_orders_by_distance_within_radius(self):
+        response = self.client.get('/api/v1/places?near=48.8600,2.3400&radius_km=30')
+        places = json.loads(response.data)['places']
+        self.assertEqual([p['title'] for p in places], ['Louvre', 'Eiffel', 'Versailles'])
+        self.assertLess(places[0]['distance_km'], 1)
+        self.assertEqual(self.titles('near=48.8600,2.3400&radius_km=5'), ['Louvre', 'Eiffel'])
+
+    def test_bbox_and_antimeridian(self):
+        self.assertEqual(set(self.titles('bbox=2.0,48.7,2.5,49.0')), {'Louvre', 'Eiffel', 'Versailles'})
+        self.assertEqual(set(self.titles('bbox=170,-25,-170,-10')), {'Fiji', 'Samoa'})
+
+    def test_limit_keeps_the_nearest(self):
+        # The first search circles hold fewer than `limit` places: the circle grows until it has them
+        self.assertEqual(self.titles('near=48.8600,2.3400&radius_km=500&limit=3'), ['Louvre', 'Eiffel', 'Versailles'])
+        self.assertEqual(self.titles('near=48.8600,2.3400&radius_km=500&limit=4'),
+                         ['Louvre', 'Eiffel', 'Versailles', 'Lyon'])
+        self.assertEqual(self.titles('bbox=-10,40,10,55&limit=1'), ['Versailles'])
+        self.assertEqual(self.titles('bbox=170,-25,-170,-10&limit=1'), ['Fiji'])
+
+    def test_far_candidates_are_not_read(self):
+        from app.services.repositories.place_repository import PlaceRepository
+        repository = PlaceRepository()
+        read = []
+        candidates = repository._candidates
+
+        def recording(*args):
+            for candidate in candidates(*args):
+                read.append(candidate)
+                yield candidate
+        repository._candidates = recording
+        results = repository.find_near(48.8600, 2.3400, 20000, 1)
+        self.assertEqual([place.title for place, _ in results], ['Louvre'])
+        self.assertEqual(len(read), 1)
+
+    def test_index_follows_updates_and_deletes(self):
+        from app.models.place import Place
+        lyon = Place.query.filter_by(title="Lyon").first()
+        lyon.latitude, lyon.longitude = 48.8610, 2.3380
+        db.session.delete(Place.query.filter_by(title="Louvre").first())
+        db.session.commit()
+        self.assertEqual(self.titles('near=48.8600,2.3400&radius_km=1'), ['Lyon'])
+
+    def test_invalid_location_parameters(self):
+        self.assertEqual(self.client.get('/api/v1/places?bbox=1,2,3').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/places?near=95,0').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/places?near=48,2&radius_km=-1').status_code, 400)
+
+
+class TestPlaceSearch(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        from app.models.place import Place
+        owner = self.make_user()
+        db.session.add(owner)
+        for title, description in [("Chalet au bord du lac", "Vue sur le lac et les montagnes"),
+                                   ("Studio parisien", "Proche du lac Daumesnil"),
+                                   ("Villa with pool", "Sunny garden")]:
+            db.session.add(Place(title=title, description=description, price_by_night=100.0,
+                                 latitude=0.0, longitude=0.0, owner=owner))
+        db.session.commit()
+
+    def search(self, q):
+        response = self.client.get('/api/v1/places/search', query_string={'q': q})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.data)['places']
+
+    def test_title_matches_rank_first_with_highlight(self):
+        results = self.search('lac')
+        self.assertEqual([r['title'] for r in results], ['Chalet au bord du lac', 'Studio parisien'])
+        self.assertIn('<mark>lac</mark>', results[0]['title_highlight'])
+        self.assertIn('<mark>lac</mark>', results[1]['description_snippet'])
+
+    def test_highlight_escapes_the_place_markup(self):
+        from app.models.place import Place
+        db.session.add(Place(title='<img src=x onerror=alert(1)> loft', description='A "loft" & <b>garden</b>',
+                             price_by_night=100.0, latitude=0.0, longitude=0.0, owner_id=Place.query.first().owner_id))
+        db.session.commit()
+        [result] = self.search('loft')
+        self.assertEqual(result['title_highlight'], '&lt;img src=x onerror=alert(1)&gt; <mark>loft</mark>')
+        self.assertEqual(result['description_snippet'], 'A &quot;<mark>loft</mark>&quot; &amp; &lt;b&gt;garden&lt;/b&gt;')
+
+    def test_prefix_and_accent_insensitive(self):
+        self.assertEqual([r['title'] for r in self.search('paris')], ['Studio parisien'])
+        self.assertEqual([r['title'] for r in self.search('CHÂLET')], ['Chalet au bord du lac'])
+
+    def test_index_follows_updates_and_deletes(self):
+        from app.models.place import Place
+        villa = Place.query.filter_by(title="Villa with pool").first()
+        villa.title = "Villa au lac"
+        db.session.delete(Place.query.filter_by(title="Studio parisien").first())
+        db.session.commit()
+        self.assertEqual(self.search('paris'), [])
+        self.assertEqual({r['title'] for r in self.search('lac')}, {'Chalet au bord du lac', 'Villa au lac'})
+
+    def test_query_operators_are_plain_text(self):
+        self.assertEqual(self.search('NEAR("lac" OR'), self.search('near lac or'))
+        self.assertEqual(self.client.get('/api/v1/places/search?q=%22%22').status_code, 400)
+
+
+class TestPlaceReviews(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        from app.models.user import User
+        from app.models.place import Place
+        from app.models.review import Review
+        owner = self.make_user()
+        self.guest = self.make_user("guest@example.com", last_name="Guest")
+        self.place = Place(title="Popular", price_by_night=50.0, latitude=0.0, longitude=0.0, owner=owner)
+        db.session.add_all([owner, self.guest, self.place])
+        start = datetime(2024, 1, 1)
+        for i in range(25):
+            author = self.guest if i == 24 else User(first_name="Test", last_name="Author",
+                                                     email=f"author{i}@example.com", password="x")
+            db.session.add(Review(text=f"Review {i}", rating=5, user=author, place=self.place,
+                                  created_at=start + timedelta(days=i)))
+            self.place.add_rating(5)
+        db.session.commit()
+
+    def test_detail_embeds_aggregates_and_first_page(self):
+        data = json.loads(self.client.get(f'/api/v1/places/{self.place.id}').data)
+        self.assertEqual(data['review_count'], 25)
+        self.assertEqual(len(data['reviews']), 10)
+        self.assertEqual(data['reviews'][0]['text'], 'Review 24')
+        self.assertEqual(data['reviews'][0]['user_id'], self.guest.id)
+        self.assertIsNotNone(data['reviews_next_cursor'])
+
+    def test_pages_follow_cursor_newest_first(self):
+        texts, cursor = [], None
+        while True:
+            url = f'/api/v1/places/{self.place.id}/reviews?limit=10' + (f'&cursor={cursor}' if cursor else '')
+            data = json.loads(self.client.get(url).data)
+            texts += [review['text'] for review in data['reviews']]
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(texts, [f"Review {i}" for i in range(24, -1, -1)])
+
+    def test_detail_cursor_continues_on_reviews_endpoint(self):
+        detail = json.loads(self.client.get(f'/api/v1/places/{self.place.id}').data)
+        page = json.loads(self.client.get(
+            f"/api/v1/places/{self.place.id}/reviews?cursor={detail['reviews_next_cursor']}").data)
+        self.assertEqual(page['reviews'][0]['text'], 'Review 14')
+
+    def test_reviews_of_unknown_place(self):
+        self.assertEqual(self.client.get('/api/v1/places/missing/reviews').status_code, 404)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(f'/api/v1/places/{self.place.id}/reviews?cursor=bad').status_code, 400)
+        self.assertEqual(self.client.get(f'/api/v1/places/{self.place.id}/reviews?limit=0').status_code, 400)
+
+    def test_page_uses_place_index(self):
+        from sqlalchemy import text
+        from app.models.review import Review
+        from app.services.repositories.review_repository import REVIEWS_NEWEST_FIRST
+        query = (db.session.query(Review.id).filter(Review.place_id == 'x')
+                 .order_by(*[col.desc() for col, _ in REVIEWS_NEWEST_FIRST]).limit(11))
+        sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        plan = ' '.join(row[3] for row in db.session.execute(text('EXPLAIN QUERY PLAN ' + sql)))
+        self.assertIn('ix_reviews_place_id_created_at', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class TestPlaceQueryCount(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        from app.models.amenity import Amenity
+        self.owner = self.make_user()
+        self.guest = self.make_user("guest@example.com", last_name="Guest")
+        self.amenities = [Amenity(name="WiFi"), Amenity(name="Pool")]
+        db.session.add_all([self.owner, self.guest] + self.amenities)
+        db.session.commit()
+
+    def add_places(self, count):
+        from app.models.place import Place
+        from app.models.review import Review
+        for i in range(count):
+            place = Place(title=f"Place {i}", price_by_night=10.0, latitude=0.0, longitude=0.0,
+                          owner=self.owner, amenities=list(self.amenities))
+            db.session.add_all([place, Review(text="Nice", rating=4, user=self.guest, place=place)])
+            place.add_rating(4)
+        db.session.commit()
+        db.session.expunge_all()
+
+    def count_queries(self, url):
+        from sqlalchemy import event
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = self.client.get(url)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(response.status_code, 200)
+        return len(statements), json.loads(response.data)
+
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        self.add_places(4)
+        small, _ = self.count_queries('/api/v1/places?limit=50')
+        self.add_places(16)
+        large, data = self.count_queries('/api/v1/places?limit=50')
+        self.assertEqual(len(data['places']), 20)
+        self.assertEqual(small, large)
+        self.assertEqual(data['places'][0]['owner']['email'], 'owner@example.com')
+        self.assertEqual(len(data['places'][0]['amenities']), 2)
+        self.assertEqual(data['places'][0]['review_count'], 1)
+        self.assertNotIn('reviews', data['places'][0])
+
+    def test_detail_loads_relations_up_front(self):
+        self.add_places(1)
+        from app.models.place import Place
+        place_id = Place.query.first().id
+        db.session.expunge_all()
+        count, data = self.count_queries(f'/api/v1/places/{place_id}')
+        # Version (ETag) + lieu + propriétaire, agréments + première page des critiques
+        self.assertEqual(count, 5)
+        self.assertEqual(len(data['reviews']), 1)
+        self.assertEqual(data['owner']['email'], 'owner@example.com')
@@ -0,0 +1,112 @@
+import io
+import json
+import unittest
+from app import db
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+from app.services.bulk_import import BulkImporter, read_ndjson
+from app.services.facade import HBnBFacade
+from tests.base import AppTestCase
+
+
+class TestRatingAggregates(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.facade = HBnBFacade()
+
+        self.owner = self.make_user()
+        self.guest = self.make_user("guest@example.com", last_name="Guest")
+        self.place = Place(title="Loft", price_by_night=10.0, latitude=0.0, longitude=0.0, owner=self.owner)
+        self.other = Place(title="Cabin", price_by_night=10.0, latitude=0.0, longitude=0.0, owner=self.owner)
+        db.session.add_all([self.owner, self.guest, self.place, self.other])
+        db.session.commit()
+
+    def add_review(self, rating, place=None):
+        # Une critique par utilisateur et par lieu : un nouvel auteur pour chaque critique
+        author = User(first_name="Test", last_name="Author", email=f"author{User.query.count()}@example.com", password="x")
+        db.session.add(author)
+        db.session.commit()
+        return self.facade.create_review({'text': 'ok', 'rating': rating, 'user_id': author.id,
+                                          'place_id': (place or self.place).id})
+
+    def aggregates(self, place=None):
+        place = db.session.get(Place, (place or self.place).id)
+        db.session.refresh(place)
+        data = place.to_dict()
+        return data['review_count'], data['rating_average'], data['rating_histogram']
+
+    def test_create_review_updates_aggregates(self):
+        self.add_review(5)
+        self.add_review(2)
+        count, average, histogram = self.aggregates()
+        self.assertEqual(count, 2)
+        self.assertAlmostEqual(average, 3.5)
+        self.assertEqual(histogram, {'1': 0, '2': 1, '3': 0, '4': 0, '5': 1})
+
+    def test_reviews_in_one_transaction_accumulate(self):
+        with self.facade.transaction():
+            self.add_review(4)
+            self.add_review(5)
+        count, average, _ = self.aggregates()
+        self.assertEqual(count, 2)
+        self.assertAlmostEqual(average, 4.5)
+
+    def test_update_review_moves_rating(self):
+        review = self.add_review(1)
+        self.facade.update_review(review.id, {'rating': 4})
+        self.assertEqual(self.aggregates(), (1, 4.0, {'1': 0, '2': 0, '3': 0, '4': 1, '5': 0}))
+        self.facade.update_review(review.id, {'place_id': self.other.id})
+        self.assertEqual(self.aggregates()[0], 0)
+        self.assertEqual(self.aggregates(self.other)[:2], (1, 4.0))
+
+    def test_delete_review_removes_rating(self):
+        review = self.add_review(3)
+        self.add_review(5)
+        self.facade.delete_review(review.id)
+        self.assertEqual(self.aggregates()[:2], (1, 5.0))
+
+    def test_delete_user_removes_their_ratings(self):
+        self.add_review(3)
+        self.facade.create_review({'text': 'ok', 'rating': 5, 'user_id': self.guest.id, 'place_id': self.place.id})
+        self.facade.create_review({'text': 'ok', 'rating': 1, 'user_id': self.guest.id, 'place_id': self.other.id})
+        place_id, other_id = self.place.id, self.other.id
+        version = self.facade.get_place_version(place_id)
+        self.facade.get_place(place_id)  # mis en cache avec les anciens agrégats
+        self.facade.delete_user(self.guest.id)
+        db.session.remove()
+        self.assertEqual(self.facade.get_place(place_id).review_count, 1)
+        self.assertEqual(self.aggregates(db.session.get(Place, place_id))[:2], (1, 3.0))
+        self.assertEqual(self.aggregates(db.session.get(Place, other_id))[:2], (0, 0.0))
+        self.assertNotEqual(self.facade.get_place_version(place_id), version)
+
+    def test_invalid_rating_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.add_review(6)
+        self.assertEqual(Review.query.count(), 0)
+
+    def test_recompute_repairs_drift(self):
+        self.add_review(2)
+        db.session.add(Review(text='raw', rating=4, user=self.guest, place=self.place))
+        db.session.commit()
+        self.assertEqual(self.facade.recompute_rating_aggregates(), 1)
+        self.assertEqual(self.aggregates()[:2], (2, 3.0))
+        self.assertEqual(self.aggregates(self.other)[:2], (0, 0.0))
+
+    def test_bulk_import_maintains_aggregates(self):
+        data = '\n'.join(json.dumps(record) for record in [
+            {"type": "review", "text": "a", "rating": 5, "user_email": "guest@example.com", "place_id": self.place.id},
+            {"type": "review", "text": "b", "rating": 3, "user_email": "owner@example.com", "place_id": self.place.id},
+        ])
+        BulkImporter().run(read_ndjson(io.StringIO(data)))
+        self.assertEqual(self.aggregates()[:2], (2, 4.0))
+
+    def test_sort_by_rating_uses_aggregates(self):
+        self.add_review(2)
+        self.add_review(5, self.other)
+        response = self.client.get('/api/v1/places?sort=rating')
+        self.assertEqual([p['title'] for p in response.get_json()['places']], ['Cabin', 'Loft'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app import create_app, db, read_replica
+from app.models.amenity import Amenity
+from app.persistence.replica import primary_reads
+from app.persistence.unit_of_work import unit_of_work
+from app.services.facade import HBnBFacade
+
+
+class ReplicaTestCase(unittest.TestCase):
+    def make_config(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.database = os.path.join(self.directory, 'hbnb.db')
+        # The schema exists before the replica is opened
+        seed = create_app(type('SeedConfig', (), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{self.database}',
+                                                   'PASSWORD_HASH_WORKERS': 0}))
+        with seed.app_context():
+            db.create_all()
+            db.session.add(Amenity(name='Wifi'))
+            db.session.commit()
+            db.session.remove()
+            db.engine.dispose()
+        self.app = create_app(self.make_config())
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.facade = HBnBFacade()
+
+    def tearDown(self):
+        read_replica.shutdown()
+        db.session.remove()
+        db.engine.dispose()
+        if read_replica.engine is not None:
+            read_replica.engine.dispose()
+        self.ctx.pop()
+        shutil.rmtree(self.directory)
+
+    def write_elsewhere(self, name):
+        """Adds an amenity from another session, as another request would"""
+        with self.app.app_context():
+            self.facade.create_amenity({'name': name})
+            db.session.remove()
+        db.session.remove()
+
+    def names(self):
+        return sorted(amenity.name for amenity in self.facade.get_all_amenities())
+
+
+class TestSnapshotReplica(ReplicaTestCase):
+    def make_config(self):
+        directory = self.directory
+
+        class SnapshotConfig:
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(directory, "hbnb.db")}'
+            PASSWORD_HASH_WORKERS = 0
+            ENTITY_CACHE_MAX_SIZE = 0
+            REPLICA_SNAPSHOT_PATH = os.path.join(directory, 'replica.db')
+            # Refreshed by the tests only
+            REPLICA_REFRESH_SECONDS = 3600
+        return SnapshotConfig
+
+    def test_reads_go_to_the_snapshot(self):
+        self.assertEqual(db.session.get_bind(clause=db.select(Amenity)), read_replica.engine)
+        self.write_elsewhere('Pool')
+        # Not in the snapshot yet
+        self.assertEqual(self.names(), ['Wifi'])
+        read_replica.refresh()
+        db.session.remove()
+        self.assertEqual(self.names(), ['Pool', 'Wifi'])
+        self.assertEqual(read_replica.stats()['refreshes'], 2)
+
+    def test_reads_after_a_write_see_it(self):
+        amenity = self.facade.create_amenity({'name': 'Pool'})
+        self.assertEqual(self.names(), ['Pool', 'Wifi'])
+        self.assertEqual(self.facade.get_amenity(amenity.id).name, 'Pool')
+        self.assertIsNot(db.session.get_bind(clause=db.select(Amenity)), read_replica.engine)
+        # A new request starts on the replica again
+        db.session.remove()
+        self.assertEqual(db.session.get_bind(clause=db.select(Amenity)), read_replica.engine)
+
+    def test_writes_and_their_reads_use_the_primary(self):
+        self.write_elsewhere('Pool')
+        with unit_of_work():
+            self.assertIsNotNone(self.facade.amenity_repo.get_by_attribute('name', 'Pool'))
+        db.session.remove()
+        with primary_reads():
+            self.assertEqual(self.names(), ['Pool', 'Wifi'])
+        self.assertEqual(self.names(), ['Wifi'])
+
+    def test_update_does_not_start_from_a_stale_replica_read(self):
+        from flask_jwt_extended import create_access_token
+        from app.models.place import Place
+        from app.models.review import Review
+        from app.models.user import User
+        self.app.config['JWT_SECRET_KEY'] = 'test-secret-key-of-32-bytes-min.'
+        with primary_reads():
+            host = User(first_name='Host', last_name='Test', email='host@example.com', password='x')
+            guest = User(first_name='Guest', last_name='Test', email='guest@example.com', password='x')
+            db.session.add_all([host, guest])
+            db.session.flush()
+            place = Place(title='Flat', price_by_night=80, latitude=48.85, longitude=2.35, owner_id=host.id)
+            db.session.add(place)
+            db.session.flush()
+            review_id, place_id, guest_id = self.facade.create_review(
+                {'text': 'Great', 'rating': 5, 'user_id': guest.id, 'place_id': place.id}).id, place.id, guest.id
+        db.session.remove()
+        read_replica.refresh()
+        # 5 -> 3 on the primary, the snapshot still has 5
+        with self.app.app_context():
+            self.facade.update_review(review_id, {'rating': 3})
+            db.session.remove()
+
+        token = create_access_token(identity=guest_id)
+        response = self.app.test_client().put(f'/api/v1/reviews/{review_id}', json={'rating': 4, 'text': 'Good'},
+                                              headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200, response.json)
+        db.session.remove()
+        with primary_reads():
+            place = db.session.get(Place, place_id)
+            self.assertEqual(db.session.get(Review, review_id).rating, 4)
+            self.assertEqual((place.review_count, place.rating_sum), (1, 4))
+            self.assertEqual([place.rating_3, place.rating_4, place.rating_5], [0, 1, 0])
+
+    def test_snapshot_is_read_only(self):
+        with read_replica.engine.connect() as connection:
+            with self.assertRaises(Exception):
+                connection.exec_driver_sql("DELETE FROM amenities")
+
+
+class TestReadOnlyUriReplica(ReplicaTestCase):
+    def make_config(self):
+        database = os.path.join(self.directory, 'hbnb.db')
+
+        class ReadOnlyConfig:
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+            PASSWORD_HASH_WORKERS = 0
+            ENTITY_CACHE_MAX_SIZE = 0
+            SQLALCHEMY_REPLICA_URI = f'sqlite:///file:{database}?mode=ro&uri=true'
+        return ReadOnlyConfig
+
+    def test_reads_use_the_read_only_engine(self):
+        self.assertEqual(db.session.get_bind(clause=db.select(Amenity)), read_replica.engine)
+        self.assertFalse(read_replica.stats()['snapshot'])
+        # Same file: no lag
+        self.write_elsewhere('Pool')
+        self.assertEqual(self.names(), ['Pool', 'Wifi'])
+
+
+if __name__ == '__main__':
+    unittest.main()
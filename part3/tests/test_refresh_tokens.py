@@ -0,0 +1,58 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+from app import db, password_hasher
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+from app.services.facade import HBnBFacade, TokenAlreadyRevokedError
+from tests.base import AppTestCase
+
+
+class TestRefreshTokens(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        user = self.make_user("user@example.com", last_name="User", password="secret1", is_admin=True)
+        db.session.add(user)
+        db.session.commit()
+        self.tokens = self.client.post('/api/v1/auth/login', json={'email': 'user@example.com', 'password': 'secret1'}).get_json()
+
+    def post(self, path, token):
+        return self.client.post(f'/api/v1/auth/{path}', headers={'Authorization': f'Bearer {token}'})
+
+    def test_refresh_issues_new_tokens_without_checking_the_password(self):
+        with mock.patch.object(password_hasher, 'verify') as verify:
+            response = self.post('refresh', self.tokens['refresh_token'])
+        self.assertEqual(response.status_code, 200)
+        verify.assert_not_called()
+        tokens = response.get_json()
+        self.assertNotEqual(tokens['refresh_token'], self.tokens['refresh_token'])
+        protected = self.client.get('/api/v1/auth/protected', headers={'Authorization': f"Bearer {tokens['access_token']}"})
+        self.assertTrue(protected.get_json()['is_admin'])
+
+    def test_refresh_token_is_single_use(self):
+        self.assertEqual(self.post('refresh', self.tokens['refresh_token']).status_code, 200)
+        self.assertEqual(self.post('refresh', self.tokens['refresh_token']).status_code, 401)
+
+    def test_access_token_cannot_refresh(self):
+        self.assertEqual(self.post('refresh', self.tokens['access_token']).status_code, 422)
+
+    def test_logout_revokes_refresh_token(self):
+        self.assertEqual(self.post('logout', self.tokens['refresh_token']).status_code, 204)
+        self.assertEqual(self.post('refresh', self.tokens['refresh_token']).status_code, 401)
+
+    def test_concurrent_rotation_fails_on_primary_key(self):
+        facade = HBnBFacade()
+        expires_at = datetime.utcnow() + timedelta(days=1)
+        facade.revoke_token('jti-1', expires_at)
+        with self.assertRaises(TokenAlreadyRevokedError):
+            facade.revoke_token('jti-1', expires_at)
+
+    def test_expired_revocations_are_purged(self):
+        facade = HBnBFacade()
+        facade.revoke_token('old', datetime.utcnow() - timedelta(seconds=1))
+        facade.revoke_token('new', datetime.utcnow() + timedelta(days=1))
+        self.assertEqual([row.jti for row in RevokedToken.query.all()], ['new'])
+
+
+if __name__ == '__main__':
+    unittest.main()
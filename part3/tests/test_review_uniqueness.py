@@ -0,0 +1,77 @@
+import io
+import json
+import unittest
+from unittest import mock
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.place import Place
+from app.models.review import Review
+from app.persistence.index_advisor import StatementRecorder, explain
+from app.services.bulk_import import BulkImporter, read_ndjson
+from app.services.facade import HBnBFacade, ReviewAlreadyExistsError
+from tests.base import AppTestCase
+
+
+class TestOneReviewPerUserAndPlace(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.facade = HBnBFacade()
+
+        owner = self.make_user()
+        self.guest = self.make_user("guest@example.com", last_name="Guest")
+        self.place = Place(title="Loft", price_by_night=10.0, latitude=0.0, longitude=0.0, owner=owner)
+        self.other = Place(title="Cabin", price_by_night=10.0, latitude=0.0, longitude=0.0, owner=owner)
+        db.session.add_all([owner, self.guest, self.place, self.other])
+        db.session.commit()
+
+    def review(self, place, rating=5):
+        return {'text': 'ok', 'rating': rating, 'user_id': self.guest.id, 'place_id': place.id}
+
+    def post_review(self, place):
+        token = create_access_token(identity=self.guest.id)
+        return self.client.post('/api/v1/reviews/', json={'text': 'ok', 'rating': 5, 'place_id': place.id},
+                                headers={'Authorization': f'Bearer {token}'})
+
+    def test_second_review_is_forbidden(self):
+        self.assertEqual(self.post_review(self.place).status_code, 201)
+        self.assertEqual(self.post_review(self.place).status_code, 403)
+        self.assertEqual(self.post_review(self.other).status_code, 201)
+        self.assertEqual(Review.query.count(), 2)
+
+    def test_constraint_catches_a_race(self):
+        self.facade.create_review(self.review(self.place, rating=4))
+        # Une requête concurrente n'a pas encore vu la première critique
+        with mock.patch.object(self.facade.review_repo, 'exists_for_user_and_place', return_value=False):
+            with self.assertRaises(ReviewAlreadyExistsError):
+                self.facade.create_review(self.review(self.place, rating=1))
+        db.session.expire_all()
+        self.assertEqual(Review.query.count(), 1)
+        self.assertEqual(db.session.get(Place, self.place.id).review_count, 1)
+
+    def test_moving_a_review_onto_a_reviewed_place_is_rejected(self):
+        self.facade.create_review(self.review(self.place))
+        review = self.facade.create_review(self.review(self.other))
+        with self.assertRaises(ReviewAlreadyExistsError):
+            self.facade.update_review(review.id, {'place_id': self.place.id})
+
+    def test_bulk_import_skips_reviewed_pairs(self):
+        self.facade.create_review(self.review(self.place))
+        record = {"type": "review", "text": "again", "rating": 1, "user_email": "guest@example.com"}
+        data = '\n'.join(json.dumps(dict(record, place_id=place.id)) for place in (self.place, self.other, self.other))
+        report = BulkImporter().run(read_ndjson(io.StringIO(data)))
+        self.assertEqual(report.created['review'], 1)
+        self.assertEqual(report.skipped['review'], 2)
+
+    def test_existence_check_uses_unique_index(self):
+        # The plan of the statement the repository really runs, not of a hand-written copy
+        user_id, place_id = self.guest.id, self.place.id
+        with StatementRecorder().listen(db.engine) as recorder:
+            self.facade.review_repo.exists_for_user_and_place(user_id, place_id)
+        [recorded] = recorder.statements.values()
+        with db.engine.connect() as connection:
+            plan = explain(connection, recorded.statement, recorded.parameters)
+        self.assertIn('uq_reviews_user_id_place_id', ' '.join(plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
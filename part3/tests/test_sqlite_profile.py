@@ -0,0 +1,123 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from app.models.amenity import Amenity
+from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.sqlite_profile import is_busy, retry_on_busy
+from app.persistence.unit_of_work import transactional
+
+
+def busy_error():
+    return OperationalError('INSERT ...', {}, sqlite3.OperationalError('database is locked'))
+
+
+class TestRetryOnBusy(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('config.TestingConfig')
+        self.app.config['SQLITE_BUSY_BACKOFF'] = 0.001
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+    def tearDown(self):
+        self.ctx.pop()
+
+    def test_is_busy(self):
+        self.assertTrue(is_busy(busy_error()))
+        self.assertFalse(is_busy(OperationalError('SELECT', {}, sqlite3.OperationalError('no such table: x'))))
+
+    def test_retries_then_succeeds(self):
+        calls, rollbacks = [], []
+
+        def operation():
+            calls.append(1)
+            if len(calls) < 3:
+                raise busy_error()
+            return 'done'
+        self.assertEqual(retry_on_busy(operation, on_retry=lambda: rollbacks.append(1)), 'done')
+        self.assertEqual((len(calls), len(rollbacks)), (3, 2))
+
+    def test_gives_up_and_ignores_other_errors(self):
+        self.app.config['SQLITE_BUSY_RETRIES'] = 2
+        calls = []
+
+        def busy():
+            calls.append(1)
+            raise busy_error()
+        with self.assertRaises(OperationalError):
+            retry_on_busy(busy)
+        self.assertEqual(len(calls), 3)
+
+        def broken():
+            calls.append(1)
+            raise OperationalError('SELECT', {}, sqlite3.OperationalError('no such table: x'))
+        with self.assertRaises(OperationalError):
+            retry_on_busy(broken)
+        self.assertEqual(len(calls), 4)
+
+    def test_transactional_replays_on_fresh_arguments(self):
+        seen = []
+
+        class Facade:
+            @transactional
+            def create(self, data):
+                seen.append(data.pop('name'))
+                if len(seen) == 1:
+                    raise busy_error()
+                return len(seen)
+        data = {'name': 'Wifi'}
+        self.assertEqual(Facade().create(data), 2)
+        self.assertEqual(seen, ['Wifi', 'Wifi'])
+        self.assertEqual(data, {'name': 'Wifi'})
+
+
+class TestSQLiteProfile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'hbnb.db')
+
+        class FileConfig:
+            SECRET_KEY = 'sqlite-profile-test-secret-key-0123456789'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.path}'
+            PASSWORD_HASH_WORKERS = 0
+            SQLITE_POOL_SIZE = 3
+            SQLITE_PRAGMAS = {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 20}
+            SQLITE_BUSY_RETRIES = 10
+            SQLITE_BUSY_BACKOFF = 0.05
+        self.app = create_app(FileConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        shutil.rmtree(self.directory)
+
+    def test_pragmas_and_pool(self):
+        pragma = lambda name: db.session.execute(db.text(f'PRAGMA {name}')).scalar()
+        self.assertEqual(pragma('journal_mode'), 'wal')
+        self.assertEqual(pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(pragma('busy_timeout'), 20)
+        self.assertEqual(db.engine.pool.size(), 3)
+
+    def test_write_waits_for_another_writer(self):
+        # Another process holds the write lock for longer than busy_timeout
+        other = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        other.execute('BEGIN IMMEDIATE')
+        threading.Timer(0.2, other.commit).start()
+        try:
+            SQLAlchemyRepository(Amenity).add(Amenity(name='Wifi'))
+        finally:
+            other.close()
+        db.session.remove()
+        self.assertEqual(db.session.scalar(db.select(db.func.count(Amenity.id))), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from sqlalchemy import event
+from app import db
+from app.services.facade import HBnBFacade
+from tests.base import AppTestCase
+
+
+class TestUnitOfWork(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.facade = HBnBFacade()
+
+        from app.models.amenity import Amenity
+        from app.models.place import Place
+        self.owner = self.make_user()
+        self.wifi = Amenity(name="WiFi")
+        self.pool = Amenity(name="Pool")
+        self.place = Place(title="Old title", price_by_night=10.0, latitude=0.0, longitude=0.0, owner=self.owner)
+        db.session.add_all([self.owner, self.wifi, self.pool, self.place])
+        db.session.commit()
+
+        self.commits = 0
+        self.flushes = 0
+        event.listen(db.engine, 'commit', self.on_commit)
+        event.listen(db.session, 'after_flush', self.on_flush)
+
+    def tearDown(self):
+        event.remove(db.engine, 'commit', self.on_commit)
+        event.remove(db.session, 'after_flush', self.on_flush)
+        super().tearDown()
+
+    def on_commit(self, conn):
+        self.commits += 1
+
+    def on_flush(self, session, flush_context):
+        self.flushes += 1
+
+    def test_update_place_commits_once(self):
+        self.facade.update_place(self.place.id, {'title': 'New title', 'amenity_ids': [self.wifi.id, self.pool.id]})
+        self.assertEqual(self.commits, 1)
+        self.assertEqual(self.flushes, 1)
+        db.session.expire_all()
+        self.assertEqual(self.place.title, 'New title')
+        self.assertEqual({a.name for a in self.place.amenities}, {'WiFi', 'Pool'})
+
+    def test_failed_operation_rolls_back_everything(self):
+        with self.assertRaises(ValueError):
+            self.facade.update_place(self.place.id, {'title': 'New title', 'amenity_ids': ['missing']})
+        self.assertEqual(self.commits, 0)
+        db.session.expire_all()
+        self.assertEqual(self.place.title, 'Old title')
+
+    def test_nested_operations_share_one_commit(self):
+        with self.facade.transaction():
+            self.facade.create_amenity({'name': 'Sauna'})
+            self.facade.update_amenity(self.wifi.id, {'name': 'Fibre'})
+        self.assertEqual(self.commits, 1)
+
+    def test_batch_commits_every_batch_size_changes(self):
+        with self.facade.batch(batch_size=10) as unit:
+            for i in range(25):
+                self.facade.create_amenity({'name': f'Amenity {i}'})
+        self.assertEqual(unit.commits, 3)
+        self.assertEqual(self.commits, 3)
+        self.assertEqual(len(self.facade.get_all_amenities()), 27)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
 import unittest
 import json
-from app import create_app
+from sqlalchemy import event
+from app import create_app, db
+from app.services.facade import HBnBFacade
+from tests.base import AppTestCase
 
 
 class TestUserEndpoints(unittest.TestCase):
@@ -64,3 +67,46 @@ class TestUserEndpoints(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
         self.assertEqual(data['first_name'], 'Jane Updated')
+
+
+class TestFirstAdminBootstrap(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.statements = []
+        event.listen(db.engine, 'before_cursor_execute', self.record)
+
+    def tearDown(self):
+        event.remove(db.engine, 'before_cursor_execute', self.record)
+        super().tearDown()
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def register(self, email):
+        return self.client.post('/api/v1/users/', json={
+            "first_name": "Ada", "last_name": "Admin", "email": email,
+            "password": "secret1", "is_admin": True
+        })
+
+    def add_user(self):
+        from app.models.user import User
+        db.session.add(User(first_name="Test", last_name="User", email="user@example.com", password="x"))
+        db.session.commit()
+
+    def test_has_users(self):
+        facade = HBnBFacade()
+        self.assertFalse(facade.has_users())
+        self.add_user()
+        self.assertTrue(facade.has_users())
+
+    def test_admin_self_registration_is_refused_once_users_exist(self):
+        self.add_user()
+        self.assertEqual(self.register('second@example.com').status_code, 403)
+
+    def test_check_does_not_load_the_users_table(self):
+        self.add_user()
+        self.register('second@example.com')
+        self.statements.clear()
+        self.register('third@example.com')
+        # Une fois un utilisateur vu, la vérification ne coûte plus aucune requête
+        self.assertEqual([s for s in self.statements if 'FROM users' in s], [])
@@ -0,0 +1,92 @@
+import unittest
+import uuid
+from sqlalchemy import text
+from app import create_app, db
+from app.models.place import Place
+from app.persistence import uuid_type
+from app.services.facade import HBnBFacade
+from config import TestingConfig
+from tests.base import AppTestCase
+
+
+class BinaryIdConfig(TestingConfig):
+    ID_STORAGE = 'binary'
+
+
+class TestBinaryIds(AppTestCase):
+    config = BinaryIdConfig
+
+    def setUp(self):
+        super().setUp()
+        self.facade = HBnBFacade()
+        self.owner = self.make_user()
+        self.place = Place(title="Sunny loft", description="Near the beach", price_by_night=10.0,
+                           latitude=45.0, longitude=5.0, owner=self.owner)
+        db.session.add_all([self.owner, self.place])
+        db.session.commit()
+
+    def test_ids_are_stored_as_16_bytes(self):
+        row = db.session.execute(text("SELECT typeof(id), length(id), typeof(owner_id) FROM places")).one()
+        self.assertEqual(tuple(row), ('blob', 16, 'blob'))
+        stored = db.session.execute(text("SELECT id FROM places")).scalar()
+        self.assertEqual(uuid.UUID(bytes=stored), uuid.UUID(self.place.id))
+
+    def test_api_keeps_the_string_form(self):
+        response = self.client.get(f'/api/v1/places/{self.place.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['id'], self.place.id)
+        self.assertEqual(response.get_json()['owner']['id'], self.owner.id)
+        self.assertEqual(self.client.get('/api/v1/places/not-a-uuid').status_code, 404)
+
+    def test_raw_sql_indexes_follow(self):
+        results = self.facade.search_places('beach', 10)
+        self.assertEqual([result[0].id for result in results], [self.place.id])
+        self.facade.delete_place(self.place.id)
+        self.assertEqual(db.session.execute(text("SELECT count(*) FROM places_fts")).scalar(), 0)
+
+    def test_conversion_round_trip(self):
+        value = str(uuid.uuid4())
+        self.assertEqual(uuid_type.from_bytes(uuid_type.to_bytes(value)), value)
+        # Text that would not come back as sent is never stored as 16 bytes
+        for other in ('place-0000000001', value.replace('-', ''), '{%s}' % value, f'urn:uuid:{value}', value.upper()):
+            with self.assertRaises(ValueError):
+                uuid_type.to_bytes(other)
+
+    def test_other_ids_never_read_back_as_another_uuid(self):
+        for other in ('place-0000000001', 'place-000000001', self.place.id.replace('-', ''), 'legacy-id'):
+            self.assertNotEqual(len(uuid_type._to_blob(other)), 16)
+            self.assertEqual(uuid_type.from_bytes(uuid_type._to_blob(other)), other)
+        self.assertEqual(self.client.get('/api/v1/places/place-0000000001').status_code, 404)
+        self.assertEqual(self.client.get(f"/api/v1/places/{self.place.id.replace('-', '')}").status_code, 404)
+
+    def test_unknown_storage_is_rejected(self):
+        class BadConfig(TestingConfig):
+            ID_STORAGE = 'base64'
+        with self.assertRaises(ValueError):
+            create_app(BadConfig)
+
+
+class TestConvertIds(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        owner = self.make_user()
+        self.place = Place(title="Loft", price_by_night=10.0, latitude=0.0, longitude=0.0, owner=owner)
+        db.session.add_all([owner, self.place])
+        db.session.commit()
+
+    def id_types(self):
+        return tuple(db.session.execute(text("SELECT typeof(id), typeof(owner_id) FROM places")).one())
+
+    def test_converts_in_place_and_back(self):
+        rowid = db.session.execute(text("SELECT rowid FROM places")).scalar()
+        uuid_type.convert_ids(db.session.connection(), 'binary')
+        self.assertEqual(self.id_types(), ('blob', 'blob'))
+        self.assertEqual(db.session.execute(text("SELECT rowid FROM places")).scalar(), rowid)
+        uuid_type.convert_ids(db.session.connection(), 'text')
+        db.session.commit()
+        self.assertEqual(self.id_types(), ('text', 'text'))
+        self.assertEqual(db.session.get(Place, self.place.id).owner.email, 'owner@example.com')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from sqlalchemy import event
+from app import db, entity_cache
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.services import facade
+from app.warmup import warm_up
+from tests.base import AppTestCase
+
+
+class TestWarmUp(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        owner = self.make_user()
+        self.wifi = Amenity(name="Wifi")
+        db.session.add_all([owner, self.wifi, Amenity(name="Pool"),
+                            Place(title="Loft", price_by_night=10.0, latitude=0.0, longitude=0.0, owner=owner)])
+        db.session.commit()
+        self.wifi_id = self.wifi.id
+        db.session.remove()
+
+    def test_warm_up_primes_the_amenity_catalog(self):
+        timings = warm_up(self.app)
+        self.assertEqual(timings['amenities'], 2)
+        self.assertEqual(timings['failed_endpoints'], 0)
+
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            self.assertEqual(facade.get_amenity(self.wifi_id).name, 'Wifi')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(statements, [])
+
+    def test_warm_up_renders_swagger(self):
+        timings = warm_up(self.app)
+        self.assertIn('swagger_ms', timings)
+        self.assertIn('/api/v1/places', self.app.test_client().get('/swagger.json').get_json()['paths'])
+
+
+if __name__ == '__main__':
+    unittest.main()
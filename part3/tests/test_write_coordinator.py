@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from flask_jwt_extended import create_access_token
+from app import create_app, db, write_coordinator
+from app.models.amenity import Amenity
+from app.models.user import User
+from app.persistence.write_coordinator import EntityRef, WriteResult
+from app.services.facade import HBnBFacade
+
+
+class TestWriteCoordinator(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        class CoordinatedConfig:
+            SECRET_KEY = 'write-coordinator-test-secret-key-0123456789'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(self.directory, "hbnb.db")}'
+            PASSWORD_HASH_WORKERS = 0
+            BCRYPT_LOG_ROUNDS = 4
+            WRITE_COORDINATOR_ENABLED = True
+            # Keeps the batch open long enough to collect the writes of every test thread
+            WRITE_COORDINATOR_MAX_DELAY = 0.2
+        self.app = create_app(CoordinatedConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.facade = HBnBFacade()
+
+    def tearDown(self):
+        write_coordinator.shutdown()
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        shutil.rmtree(self.directory)
+
+    def concurrently(self, calls):
+        results = [None] * len(calls)
+
+        def run(index, call):
+            with self.app.app_context():
+                try:
+                    results[index] = call()
+                except Exception as error:
+                    results[index] = error
+        threads = [threading.Thread(target=run, args=(index, call)) for index, call in enumerate(calls)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_writes_share_one_commit(self):
+        results = self.concurrently([lambda i=i: self.facade.create_amenity({'name': f'Amenity {i}'}).name
+                                     for i in range(8)])
+        self.assertEqual(sorted(results), sorted(f'Amenity {i}' for i in range(8)))
+        stats = write_coordinator.stats()
+        self.assertEqual(stats['jobs'], 8)
+        self.assertLess(stats['batches'], 8)
+        self.assertEqual(db.session.scalar(db.select(db.func.count(Amenity.id))), 8)
+
+    def test_failing_write_is_rolled_back_alone(self):
+        results = self.concurrently([lambda: self.facade.create_amenity({'name': 'Wifi'}).name,
+                                     lambda: self.facade.create_amenity({'name': ''}),
+                                     lambda: self.facade.create_amenity({'name': 'Pool'}).name])
+        self.assertEqual(results[0], 'Wifi')
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(results[2], 'Pool')
+        self.assertEqual(write_coordinator.stats()['failed'], 1)
+        self.assertEqual(db.session.scalar(db.select(db.func.count(Amenity.id))), 2)
+
+    def test_result_is_loaded_in_the_callers_session(self):
+        amenity = self.facade.create_amenity({'name': 'Wifi'})
+        self.assertIn(amenity, db.session)
+        updated = self.facade.update_amenity(amenity.id, {'name': 'Fast wifi'})
+        self.assertIs(updated, amenity)
+        self.assertEqual(amenity.name, 'Fast wifi')
+        amenity_id = amenity.id
+        self.facade.delete_amenity(amenity_id)
+        self.assertNotIn(amenity, db.session)
+        self.assertIsNone(self.facade.get_amenity(amenity_id))
+
+    def test_future_resolves_after_commit(self):
+        future = write_coordinator.submit(HBnBFacade.create_amenity.__wrapped__, self.facade, ({'name': 'Wifi'},))
+        result = future.result(timeout=10)
+        self.assertIsInstance(result, WriteResult)
+        self.assertIsInstance(result.value, EntityRef)
+        self.assertEqual(db.session.get(Amenity, result.value.identity).name, 'Wifi')
+
+    def test_password_is_hashed_before_the_writer(self):
+        user = self.facade.create_user({'first_name': 'Ada', 'last_name': 'L', 'email': 'ada@example.com',
+                                        'password': 'secret1'})
+        self.assertTrue(user.verify_password('secret1'))
+        self.assertEqual(db.session.scalar(db.select(db.func.count(User.id))), 1)
+
+    def test_metrics_endpoint(self):
+        self.facade.create_amenity({'name': 'Wifi'})
+        token = create_access_token(identity='someone', additional_claims={'is_admin': True})
+        client = self.app.test_client()
+        stats = client.get('/api/v1/admin/metrics', headers={'Authorization': f'Bearer {token}'}).get_json()
+        self.assertEqual(stats['write_coordinator']['batch_size']['count'], 1)
+        text = client.get('/api/v1/admin/metrics?format=prometheus',
+                          headers={'Authorization': f'Bearer {token}'}).get_data(as_text=True)
+        self.assertIn('hbnb_write_coordinator_latency_seconds_count 1', text)
+
+    def test_needs_a_file_database(self):
+        class MemoryConfig:
+            SQLALCHEMY_DATABASE_URI = 'sqlite://'
+            WRITE_COORDINATOR_ENABLED = True
+        with self.assertRaises(ValueError):
+            create_app(MemoryConfig)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,9 +19,12 @@ document.addEventListener('DOMContentLoaded', () => {
     // API Endpoints
     const API_BASE_URL = 'http://127.0.0.1:5000/api/v1';
     const API_LOGIN_ENDPOINT = `${API_BASE_URL}/auth/login`;
+    const API_REFRESH_ENDPOINT = `${API_BASE_URL}/auth/refresh`; // New tokens from the refresh token (no password)
+    const API_LOGOUT_ENDPOINT = `${API_BASE_URL}/auth/logout`;
     const API_PLACES_ENDPOINT = `${API_BASE_URL}/places`; // Endpoint for all places (index page)
     const API_PLACE_DETAILS_ENDPOINT = (placeId) => `${API_BASE_URL}/places/${placeId}`; // Endpoint for specific place details
     const API_ADD_REVIEW_ENDPOINT = (placeId) => `${API_BASE_URL}/places/${placeId}/reviews`; // Endpoint to add review for a place
+    const API_PLACE_REVIEWS_ENDPOINT = (placeId) => `${API_BASE_URL}/places/${placeId}/reviews`; // Paginated reviews of a place (GET)
 
     // Helper function to get a cookie value by name
     function getCookie(name) {
@@ -41,6 +44,40 @@ document.addEventListener('DOMContentLoaded', () => {
         return getCookie('token');
     }
 
+    // Store the tokens returned by /auth/login and /auth/refresh
+    function storeTokens(data) {
+        document.cookie = `token=${data.access_token}; path=/;`;
+        if (data.refresh_token) {
+            document.cookie = `refresh_token=${data.refresh_token}; path=/;`;
+        }
+    }
+
+    // Renew an expired access token with the refresh token; the refresh token is single use
+    async function refreshTokens() {
+        const refreshToken = getCookie('refresh_token');
+        if (!refreshToken) return false;
+        const response = await fetch(API_REFRESH_ENDPOINT, {
+            method: 'POST',
+            headers: { 'Authorization': `Bearer ${refreshToken}` }
+        });
+        if (!response.ok) return false;
+        storeTokens(await response.json());
+        return true;
+    }
+
+    // fetch with the access token, renewed once through /auth/refresh on a 401
+    async function fetchWithAuth(url, options = {}) {
+        const send = () => fetch(url, {
+            ...options,
+            headers: { ...(options.headers || {}), 'Authorization': `Bearer ${getJwtToken()}` }
+        });
+        const response = await send();
+        if (response.status === 401 && await refreshTokens()) {
+            return send();
+        }
+        return response;
+    }
+
     // Function to update login/logout link visibility
     function updateLoginLink() {
         if (loginLink) {
@@ -58,9 +95,24 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     // Function to handle logout
-    function handleLogout(event) {
+    async function handleLogout(event) {
         event.preventDefault();
+        const refreshToken = getCookie('refresh_token');
+        if (refreshToken) {
+            // Revoke the refresh token server side; the short-lived access token simply expires.
+            // Awaited before leaving the page, and keepalive so the browser does not cancel it on navigation
+            try {
+                await fetch(API_LOGOUT_ENDPOINT, {
+                    method: 'POST',
+                    headers: { 'Authorization': `Bearer ${refreshToken}` },
+                    keepalive: true
+                });
+            } catch (error) {
+                console.error('Error during logout:', error);
+            }
+        }
         document.cookie = 'token=; path=/; expires=Thu, 01 Jan 1970 00:00:00 UTC;';
+        document.cookie = 'refresh_token=; path=/; expires=Thu, 01 Jan 1970 00:00:00 UTC;';
         alert('You have been logged out.');
         window.location.href = 'index.html';
     }
@@ -84,7 +136,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
                 if (response.ok) {
                     const data = await response.json();
-                    document.cookie = `token=${data.access_token}; path=/;`;
+                    storeTokens(data);
                     window.location.href = 'index.html';
                 } else {
                     let errorMessage = 'Login failed. Please try again.';
@@ -110,11 +162,23 @@ document.addEventListener('DOMContentLoaded', () => {
     // --- Logic for index.html - Fetch and display places ---
     if (placesListSection) {
         const priceFilter = document.getElementById('price-filter');
+        const PLACES_PAGE_SIZE = 50;
         let currentPlaces = [];
+        let nextCursor = null; // Cursor of the next page returned by the API (null on the last page)
 
-        async function fetchPlaces() {
+        // Fetch one page of places; pass the previous next_cursor to append the following page
+        async function fetchPlaces(cursor = null) {
             try {
-                const response = await fetch(API_PLACES_ENDPOINT, {
+                const params = new URLSearchParams({ limit: PLACES_PAGE_SIZE });
+                if (cursor) {
+                    params.set('cursor', cursor);
+                }
+                // The price filter is applied by the API so only matching places are downloaded
+                const maxPrice = parseFloat(priceFilter.value);
+                if (!isNaN(maxPrice) && maxPrice > 0) {
+                    params.set('max_price', maxPrice);
+                }
+                const response = await fetch(`${API_PLACES_ENDPOINT}?${params}`, {
                     method: 'GET',
                     headers: {
                         'Content-Type': 'application/json'
@@ -122,7 +186,9 @@ document.addEventListener('DOMContentLoaded', () => {
                 });
 
                 if (response.ok) {
-                    currentPlaces = await response.json();
+                    const data = await response.json();
+                    currentPlaces = cursor ? currentPlaces.concat(data.places) : data.places;
+                    nextCursor = data.next_cursor;
                     displayPlaces(currentPlaces);
                 } else {
                     console.error('Failed to fetch places:', response.status, response.statusText);
@@ -138,7 +204,6 @@ document.addEventListener('DOMContentLoaded', () => {
             placesListSection.innerHTML = '<h2>Available Places</h2>';
             if (placesToDisplay.length === 0) {
                 placesListSection.innerHTML += '<p>No places found matching your criteria.</p>';
-                return;
             }
 
             placesToDisplay.forEach(place => {
@@ -152,19 +217,19 @@ document.addEventListener('DOMContentLoaded', () => {
                 `;
                 placesListSection.appendChild(placeCard);
             });
-        }
 
-        function filterAndDisplayPlaces() {
-            const maxPrice = parseFloat(priceFilter.value);
-            let filteredPlaces = currentPlaces;
-
-            if (!isNaN(maxPrice) && maxPrice > 0) {
-                filteredPlaces = currentPlaces.filter(place => place.price_by_night <= maxPrice);
+            // Only offer the next page when the API returned a cursor for it
+            if (nextCursor) {
+                const loadMoreButton = document.createElement('button');
+                loadMoreButton.classList.add('details-button');
+                loadMoreButton.textContent = 'Load more places';
+                loadMoreButton.addEventListener('click', () => fetchPlaces(nextCursor));
+                placesListSection.appendChild(loadMoreButton);
             }
-            displayPlaces(filteredPlaces);
         }
 
-        priceFilter.addEventListener('change', filterAndDisplayPlaces);
+        // Changing the filter restarts from the first page of the filtered list
+        priceFilter.addEventListener('change', () => fetchPlaces());
         fetchPlaces();
     }
 
@@ -244,6 +309,7 @@ document.addEventListener('DOMContentLoaded', () => {
             <p><strong>Max Guests:</strong> ${place.max_guest}</p>
             <p><strong>Number of Rooms:</strong> ${place.number_rooms}</p>
             <p><strong>Number of Bathrooms:</strong> ${place.number_bathrooms}</p>
+            <p><strong>Rating:</strong> ${place.review_count > 0 ? `${place.rating_average.toFixed(1)}/5 (${place.review_count} reviews)` : 'Not rated yet'}</p>
         `;
         placeDetailsSection.appendChild(placeInfoDiv);
 
@@ -270,16 +336,13 @@ document.addEventListener('DOMContentLoaded', () => {
         reviewsTitle.textContent = 'Reviews';
         placeDetailsSection.appendChild(reviewsTitle);
 
+        // The place details only carry the first page of reviews; the next pages are fetched on demand
+        const reviewsList = document.createElement('div');
+        reviewsList.classList.add('reviews-list');
+        placeDetailsSection.appendChild(reviewsList);
+
         if (place.reviews && place.reviews.length > 0) {
-            place.reviews.forEach(review => {
-                const reviewCard = document.createElement('article');
-                reviewCard.classList.add('review-card');
-                reviewCard.innerHTML = `
-                    <p class="review-comment">"${review.comment}"</p>
-                    <p class="review-meta">Rating: ${review.rating}/5 - by User ${review.user_id} on ${new Date(review.created_at).toLocaleDateString()}</p>
-                `;
-                placeDetailsSection.appendChild(reviewCard);
-            });
+            appendReviews(reviewsList, place.id, place.reviews, place.reviews_next_cursor);
         } else {
             const noReviews = document.createElement('p');
             noReviews.textContent = 'No reviews yet. Be the first to review!';
@@ -287,6 +350,52 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // Append a page of reviews, followed by a button loading the next page when there is one
+    function appendReviews(reviewsList, placeId, reviews, nextCursor) {
+        reviews.forEach(review => {
+            const reviewCard = document.createElement('article');
+            reviewCard.classList.add('review-card');
+            reviewCard.innerHTML = `
+                <p class="review-comment">"${review.text}"</p>
+                <p class="review-meta">Rating: ${review.rating}/5 - by User ${review.user_id} on ${new Date(review.created_at).toLocaleDateString()}</p>
+            `;
+            reviewsList.appendChild(reviewCard);
+        });
+
+        if (nextCursor) {
+            const loadMoreButton = document.createElement('button');
+            loadMoreButton.classList.add('details-button');
+            loadMoreButton.textContent = 'Load more reviews';
+            loadMoreButton.addEventListener('click', async () => {
+                loadMoreButton.remove();
+                await fetchMoreReviews(reviewsList, placeId, nextCursor);
+            });
+            reviewsList.appendChild(loadMoreButton);
+        }
+    }
+
+    // Fetch the page of reviews following the given cursor
+    async function fetchMoreReviews(reviewsList, placeId, cursor) {
+        try {
+            const params = new URLSearchParams({ cursor: cursor });
+            const response = await fetch(`${API_PLACE_REVIEWS_ENDPOINT(placeId)}?${params}`, {
+                method: 'GET',
+                headers: {
+                    'Content-Type': 'application/json'
+                }
+            });
+
+            if (response.ok) {
+                const data = await response.json();
+                appendReviews(reviewsList, placeId, data.reviews, data.next_cursor);
+            } else {
+                console.error('Failed to fetch reviews:', response.status, response.statusText);
+            }
+        } catch (error) {
+            console.error('Network error fetching reviews:', error);
+        }
+    }
+
     // Function to submit a new review (used by both place.html and add_review.html)
     async function submitReview(placeId, rating, comment) {
         const token = getJwtToken();
@@ -297,11 +406,10 @@ document.addEventListener('DOMContentLoaded', () => {
         }
 
         try {
-            const response = await fetch(API_ADD_REVIEW_ENDPOINT(placeId), {
+            const response = await fetchWithAuth(API_ADD_REVIEW_ENDPOINT(placeId), {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json',
-                    'Authorization': `Bearer ${token}`
+                    'Content-Type': 'application/json'
                 },
                 body: JSON.stringify({ rating: parseInt(rating), comment: comment })
             });